@@ -3,26 +3,29 @@ import sys
 import os
 import traceback
 import pygame
-from PyQt5.QtWidgets import QApplication, QMainWindow
-from PyQt5.QtCore import QTimer, QThread, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
 from src.simulation import Simulation
+from src.render_pipeline import SimulationWorker, SnapshotRenderer
 from src.data_recorder import DataRecorder
 from src.config import WIDTH, HEIGHT
 from src.shared import PygameContext
 from src.ui.main_window import MainWindow
 
-class TestModeThread(QThread):
-    """Thread for running the test mode simulation"""
-    update_signal = pyqtSignal(object)  # Signal to send updates to main thread
+class TestScenario:
+    """Scripted test run: four vehicles with staggered starts and a fixed light cycle.
     
-    def __init__(self, simulation):
-        super().__init__()
+    Runs on the simulation thread: start() once, then tick() in place of
+    the normal simulation tick (see SimulationWorker).
+    """
+    
+    def __init__(self, simulation, report=None):
         self.simulation = simulation
-        self.running = True
-        self.msleep(100)  # Initial delay to let UI initialize
+        self.report = report  # Called with a status dict whenever something is logged
+        self.running = False
     
-    def run(self):
-        """Run the test mode simulation"""
+    def start(self):
+        """Set up the lights and the test vehicles"""
         # Set initial light states to green for east-west
         self.simulation.ns_light = "red"
         self.simulation.ew_light = "green"
@@ -34,10 +37,11 @@ class TestModeThread(QThread):
         print("Creating vehicles with staggered start times...")
         
         # Create vehicles but don't add them to active_vehicles yet
-        east_vehicle, west_vehicle, north_vehicle, south_vehicle = self.simulation.create_test_vehicles()
+        self.vehicles = self.simulation.create_test_vehicles()
+        east_vehicle, west_vehicle, north_vehicle, south_vehicle = self.vehicles
         
         # Store vehicles and their start times
-        vehicles_to_add = [
+        self.vehicles_to_add = [
             (east_vehicle, "East", 0),    # East vehicle starts immediately
             (west_vehicle, "West", 20),   # West vehicle starts after 20 ticks
             (north_vehicle, "North", 40),  # North vehicle starts after 40 ticks
@@ -45,134 +49,149 @@ class TestModeThread(QThread):
         ]
         
         # Track vehicle states
-        last_logged_tick = -10
-        vehicles_added = set()
+        self.last_logged_tick = -10
+        self.vehicles_added = set()
         
         print("Initial States:")
-        for vehicle, direction, start_time in vehicles_to_add:
+        for vehicle, direction, start_time in self.vehicles_to_add:
             print(f"{direction} Vehicle: starts at tick {start_time}")
         print("===================\n")
+        self.running = True
+    
+    def tick(self):
+        """Run one tick of the test"""
+        if not self.running:
+            return
+        east_vehicle, west_vehicle, north_vehicle, south_vehicle = self.vehicles
+        vehicles_to_add = self.vehicles_to_add
+        vehicles_added = self.vehicles_added
+        last_logged_tick = self.last_logged_tick
         
-        while self.running:
-            try:
-                # Add vehicles at their scheduled start times
-                for vehicle, direction, start_time in vehicles_to_add:
-                    if (vehicle not in vehicles_added and 
-                        self.simulation.current_tick >= start_time):
-                        self.simulation.active_vehicles.append(vehicle)
-                        vehicles_added.add(vehicle)
-                        print(f"\n=== Tick {self.simulation.current_tick} ===")
-                        print(f"Added {direction} Vehicle to simulation")
-                
-                # Update light timer and states
-                self.simulation.light_timer -= 1
-                if self.simulation.light_timer <= 0:
-                    # Switch lights
-                    if self.simulation.ns_light == "red" and self.simulation.ew_light == "green":
-                        self.simulation.ew_light = "yellow"
-                        self.simulation.light_timer = 3  # Yellow for 3 ticks
-                    elif self.simulation.ns_light == "red" and self.simulation.ew_light == "yellow":
-                        self.simulation.ns_light = "green"
-                        self.simulation.ew_light = "red"
-                        self.simulation.light_timer = 50  # Green for 50 ticks
-                    elif self.simulation.ns_light == "green" and self.simulation.ew_light == "red":
-                        self.simulation.ns_light = "yellow"
-                        self.simulation.light_timer = 3  # Yellow for 3 ticks
-                    elif self.simulation.ns_light == "yellow" and self.simulation.ew_light == "red":
-                        self.simulation.ns_light = "red"
-                        self.simulation.ew_light = "green"
-                        self.simulation.light_timer = 50  # Green for 50 ticks
-                
-                # Store pre-update positions for movement tracking
-                pre_east_pos = east_vehicle.interpolated_position if east_vehicle in self.simulation.active_vehicles else None
-                pre_west_pos = west_vehicle.interpolated_position if west_vehicle in self.simulation.active_vehicles else None
-                pre_north_pos = north_vehicle.interpolated_position if north_vehicle in self.simulation.active_vehicles else None
-                pre_south_pos = south_vehicle.interpolated_position if south_vehicle in self.simulation.active_vehicles else None
-                
-                # Update vehicles
-                self.simulation.update_vehicles()
-                
-                # Calculate movement deltas
-                if east_vehicle in self.simulation.active_vehicles and pre_east_pos:
-                    east_delta_x = east_vehicle.interpolated_position[0] - pre_east_pos[0]
-                    east_delta_y = east_vehicle.interpolated_position[1] - pre_east_pos[1]
-                else:
-                    east_delta_x = east_delta_y = 0
-                
-                if west_vehicle in self.simulation.active_vehicles and pre_west_pos:
-                    west_delta_x = west_vehicle.interpolated_position[0] - pre_west_pos[0]
-                    west_delta_y = west_vehicle.interpolated_position[1] - pre_west_pos[1]
-                else:
-                    west_delta_x = west_delta_y = 0
-                
-                if north_vehicle in self.simulation.active_vehicles and pre_north_pos:
-                    north_delta_x = north_vehicle.interpolated_position[0] - pre_north_pos[0]
-                    north_delta_y = north_vehicle.interpolated_position[1] - pre_north_pos[1]
-                else:
-                    north_delta_x = north_delta_y = 0
-                
-                if south_vehicle in self.simulation.active_vehicles and pre_south_pos:
-                    south_delta_x = south_vehicle.interpolated_position[0] - pre_south_pos[0]
-                    south_delta_y = south_vehicle.interpolated_position[1] - pre_south_pos[1]
-                else:
-                    south_delta_x = south_delta_y = 0
-                
-                # Log status every 10 ticks or on significant changes
-                should_log = (
-                    self.simulation.current_tick - last_logged_tick >= 10 or
-                    abs(east_delta_x) > 10 or abs(east_delta_y) > 10 or
-                    abs(west_delta_x) > 10 or abs(west_delta_y) > 10 or
-                    abs(north_delta_x) > 10 or abs(north_delta_y) > 10 or
-                    abs(south_delta_x) > 10 or abs(south_delta_y) > 10 or
-                    (east_vehicle in self.simulation.active_vehicles and east_vehicle.state == "waiting") or
-                    (west_vehicle in self.simulation.active_vehicles and west_vehicle.state == "waiting") or
-                    (north_vehicle in self.simulation.active_vehicles and north_vehicle.state == "waiting") or
-                    (south_vehicle in self.simulation.active_vehicles and south_vehicle.state == "waiting")
-                )
-                
-                if should_log:
-                    status = {
-                        'tick': self.simulation.current_tick,
-                        'light_states': {'ns': self.simulation.ns_light, 'ew': self.simulation.ew_light},
-                        'light_timer': self.simulation.light_timer,
-                        'vehicles': {}
+        # Add vehicles at their scheduled start times
+        for vehicle, direction, start_time in vehicles_to_add:
+            if (vehicle not in vehicles_added and 
+                self.simulation.current_tick >= start_time):
+                self.simulation.active_vehicles.append(vehicle)
+                vehicles_added.add(vehicle)
+                print(f"\n=== Tick {self.simulation.current_tick} ===")
+                print(f"Added {direction} Vehicle to simulation")
+        
+        # Update light timer and states
+        self.simulation.light_timer -= 1
+        if self.simulation.light_timer <= 0:
+            # Switch lights
+            if self.simulation.ns_light == "red" and self.simulation.ew_light == "green":
+                self.simulation.ew_light = "yellow"
+                self.simulation.light_timer = 3  # Yellow for 3 ticks
+            elif self.simulation.ns_light == "red" and self.simulation.ew_light == "yellow":
+                self.simulation.ns_light = "green"
+                self.simulation.ew_light = "red"
+                self.simulation.light_timer = 50  # Green for 50 ticks
+            elif self.simulation.ns_light == "green" and self.simulation.ew_light == "red":
+                self.simulation.ns_light = "yellow"
+                self.simulation.light_timer = 3  # Yellow for 3 ticks
+            elif self.simulation.ns_light == "yellow" and self.simulation.ew_light == "red":
+                self.simulation.ns_light = "red"
+                self.simulation.ew_light = "green"
+                self.simulation.light_timer = 50  # Green for 50 ticks
+        
+        # Store pre-update positions for movement tracking
+        pre_east_pos = east_vehicle.interpolated_position if east_vehicle in self.simulation.active_vehicles else None
+        pre_west_pos = west_vehicle.interpolated_position if west_vehicle in self.simulation.active_vehicles else None
+        pre_north_pos = north_vehicle.interpolated_position if north_vehicle in self.simulation.active_vehicles else None
+        pre_south_pos = south_vehicle.interpolated_position if south_vehicle in self.simulation.active_vehicles else None
+        
+        # Update vehicles
+        self.simulation.update_vehicles()
+        
+        # Calculate movement deltas
+        if east_vehicle in self.simulation.active_vehicles and pre_east_pos:
+            east_delta_x = east_vehicle.interpolated_position[0] - pre_east_pos[0]
+            east_delta_y = east_vehicle.interpolated_position[1] - pre_east_pos[1]
+        else:
+            east_delta_x = east_delta_y = 0
+        
+        if west_vehicle in self.simulation.active_vehicles and pre_west_pos:
+            west_delta_x = west_vehicle.interpolated_position[0] - pre_west_pos[0]
+            west_delta_y = west_vehicle.interpolated_position[1] - pre_west_pos[1]
+        else:
+            west_delta_x = west_delta_y = 0
+        
+        if north_vehicle in self.simulation.active_vehicles and pre_north_pos:
+            north_delta_x = north_vehicle.interpolated_position[0] - pre_north_pos[0]
+            north_delta_y = north_vehicle.interpolated_position[1] - pre_north_pos[1]
+        else:
+            north_delta_x = north_delta_y = 0
+        
+        if south_vehicle in self.simulation.active_vehicles and pre_south_pos:
+            south_delta_x = south_vehicle.interpolated_position[0] - pre_south_pos[0]
+            south_delta_y = south_vehicle.interpolated_position[1] - pre_south_pos[1]
+        else:
+            south_delta_x = south_delta_y = 0
+        
+        # Log status every 10 ticks or on significant changes
+        should_log = (
+            self.simulation.current_tick - last_logged_tick >= 10 or
+            abs(east_delta_x) > 10 or abs(east_delta_y) > 10 or
+            abs(west_delta_x) > 10 or abs(west_delta_y) > 10 or
+            abs(north_delta_x) > 10 or abs(north_delta_y) > 10 or
+            abs(south_delta_x) > 10 or abs(south_delta_y) > 10 or
+            (east_vehicle in self.simulation.active_vehicles and east_vehicle.state == "waiting") or
+            (west_vehicle in self.simulation.active_vehicles and west_vehicle.state == "waiting") or
+            (north_vehicle in self.simulation.active_vehicles and north_vehicle.state == "waiting") or
+            (south_vehicle in self.simulation.active_vehicles and south_vehicle.state == "waiting")
+        )
+        
+        if should_log:
+            status = {
+                'tick': self.simulation.current_tick,
+                'light_states': {'ns': self.simulation.ns_light, 'ew': self.simulation.ew_light},
+                'light_timer': self.simulation.light_timer,
+                'vehicles': {}
+            }
+            
+            for vehicle, name in [(east_vehicle, 'east'), (west_vehicle, 'west'),
+                                (north_vehicle, 'north'), (south_vehicle, 'south')]:
+                if vehicle in self.simulation.active_vehicles:
+                    status['vehicles'][name] = {
+                        'position': vehicle.position,
+                        'state': vehicle.state,
+                        'coordinates': vehicle.interpolated_position,
+                        'progress': (vehicle.position_time / vehicle.position_threshold * 100)
                     }
-                    
-                    for vehicle, name in [(east_vehicle, 'east'), (west_vehicle, 'west'),
-                                        (north_vehicle, 'north'), (south_vehicle, 'south')]:
-                        if vehicle in self.simulation.active_vehicles:
-                            status['vehicles'][name] = {
-                                'position': vehicle.position,
-                                'state': vehicle.state,
-                                'coordinates': vehicle.interpolated_position,
-                                'progress': (vehicle.position_time / vehicle.position_threshold * 100)
-                            }
-                    
-                    self.update_signal.emit(status)
-                    last_logged_tick = self.simulation.current_tick
-                
-                # Increment tick counter
-                self.simulation.current_tick += 1
-                
-                # Check if all vehicles have completed their routes
-                if not self.simulation.active_vehicles and len(vehicles_added) == len(vehicles_to_add):
-                    print("\n=== Test Complete ===")
-                    print("All vehicles have completed their routes")
-                    self.running = False
-                    break
-                
-                # Add a small delay to prevent overwhelming the main thread
-                self.msleep(50)  # 50ms delay between updates
-                
-            except Exception as e:
-                print(f"Error in test mode thread: {e}")
-                self.running = False
-                break
-    
+            
+            if self.report is not None:
+                self.report(status)
+            self.last_logged_tick = self.simulation.current_tick
+        
+        # Increment tick counter
+        self.simulation.current_tick += 1
+        
+        # Check if all vehicles have completed their routes
+        if not self.simulation.active_vehicles and len(vehicles_added) == len(vehicles_to_add):
+            print("\n=== Test Complete ===")
+            print("All vehicles have completed their routes")
+            self.running = False
+
     def stop(self):
-        """Stop the test mode thread"""
+        """Stop the test"""
         self.running = False
 
+
+def print_test_status(status):
+    """Print a status update of the test scenario"""
+    print(f"\n=== Tick {status['tick']} ===")
+    print(f"Light States: NS={status['light_states']['ns']}, EW={status['light_states']['ew']}, Timer={status['light_timer']}")
+    
+    for name, vehicle_data in status['vehicles'].items():
+        print(f"\n{name.capitalize()} Vehicle:")
+        print(f"Position: {vehicle_data['position']}")
+        print(f"State: {vehicle_data['state']}")
+        print(f"Coordinates: {vehicle_data['coordinates']}")
+        print(f"Progress: {vehicle_data['progress']:.2f}%")
+    
+    print("========================================")
+
 def main():
     try:
         # Add the project root directory to Python path for imports
@@ -191,7 +210,6 @@ def main():
             pygame.init()
             screen = pygame.display.set_mode((WIDTH, HEIGHT))
             pygame.display.set_caption("Traffic Simulation")
-            pygame_clock = pygame.time.Clock()
         except pygame.error as e:
             print(f"Error initializing Pygame: {e}")
             return 1
@@ -226,79 +244,61 @@ def main():
             pygame.quit()
             return 1
         
-        # Create a timer for updating both simulations
+        # The simulation runs on its own thread and publishes snapshots;
+        # this (main) thread owns the window and draws the newest snapshot
+        if test_mode:
+            scenario = TestScenario(simulation, report=print_test_status)
+            worker = SimulationWorker(simulation, data_recorder, tick=scenario.tick)
+            worker.call(scenario.start)
+        else:
+            worker = SimulationWorker(simulation, data_recorder)
+        renderer = SnapshotRenderer(simulation, worker)
+        dashboard.set_simulation_worker(worker)
+        
+        # Create a timer for drawing frames and updating the dashboard
         update_timer = QTimer()
+        last_sequence = [-1]  # Sequence number of the last snapshot shown in the dashboard
         
-        def update_simulation():
+        def shutdown():
+            update_timer.stop()
+            worker.stop()
+            pygame.quit()
+            app.quit()
+        
+        def update_frame():
             try:
-                # Process PyQt events
-                app.processEvents()
-                
-                # Update simulation
-                if test_mode:
-                    # Draw everything
-                    simulation.draw(None)
-                else:
-                    # Normal simulation mode
-                    if simulation.running:
-                        simulation.step(data_recorder)
-                    else:
-                        update_timer.stop()
-                        pygame.quit()
-                        app.quit()
-                        return
+                if not simulation.running:
+                    shutdown()
+                    return
                 
-                # Update metrics in the dashboard
-                metrics = simulation.get_metrics()
-                dashboard.metrics_panel.update_metrics(metrics)
+                # Draw the newest snapshot
+                snapshot = renderer.render()
                 
-                # Update traffic counts
-                traffic_counts = simulation.get_traffic_counts()
-                dashboard.visualization_panel.update_traffic_plot(traffic_counts)
+                # Update the dashboard once per new snapshot
+                if snapshot is not None and worker.buffer.sequence != last_sequence[0]:
+                    last_sequence[0] = worker.buffer.sequence
+                    dashboard.metrics_panel.update_metrics(snapshot.status['metrics'])
+                    dashboard.visualization_panel.update_traffic_plot(snapshot.status['traffic_counts'])
                 
-                # Control frame rate
-                pygame_clock.tick(30)
+                # Frame rate is set by update_timer; the simulation rate by
+                # the simulation thread's fixed-timestep clock
             except pygame.error as e:
                 if "display Surface quit" in str(e):
                     # Handle graceful shutdown
-                    update_timer.stop()
-                    pygame.quit()
-                    app.quit()
+                    shutdown()
                     return
                 else:
                     # Re-raise other pygame errors
                     raise
             except Exception as e:
-                print(f"Error in update_simulation: {e}")
-                update_timer.stop()
-                pygame.quit()
-                app.quit()
+                print(f"Error in update_frame: {e}")
+                shutdown()
                 return
         
         # Connect timer to update function
-        update_timer.timeout.connect(update_simulation)
+        update_timer.timeout.connect(update_frame)
         update_timer.start(16)  # ~60 FPS
-        
-        if test_mode:
-            # Create and start test mode thread
-            test_thread = TestModeThread(simulation)
-            
-            def handle_test_update(status):
-                """Handle updates from test mode thread"""
-                print(f"\n=== Tick {status['tick']} ===")
-                print(f"Light States: NS={status['light_states']['ns']}, EW={status['light_states']['ew']}, Timer={status['light_timer']}")
-                
-                for name, vehicle_data in status['vehicles'].items():
-                    print(f"\n{name.capitalize()} Vehicle:")
-                    print(f"Position: {vehicle_data['position']}")
-                    print(f"State: {vehicle_data['state']}")
-                    print(f"Coordinates: {vehicle_data['coordinates']}")
-                    print(f"Progress: {vehicle_data['progress']:.2f}%")
-                
-                print("========================================")
-            
-            test_thread.update_signal.connect(handle_test_update)
-            test_thread.start()
+        worker.start()
         
         # Enter the Qt event loop
         return app.exec_()
@@ -1,10 +1,16 @@
+import itertools
 import random
 from src.config import LANES, INTERMEDIATE_POSITIONS, WIDTH, HEIGHT
 
 class Vehicle:
+    # Source of stable integer ids (used by the vehicle event log)
+    _id_counter = itertools.count()
+    
     def __init__(self, route, position, vehicle_type="car", position_threshold=100):
+        self.vehicle_id = next(Vehicle._id_counter)
         self.route = route
         self.position = position
+        self.start_position = position
         self.vehicle_type = vehicle_type
         self.position_time = 0
         self.position_threshold = position_threshold
@@ -0,0 +1,321 @@
+"""
+Bounded-Memory Tick Recording
+
+TickBuffer keeps every tick, which is what we want for normal episodes but
+not for headless runs over millions of ticks. BoundedTickRecorder is a
+drop-in replacement whose memory use is fixed up front:
+
+- Exact aggregates: count, mean, min, max and standard deviation of every
+  column, plus how often each light phase was shown
+- A reservoir sample of raw ticks: every tick has the same chance of being
+  kept, however long the episode runs
+- Rollups per 10, 100 and 1,000 ticks (mean, min and max of each column)
+  in circular buffers. Each level is built from the finished windows of
+  the level below.
+
+Ticks are staged in a block of one finest window and folded into the
+aggregates and rollups a block at a time, so the per-tick cost is a few
+array assignments.
+
+When a rollup buffer fills up, its oldest half is appended to a binary
+file on disk (if a spill directory is given) before being overwritten, so
+the full-resolution history can still be loaded after the run. Episode
+numbers restart with every recorder, so each run needs its own spill
+directory (DataRecorder uses data/rollups/<run>); spill files are never
+deleted or overwritten.
+"""
+import glob
+import math
+import os
+import random
+
+import numpy as np
+
+from src.tick_buffer import LIGHT_PHASES, TICK_COLUMNS, columns_to_dataframe
+
+# Columns that are aggregated (tick and light_phase are handled separately)
+VALUE_COLUMNS = ('waiting_count', 'moving_count', 'arrived_count', 'avg_satisfaction', 'light_changes')
+
+ROLLUP_DTYPE = np.dtype(
+    [('tick', np.int64), ('count', np.int32)]
+    + [(f'{name}_{stat}', np.float32) for name in VALUE_COLUMNS for stat in ('mean', 'min', 'max')]
+)
+
+
+class RollupRing:
+    """Circular buffer of rollup rows with optional spill to disk"""
+
+    def __init__(self, window, capacity, spill_path=None):
+        self.window = window
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.data = np.zeros(capacity, dtype=ROLLUP_DTYPE)
+        self.write_index = 0  # Rows ever written
+        self.spilled = 0      # Rows ever written to disk
+
+        # Partial window being accumulated
+        self._start = None
+        self._count = 0
+        self._sum = np.zeros(len(VALUE_COLUMNS))
+        self._min = np.full(len(VALUE_COLUMNS), np.inf)
+        self._max = np.full(len(VALUE_COLUMNS), -np.inf)
+
+    def add(self, start_tick, count, total, low, high):
+        """Fold a block of ticks (or a finished lower-level window) into the window.
+
+        Returns:
+            The finished window as (start, count, sum, min, max), or None
+        """
+        if self._start is None:
+            self._start = start_tick
+        self._count += count
+        self._sum += total
+        np.minimum(self._min, low, out=self._min)
+        np.maximum(self._max, high, out=self._max)
+        if self._count < self.window:
+            return None
+        return self._finish()
+
+    def _finish(self):
+        finished = (self._start, self._count, self._sum.copy(), self._min.copy(), self._max.copy())
+        self._write_row(*finished)
+        self._start = None
+        self._count = 0
+        self._sum[:] = 0
+        self._min[:] = np.inf
+        self._max[:] = -np.inf
+        return finished
+
+    def _write_row(self, start, count, total, low, high):
+        if self.write_index - self.spilled == self.capacity:
+            self._spill(self.capacity // 2)
+        row = self.data[self.write_index % self.capacity]
+        row['tick'] = start
+        row['count'] = count
+        mean = total / count
+        for i, name in enumerate(VALUE_COLUMNS):
+            row[f'{name}_mean'] = mean[i]
+            row[f'{name}_min'] = low[i]
+            row[f'{name}_max'] = high[i]
+        self.write_index += 1
+
+    def _spill(self, rows):
+        """Move the oldest rows out of memory (to disk if possible)"""
+        if self.spill_path:
+            indices = np.arange(self.spilled, self.spilled + rows) % self.capacity
+            with open(self.spill_path, 'ab') as f:
+                self.data[indices].tofile(f)
+        self.spilled += rows
+
+    def recent(self):
+        """Rows still in memory, oldest first"""
+        return self.data[np.arange(self.spilled, self.write_index) % self.capacity]
+
+    def flush(self, block=None):
+        """Close the partial window and write everything in memory to disk.
+
+        Args:
+            block: The lower level's last (partial) window, folded in first
+
+        Returns:
+            The window closed here as (start, count, sum, min, max), or None
+        """
+        finished = self.add(*block) if block is not None else None
+        if self._count:
+            finished = self._finish()
+        if self.spill_path and self.write_index > self.spilled:
+            self._spill(self.write_index - self.spilled)
+        return finished
+
+    def history(self):
+        """All rows: the spilled ones from disk, then the ones in memory"""
+        spilled = np.zeros(0, dtype=ROLLUP_DTYPE)
+        if self.spill_path and os.path.exists(self.spill_path):
+            spilled = np.fromfile(self.spill_path, dtype=ROLLUP_DTYPE)
+        return np.concatenate([spilled, self.recent()])
+
+
+def load_rollup(spill_dir, episode, window):
+    """Rollup rows of a finished episode from its spill file"""
+    path = os.path.join(spill_dir, f"episode_{episode}_rollup_{window}.bin")
+    return np.fromfile(path, dtype=ROLLUP_DTYPE)
+
+
+class BoundedTickRecorder:
+    """Fixed-memory replacement for TickBuffer.
+
+    Ticks are first staged in a small block (one finest rollup window).
+    Aggregates and rollups are updated once per full block with vectorized
+    NumPy reductions, so appending a tick is mostly a row assignment.
+    """
+
+    def __init__(self, reservoir_size=4096, rollup_capacity=2048, windows=(10, 100, 1000),
+                 spill_dir=None, seed=0):
+        """
+        Args:
+            reservoir_size: Raw ticks kept in the random sample
+            rollup_capacity: Rows kept in memory per rollup level
+            windows: Rollup window sizes, each a multiple of the previous one
+            spill_dir: Directory for spilled rollup rows (None: drop them),
+                one per run; must not hold spilled rollups already
+            seed: Seed of the reservoir sampling
+        """
+        self.reservoir_size = reservoir_size
+        self.rollup_capacity = rollup_capacity
+        self.windows = tuple(windows)
+        self.spill_dir = spill_dir
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            if glob.glob(os.path.join(spill_dir, "episode_*_rollup_*.bin")):
+                raise FileExistsError(f"{spill_dir} already holds spilled rollups of another run")
+        self.random = random.Random(seed)
+        self.episode = 0
+        self.reservoir = {name: np.zeros(reservoir_size, dtype=dtype) for name, dtype in TICK_COLUMNS.items()}
+
+        # Staging block of raw ticks
+        self._block_values = np.zeros((self.windows[0], len(VALUE_COLUMNS)))
+        self._block_ticks = np.zeros(self.windows[0], dtype=np.int64)
+        self._block_phases = np.zeros(self.windows[0], dtype=np.int64)
+        self._reset_episode()
+
+    def _reset_episode(self):
+        self.size = 0
+        self._block_size = 0
+        self._count = 0  # Ticks folded into the aggregates below
+        n = len(VALUE_COLUMNS)
+        self._mean = np.zeros(n)
+        self._m2 = np.zeros(n)
+        self._min = np.full(n, np.inf)
+        self._max = np.full(n, -np.inf)
+        self._phase_counts = np.zeros(len(LIGHT_PHASES), dtype=np.int64)
+        self.rollups = {
+            window: RollupRing(window, self.rollup_capacity, self._spill_path(window))
+            for window in self.windows
+        }
+        self._skip_weight = 1.0
+        self._next_sample = self.reservoir_size
+        self._schedule_next_sample()
+
+    def _spill_path(self, window):
+        if not self.spill_dir:
+            return None
+        return os.path.join(self.spill_dir, f"episode_{self.episode}_rollup_{window}.bin")
+
+    def _schedule_next_sample(self):
+        """Pick the next tick that enters the reservoir (Algorithm L).
+
+        Equivalent to drawing a random slot for every tick (Algorithm R),
+        but only needs random numbers for the ticks that are kept.
+        """
+        self._skip_weight *= math.exp(math.log(self.random.random()) / self.reservoir_size)
+        skip = math.floor(math.log(self.random.random()) / math.log1p(-self._skip_weight))
+        self._next_sample += skip + 1
+
+    def __len__(self):
+        return self.size
+
+    def append(self, tick, light_phase, waiting_count, moving_count, arrived_count,
+               avg_satisfaction, light_changes):
+        """Add one tick (same signature as TickBuffer.append)"""
+        self.size += 1
+
+        # Reservoir sample: fill it first, then replace random slots
+        if self.size <= self.reservoir_size:
+            slot = self.size - 1
+        elif self.size == self._next_sample:
+            slot = self.random.randrange(self.reservoir_size)
+            self._schedule_next_sample()
+        else:
+            slot = None
+        if slot is not None:
+            row = (tick, light_phase, waiting_count, moving_count, arrived_count, avg_satisfaction, light_changes)
+            for column, value in zip(self.reservoir.values(), row):
+                column[slot] = value
+
+        i = self._block_size
+        self._block_values[i] = (waiting_count, moving_count, arrived_count, avg_satisfaction, light_changes)
+        self._block_ticks[i] = tick
+        self._block_phases[i] = light_phase
+        self._block_size = i + 1
+        if self._block_size == len(self._block_ticks):
+            self._flush_block()
+
+    def _fold(self, values, phases):
+        """Merge a block of ticks into the exact aggregates (Chan et al.)"""
+        n = len(values)
+        block_mean = values.mean(axis=0)
+        block_m2 = ((values - block_mean) ** 2).sum(axis=0)
+        total = self._count + n
+        delta = block_mean - self._mean
+        self._mean = self._mean + delta * (n / total)
+        self._m2 = self._m2 + block_m2 + delta ** 2 * (self._count * n / total)
+        self._count = total
+        np.minimum(self._min, values.min(axis=0), out=self._min)
+        np.maximum(self._max, values.max(axis=0), out=self._max)
+        self._phase_counts += np.bincount(phases, minlength=len(LIGHT_PHASES))
+
+    def _flush_block(self):
+        n = self._block_size
+        values = self._block_values[:n]
+        self._fold(values, self._block_phases[:n])
+
+        # Rollups: each finished window feeds the next, coarser level
+        block = (int(self._block_ticks[0]), n, values.sum(axis=0), values.min(axis=0), values.max(axis=0))
+        for window in self.windows:
+            block = self.rollups[window].add(*block)
+            if block is None:
+                break
+        self._block_size = 0
+
+    def aggregates(self):
+        """Exact per-column statistics of the whole episode"""
+        if self._block_size:
+            # Include the staged ticks without flushing a partial window
+            saved = (self._count, self._mean, self._m2, self._min.copy(), self._max.copy(), self._phase_counts.copy())
+            self._fold(self._block_values[:self._block_size], self._block_phases[:self._block_size])
+            mean, m2, low, high = self._mean, self._m2, self._min, self._max
+            self._count, self._mean, self._m2, self._min, self._max, self._phase_counts = saved
+        else:
+            mean, m2, low, high = self._mean, self._m2, self._min, self._max
+        std = np.sqrt(m2 / self.size) if self.size else np.zeros(len(VALUE_COLUMNS))
+        return {
+            stat: dict(zip(VALUE_COLUMNS, values.tolist()))
+            for stat, values in (('mean', mean), ('min', low), ('max', high), ('std', std))
+        }
+
+    @property
+    def phase_counts(self):
+        """Ticks spent in every light phase (indexed like LIGHT_PHASES)"""
+        staged = self._block_phases[:self._block_size]
+        return self._phase_counts + np.bincount(staged, minlength=len(LIGHT_PHASES))
+
+    def snapshot(self):
+        """Copy of the reservoir sample as tick columns, ordered by tick"""
+        kept = min(self.size, self.reservoir_size)
+        order = np.argsort(self.reservoir['tick'][:kept], kind='stable')
+        return {name: column[:kept][order] for name, column in self.reservoir.items()}
+
+    def to_dataframe(self):
+        return columns_to_dataframe(self.snapshot())
+
+    def rollup(self, window):
+        """Rollup rows for one window size, loading spilled rows from disk"""
+        return self.rollups[window].history()
+
+    def clear(self):
+        """Finish the episode: flush the rollups to disk and start over"""
+        if self._block_size:
+            self._flush_block()
+        # Partial windows cascade like full ones, so every level covers all ticks
+        block = None
+        for window in self.windows:
+            block = self.rollups[window].flush(block)
+        self.episode += 1
+        self._reset_episode()
+
+    @property
+    def nbytes(self):
+        """Memory held by the sample, the staging block and the rollup buffers"""
+        return (sum(column.nbytes for column in self.reservoir.values())
+                + self._block_values.nbytes + self._block_ticks.nbytes + self._block_phases.nbytes
+                + sum(ring.data.nbytes for ring in self.rollups.values()))
@@ -0,0 +1,116 @@
+"""
+Camera
+
+Maps world coordinates (the simulation's pixel coordinates, see
+src.config) to the screen with a zoom factor and a pan offset. At the
+default view (zoom 1, centered on the world) the mapping is the identity
+and the renderer uses its usual fast path.
+
+Controls (interactive window): mouse wheel zooms around the cursor,
+dragging with the right or middle mouse button pans, HOME resets the view.
+"""
+import pygame
+
+
+class Camera:
+    """World-to-screen transform with zoom and pan"""
+
+    # Below this zoom vehicles are drawn as plain rectangles (level of detail)
+    DETAIL_ZOOM = 0.6
+
+    def __init__(self, world_size, viewport_size=None, min_zoom=0.25, max_zoom=4.0):
+        """
+        Args:
+            world_size: (width, height) of the simulated area
+            viewport_size: (width, height) of the screen (default: world size)
+            min_zoom, max_zoom: Limits of the zoom factor
+        """
+        self.world_size = tuple(world_size)
+        self.viewport_size = tuple(viewport_size or world_size)
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.reset()
+
+    def reset(self):
+        """Back to the default view"""
+        self.zoom = 1.0
+        self.center = (self.world_size[0] / 2, self.world_size[1] / 2)
+
+    @property
+    def state(self):
+        """Changes whenever the view does (for caches)"""
+        return self.zoom, self.center, self.viewport_size
+
+    @property
+    def is_default(self):
+        """Whether world and screen coordinates are the same"""
+        return (self.zoom == 1.0 and self.viewport_size == self.world_size
+                and self.center == (self.world_size[0] / 2, self.world_size[1] / 2))
+
+    @property
+    def detailed(self):
+        """Whether entities are drawn in full detail at this zoom"""
+        return self.zoom >= self.DETAIL_ZOOM
+
+    def world_to_screen(self, position):
+        x, y = position
+        return ((x - self.center[0]) * self.zoom + self.viewport_size[0] / 2,
+                (y - self.center[1]) * self.zoom + self.viewport_size[1] / 2)
+
+    def screen_to_world(self, position):
+        x, y = position
+        return ((x - self.viewport_size[0] / 2) / self.zoom + self.center[0],
+                (y - self.viewport_size[1] / 2) / self.zoom + self.center[1])
+
+    def world_rect_to_screen(self, rect):
+        """Screen rectangle covering a world rectangle"""
+        rect = pygame.Rect(rect)
+        left, top = self.world_to_screen(rect.topleft)
+        right, bottom = self.world_to_screen(rect.bottomright)
+        return pygame.Rect(int(left), int(top), int(right) - int(left) + 1, int(bottom) - int(top) + 1)
+
+    def visible_world_rect(self):
+        """World rectangle shown on the screen"""
+        left, top = self.screen_to_world((0, 0))
+        right, bottom = self.screen_to_world(self.viewport_size)
+        return pygame.Rect(int(left), int(top), int(right - left) + 1, int(bottom - top) + 1)
+
+    def _clamp(self):
+        # Keep the view's center on the world, so it can never get lost
+        self.center = (min(max(self.center[0], 0), self.world_size[0]),
+                       min(max(self.center[1], 0), self.world_size[1]))
+
+    def pan(self, dx, dy):
+        """Move the view by a distance in screen pixels"""
+        self.center = (self.center[0] - dx / self.zoom, self.center[1] - dy / self.zoom)
+        self._clamp()
+
+    def zoom_at(self, factor, screen_position=None):
+        """Zoom by a factor, keeping the world point under screen_position in place"""
+        if screen_position is None:
+            screen_position = (self.viewport_size[0] / 2, self.viewport_size[1] / 2)
+        anchor = self.screen_to_world(screen_position)
+        self.zoom = min(max(self.zoom * factor, self.min_zoom), self.max_zoom)
+        if abs(self.zoom - 1.0) < 1e-6:
+            self.zoom = 1.0  # Snap back so the fast path can be used again
+        # Move the center so the anchor ends up under the cursor again
+        self.center = (anchor[0] - (screen_position[0] - self.viewport_size[0] / 2) / self.zoom,
+                       anchor[1] - (screen_position[1] - self.viewport_size[1] / 2) / self.zoom)
+        self._clamp()
+
+    def handle_event(self, event):
+        """Apply a mouse/keyboard event to the view.
+
+        Returns:
+            Whether the event was a camera control
+        """
+        if event.type == pygame.MOUSEWHEEL:
+            self.zoom_at(1.25 ** event.y, pygame.mouse.get_pos())
+            return True
+        if event.type == pygame.MOUSEMOTION and (event.buttons[1] or event.buttons[2]):
+            self.pan(*event.rel)
+            return True
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_HOME:
+            self.reset()
+            return True
+        return False
@@ -33,6 +33,12 @@ TRAINING_SLIDER = {
     'default_steps': 2000
 }
 
+# How often the dashboard samples training telemetry (times per second)
+TELEMETRY_UI_HZ = 10
+
+# Most redraws per second of the dashboard plots (updates in between are coalesced)
+PLOT_MAX_FPS = 5
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
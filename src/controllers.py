@@ -0,0 +1,200 @@
+"""
+Traffic Signal Controllers
+
+Pluggable controllers that decide the light phase of one or many
+intersections at once. They serve as baselines when judging a trained
+policy and drive the simulation in non-RL modes.
+
+Every controller works on a batch of observations, one row per
+intersection, in the same format as TrafficEnv:
+    observations[i] = [north_waiting, south_waiting, east_waiting, west_waiting]
+and returns one action per row: 0 = NS green/EW red, 1 = EW green/NS red.
+
+The rule-based controllers keep their state in NumPy arrays and use no
+Python loops, so driving thousands of intersections costs about as much
+as driving one.
+
+Key Components:
+- SignalController: Base class (reset / act / act_single)
+- FixedTimeController: The alternating pattern Simulation.step uses as a fallback
+- ActuatedController: Holds green while it is used, gives up on gap-out or max-out
+- MaxPressureController: Serves the phase with the highest pressure
+- PolicyController: Wraps a PPO model (saved file or a live TrafficRLAgent)
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+NS_GREEN = 0
+EW_GREEN = 1
+
+
+class SignalController(ABC):
+    """Base class for signal controllers.
+
+    Subclasses must implement act() (a controller without it cannot be
+    constructed); act_single() is a convenience wrapper for
+    code that drives a single intersection.
+    """
+    name = None
+
+    def __init__(self):
+        self.num_intersections = 1
+
+    def reset(self, num_intersections=1):
+        """Clear all per-intersection state"""
+        self.num_intersections = num_intersections
+
+    @abstractmethod
+    def act(self, observations, ticks):
+        """Choose phases for a batch of intersections.
+
+        Args:
+            observations: Array of shape (num_intersections, 4)
+            ticks: Current tick (scalar or one per intersection)
+
+        Returns:
+            Integer array of shape (num_intersections,)
+        """
+
+    def act_single(self, observation, tick):
+        """Choose the phase of a single intersection"""
+        observations = np.asarray(observation).reshape(1, -1)
+        return int(self.act(observations, tick)[0])
+
+    @staticmethod
+    def _queues(observations):
+        """Waiting vehicles served by each phase: (NS queue, EW queue)"""
+        observations = np.asarray(observations)
+        return observations[:, 0] + observations[:, 1], observations[:, 2] + observations[:, 3]
+
+
+class FixedTimeController(SignalController):
+    """NS green for the first half of every cycle, EW green for the second.
+
+    offsets shifts the cycle per intersection (e.g. for green waves).
+    """
+    name = "fixed_time"
+
+    def __init__(self, cycle=100, offsets=0):
+        super().__init__()
+        self.cycle = cycle
+        self.offsets = offsets
+
+    def act(self, observations, ticks):
+        position = (np.asarray(ticks) + self.offsets) % self.cycle
+        actions = np.where(position < self.cycle // 2, NS_GREEN, EW_GREEN)
+        return np.broadcast_to(actions, (len(observations),)).astype(np.int64)
+
+
+class ActuatedController(SignalController):
+    """Vehicle-actuated control with gap-out and max-out.
+
+    The current green is held for at least min_green ticks. After that it
+    switches when the green direction has no queue left (gap-out) while the
+    other direction is waiting, or when it has been green for max_green
+    ticks and the other direction is still waiting (max-out).
+    """
+    name = "actuated"
+
+    def __init__(self, min_green=10, max_green=60):
+        super().__init__()
+        self.min_green = min_green
+        self.max_green = max_green
+        self.reset()
+
+    def reset(self, num_intersections=1):
+        super().reset(num_intersections)
+        self.phase = np.full(num_intersections, NS_GREEN, dtype=np.int64)
+        self.green_time = np.zeros(num_intersections, dtype=np.int64)
+
+    def act(self, observations, ticks):
+        if len(observations) != len(self.phase):
+            self.reset(len(observations))
+        ns_queue, ew_queue = self._queues(observations)
+        ns_green = self.phase == NS_GREEN
+        served = np.where(ns_green, ns_queue, ew_queue)
+        conflicting = np.where(ns_green, ew_queue, ns_queue)
+
+        self.green_time += 1
+        gap_out = served == 0
+        max_out = self.green_time >= self.max_green
+        switch = (self.green_time >= self.min_green) & (conflicting > 0) & (gap_out | max_out)
+
+        self.phase = np.where(switch, 1 - self.phase, self.phase)
+        self.green_time[switch] = 0
+        return self.phase.copy()
+
+
+class MaxPressureController(SignalController):
+    """Max-pressure control.
+
+    The pressure of a phase is the queue it can discharge (the downstream
+    links leave the screen, so their queues are zero). The phase with the
+    highest pressure gets green; ties keep the current phase and min_green
+    stops it from flickering.
+    """
+    name = "max_pressure"
+
+    def __init__(self, min_green=5):
+        super().__init__()
+        self.min_green = min_green
+        self.reset()
+
+    def reset(self, num_intersections=1):
+        super().reset(num_intersections)
+        self.phase = np.full(num_intersections, NS_GREEN, dtype=np.int64)
+        self.green_time = np.zeros(num_intersections, dtype=np.int64)
+
+    def act(self, observations, ticks):
+        if len(observations) != len(self.phase):
+            self.reset(len(observations))
+        ns_pressure, ew_pressure = self._queues(observations)
+
+        best = np.where(ns_pressure > ew_pressure, NS_GREEN,
+                        np.where(ew_pressure > ns_pressure, EW_GREEN, self.phase))
+        self.green_time += 1
+        switch = (best != self.phase) & (self.green_time >= self.min_green)
+
+        self.phase = np.where(switch, best, self.phase)
+        self.green_time[switch] = 0
+        return self.phase.copy()
+
+
+class PolicyController(SignalController):
+    """Runs a PPO policy as a controller.
+
+    Pass either model_path (a saved .zip) or agent (a TrafficRLAgent, whose
+    current model is used so retraining and loading take effect at once).
+    """
+    name = "ppo"
+
+    def __init__(self, model_path=None, agent=None):
+        super().__init__()
+        self.agent = agent
+        self.model = None
+        if agent is None:
+            # Imported lazily so rule-based controllers don't need Stable-Baselines3
+            from stable_baselines3 import PPO
+            self.model = PPO.load(model_path, device="cpu")
+
+    def act(self, observations, ticks):
+        model = self.agent.model if self.agent is not None else self.model
+        actions, _ = model.predict(np.asarray(observations), deterministic=True)
+        return np.asarray(actions, dtype=np.int64).reshape(-1)
+
+
+BASELINE_CONTROLLERS = {
+    FixedTimeController.name: FixedTimeController,
+    ActuatedController.name: ActuatedController,
+    MaxPressureController.name: MaxPressureController,
+}
+
+
+def make_controller(name, **kwargs):
+    """Create a controller by name ('fixed_time', 'actuated', 'max_pressure' or 'ppo')"""
+    if name == PolicyController.name:
+        return PolicyController(**kwargs)
+    if name not in BASELINE_CONTROLLERS:
+        raise ValueError(f"Unknown controller: {name}")
+    return BASELINE_CONTROLLERS[name](**kwargs)
@@ -6,39 +6,213 @@ Features:
 - Records scores and achievements
 - Maintains leaderboard of top performances
 - Tracks metrics across episodes
+
+Episode metrics are appended to their CSV one row at a time and the
+leaderboard is a small in-memory heap written out with an atomic rename,
+so the cost of ending an episode does not grow with the number of
+episodes already recorded. File writes and plot rendering run on a
+background RecorderWriter thread, so they never stall the simulation.
+Learning curves are redrawn every `plot_every` episodes (or on demand via
+render_plots) by updating persistent figures (see learning_plots.py).
+Episode results are also inserted in batches into the SQLite results
+store (see results_store.py) under a run of their own.
 """
-import pandas as pd
-import matplotlib.pyplot as plt
+import atexit
+import csv
+import heapq
 import os
 from datetime import datetime
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from src.bounded_recorder import BoundedTickRecorder
+from src.episode_archive import records_to_columns, save_episode
+from src.learning_plots import EpisodeProgressPlot, LearningCurvePlot
+from src.recorder_backend import RecorderWriter
+from src.results_store import DEFAULT_DB, ResultsStore
+from src.tick_buffer import TickBuffer, light_phase_code
+from src.vehicle_events import vehicle_summary
+
+LEADERBOARD_COLUMNS = ['date', 'score', 'avg_satisfaction', 'avg_commute', 'light_changes']
+EPISODE_METRICS_COLUMNS = ['episode', 'score', 'avg_satisfaction', 'avg_commute', 'light_changes', 'completion_rate']
+
+
+def _write_csv_atomic(path, columns, rows):
+    """Write rows to a temporary file and rename it over path.
+
+    The rename is atomic, so a crash leaves either the old or the new
+    file behind, never a half-written one.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _append_csv_row(path, columns, row):
+    """Append a single row to an existing CSV file"""
+    with open(path, 'a', newline='') as f:
+        csv.DictWriter(f, fieldnames=columns).writerow(row)
+
+
 class DataRecorder(QObject):
     # Signals for visualization updates
     traffic_update = pyqtSignal(dict)  # Emits traffic counts by direction
     reward_update = pyqtSignal(int, float)  # Emits (step, reward)
     
-    def __init__(self):
+    def __init__(self, leaderboard_size=5, background=True, plot_every=10, archive_episodes=False,
+                 results_db=DEFAULT_DB, results_batch_size=16, bounded=False):
+        """
+        Args:
+            bounded: Record ticks with a fixed memory budget (aggregates,
+                a random sample and rollups, see bounded_recorder.py)
+                instead of keeping every tick. Meant for very long runs.
+        """
         super().__init__()
         self.current_episode = 0
-        self.episode_data = []
+        # Episode numbers restart every run, so files written per episode
+        # go into a directory of their own run
+        self.run_key = f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}"
+        if bounded:
+            self.episode_data = BoundedTickRecorder(spill_dir=os.path.join("data/rollups", self.run_key))
+        else:
+            self.episode_data = TickBuffer()  # One row per tick, stored as NumPy columns
+        self.vehicle_failures = []
         self.total_score = 0
         self.achievements = set()
         self.leaderboard_file = "data/leaderboard.csv"
         self.episode_metrics_file = "data/episode_metrics.csv"
         self.light_changes = 0  # Track light changes within episode
         self.simulation = None  # Reference to simulation
+        self.archive_dir = os.path.join("data/episodes", self.run_key)
+        self.archive_episodes = archive_episodes  # Save every episode with save_data
+        
+        # Saving and plotting run on this thread (None: run them inline)
+        self.writer = RecorderWriter() if background else None
+        
+        # Results database, only touched from the writer thread. The run is
+        # registered when its first batch of episodes is written.
+        self.results_db = results_db
+        self.results_batch_size = results_batch_size
+        self.results = None
+        self.run_id = None
+        self.run_name = "interactive"
+        self.run_config = None
+        self._pending_results = []
+        # Registered after the writer, so it runs first at exit
+        atexit.register(self.flush_results)
         
         # Create data directory if it doesn't exist
         os.makedirs("data", exist_ok=True)
         
-        # Initialize leaderboard if it doesn't exist
-        if not os.path.exists(self.leaderboard_file):
-            pd.DataFrame(columns=['date', 'score', 'avg_satisfaction', 'avg_commute']).to_csv(self.leaderboard_file, index=False)
+        # Top entries kept as a min-heap of (score, -entry number, row):
+        # the weakest entry is always at the front, ready to be replaced
+        self.leaderboard_size = leaderboard_size
+        self.leaderboard = []
+        self.leaderboard_entries = 0
+        self.load_leaderboard()
             
         # Initialize episode metrics file if it doesn't exist
         if not os.path.exists(self.episode_metrics_file):
-            pd.DataFrame(columns=['episode', 'score', 'avg_satisfaction', 'avg_commute', 'light_changes', 'completion_rate']).to_csv(self.episode_metrics_file, index=False)
+            _write_csv_atomic(self.episode_metrics_file, EPISODE_METRICS_COLUMNS, [])
+        
+        # Plots are redrawn every plot_every episodes (0: only on demand).
+        # The figures are only touched by the writer thread once created.
+        self.plot_every = plot_every
+        self.learning_curve_plot = None  # Created on first use
+        self.progress_plot = EpisodeProgressPlot()
+        self.progress_plot.load(self.episode_metrics_file)
+    
+    def load_leaderboard(self):
+        """Load the saved leaderboard into the in-memory heap"""
+        if not os.path.exists(self.leaderboard_file):
+            _write_csv_atomic(self.leaderboard_file, LEADERBOARD_COLUMNS, [])
+            return
+        try:
+            with open(self.leaderboard_file, newline='') as f:
+                for row in csv.DictReader(f):
+                    row['score'] = float(row['score'])
+                    self.add_leaderboard_entry(row)
+        except Exception as e:
+            print(f"Error loading leaderboard: {e}")
+    
+    def add_leaderboard_entry(self, row):
+        """Offer an entry to the leaderboard.
+
+        Returns:
+            True if the entry made it into the top scores
+        """
+        # Among equal scores the earlier entry ranks higher
+        entry = (row['score'], -self.leaderboard_entries, row)
+        self.leaderboard_entries += 1
+        if len(self.leaderboard) < self.leaderboard_size:
+            heapq.heappush(self.leaderboard, entry)
+            return True
+        if entry[:2] > self.leaderboard[0][:2]:
+            heapq.heapreplace(self.leaderboard, entry)
+            return True
+        return False
+    
+    def get_leaderboard(self):
+        """Leaderboard rows, best score first"""
+        return [row for _, _, row in sorted(self.leaderboard, key=lambda e: e[:2], reverse=True)]
+    
+    def _submit(self, task, *args):
+        """Run an I/O task on the writer thread (or inline without one)"""
+        if self.writer is not None:
+            self.writer.submit(task, *args)
+        else:
+            task(*args)
+    
+    def flush(self):
+        """Wait until all queued saving and plotting has finished"""
+        self.flush_results()
+        if self.writer is not None:
+            self.writer.flush()
+    
+    def close(self):
+        """Finish the queued work and stop the writer thread"""
+        self.flush_results()
+        if self.writer is not None:
+            self.writer.close()
+    
+    def set_run_config(self, config, name=None):
+        """Hyperparameters (and name) stored with this recorder's run"""
+        self.run_config = dict(config)
+        if name:
+            self.run_name = name
+    
+    def flush_results(self):
+        """Send the buffered episode rows to the results database"""
+        if not self._pending_results or not self.results_db:
+            return
+        rows, self._pending_results = self._pending_results, []
+        self._submit(self._store_results, rows)
+    
+    def _store_results(self, rows):
+        """Insert a batch of episodes, registering the run first if needed (writer thread)"""
+        if self.results is None:
+            self.results = ResultsStore(self.results_db)
+        if self.run_id is None:
+            config = self.run_config or self._agent_config()
+            self.run_id = self.results.start_run(self.run_name, "training", config)
+        self.results.add_episodes(self.run_id, rows)
+    
+    def _agent_config(self):
+        """Hyperparameters of the simulation's PPO agent, if it has one"""
+        agent = getattr(self.simulation, 'rl_agent', None)
+        if agent is None:
+            return None
+        model = agent.model
+        return {
+            'learning_rate': model.learning_rate,
+            'batch_size': model.batch_size,
+            'n_steps': model.n_steps,
+            'gamma': model.gamma,
+        }
     
     def set_simulation(self, simulation):
         """Set the simulation reference"""
@@ -46,15 +220,15 @@ class DataRecorder(QObject):
     
     def record_tick(self, tick, light_state, waiting_count, moving_count, arrived_count, avg_satisfaction):
         """Record data for the current tick"""
-        self.episode_data.append({
-            'tick': tick,
-            'light_state': light_state,
-            'waiting_count': waiting_count,
-            'moving_count': moving_count,
-            'arrived_count': arrived_count,
-            'avg_satisfaction': avg_satisfaction,
-            'light_changes': self.light_changes  # Add current light changes count
-        })
+        self.episode_data.append(
+            tick,
+            light_phase_code(light_state),
+            waiting_count,
+            moving_count,
+            arrived_count,
+            avg_satisfaction,
+            self.light_changes  # Add current light changes count
+        )
         
         # Get traffic counts from simulation
         if self.simulation:
@@ -86,17 +260,17 @@ class DataRecorder(QObject):
     def record_vehicle_completion(self, vehicle):
         """Record data when a vehicle completes its journey"""
         # Check for "All Clear!" achievement
-        if vehicle.state == "arrived" and not self.active_vehicles:
+        if vehicle.state == "arrived" and self.simulation is not None and not self.simulation.active_vehicles:
             self.achievements.add("All Clear!")
     
     def record_vehicle_failure(self, vehicle):
         """Record data when a vehicle fails to complete its journey"""
         # Record failure metrics
-        if hasattr(self, 'simulation'):
-            # Update episode data with failure information
-            self.episode_data.append({
+        if self.simulation is not None:
+            # Failures are kept apart from the per-tick columns
+            self.vehicle_failures.append({
                 'tick': self.simulation.current_tick,
-                'event': 'vehicle_failure',
+                'vehicle_id': vehicle.vehicle_id,
                 'start_position': vehicle.start_position,
                 'destination': vehicle.destination,
                 'wait_time': vehicle.waiting_time,
@@ -106,106 +280,91 @@ class DataRecorder(QObject):
     def end_episode(self, light_change_count=None):
         """End the current episode and save data"""
         # Handle empty episode data
-        if not self.episode_data:
+        if not len(self.episode_data):
             print("Warning: No episode data recorded")
             return
             
-        # Calculate episode statistics
+        # Calculate episode statistics (one vectorized pass per column)
         try:
-            avg_satisfaction = sum(d['avg_satisfaction'] for d in self.episode_data) / len(self.episode_data)
-            avg_commute = sum(d['waiting_count'] + d['moving_count'] for d in self.episode_data) / len(self.episode_data)
-            completion_rate = max(d['arrived_count'] for d in self.episode_data) / 100  # Assuming max 100 vehicles per episode
+            stats = self.episode_data.aggregates()
+            avg_satisfaction = stats['mean']['avg_satisfaction']
+            avg_commute = stats['mean']['waiting_count'] + stats['mean']['moving_count']
+            completion_rate = int(stats['max']['arrived_count']) / 100  # Assuming max 100 vehicles per episode
         except Exception as e:
             print(f"Error calculating episode statistics: {e}")
             avg_satisfaction = 0
             avg_commute = 0
             completion_rate = 0
         
-        # Update leaderboard
+        # Update leaderboard (only rewritten when the top scores change)
         try:
-            leaderboard = pd.read_csv(self.leaderboard_file)
-            new_entry = pd.DataFrame([{
+            new_entry = {
                 'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'score': self.total_score,
                 'avg_satisfaction': avg_satisfaction,
                 'avg_commute': avg_commute,
                 'light_changes': self.light_changes
-            }])
-            leaderboard = pd.concat([leaderboard, new_entry], ignore_index=True)
-            leaderboard = leaderboard.sort_values('score', ascending=False).head(5)
-            leaderboard.to_csv(self.leaderboard_file, index=False)
+            }
+            if self.add_leaderboard_entry(new_entry):
+                self._submit(_write_csv_atomic, self.leaderboard_file, LEADERBOARD_COLUMNS, self.get_leaderboard())
         except Exception as e:
             print(f"Error updating leaderboard: {e}")
             
-        # Update episode metrics
+        # Append this episode's metrics as a single row
         try:
-            episode_metrics = pd.read_csv(self.episode_metrics_file)
-            new_episode = pd.DataFrame([{
+            new_episode = {
                 'episode': self.current_episode,
                 'score': self.total_score,
                 'avg_satisfaction': avg_satisfaction,
                 'avg_commute': avg_commute,
                 'light_changes': self.light_changes,
                 'completion_rate': completion_rate
-            }])
-            episode_metrics = pd.concat([episode_metrics, new_episode], ignore_index=True)
-            episode_metrics.to_csv(self.episode_metrics_file, index=False)
+            }
+            self._submit(_append_csv_row, self.episode_metrics_file, EPISODE_METRICS_COLUMNS, new_episode)
+            self._submit(self.progress_plot.add_episode, new_episode)
+            
+            # Database rows are inserted in batches
+            self._pending_results.append(new_episode)
+            if len(self._pending_results) >= self.results_batch_size:
+                self.flush_results()
         except Exception as e:
             print(f"Error updating episode metrics: {e}")
         
-        # Plot learning curves
-        try:
-            self.plot_learning_curve()
-            self.plot_episode_progress()
-        except Exception as e:
-            print(f"Error plotting learning curves: {e}")
+        # Plot learning curves every plot_every episodes
+        if self.plot_every and (self.current_episode + 1) % self.plot_every == 0:
+            self.render_plots()
+        
+        if self.archive_episodes:
+            self.save_data()
         
         # Reset for next episode
         self.current_episode += 1
-        self.episode_data = []
+        self.episode_data.clear()  # Keeps the column memory for the next episode
+        self.vehicle_failures = []
         self.total_score = 0
         self.achievements.clear()
         self.light_changes = 0  # Reset light changes counter
     
-    def plot_learning_curve(self):
-        """Generate separate plots and a combined plot with triple y-axes for all metrics"""
-        if not self.episode_data:
+    def render_plots(self):
+        """Refresh both learning-curve PNGs now (e.g. when the user asks for them)"""
+        self._submit(self.plot_learning_curve, self.episode_data.snapshot())
+        self._submit(self.plot_episode_progress)
+    
+    def plot_learning_curve(self, ticks=None):
+        """Plot satisfaction, traffic flow and light changes over one episode
+        
+        Args:
+            ticks: Tick columns to plot (defaults to the current episode)
+        """
+        if ticks is None:
+            ticks = self.episode_data.snapshot()
+        if not len(ticks['tick']):
             return
             
         try:
-            df = pd.DataFrame(self.episode_data)
-            
-            # Create figure with subplots
-            fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(10, 12))
-            
-            # Plot satisfaction
-            ax1.plot(df['tick'], df['avg_satisfaction'], 'b-')
-            ax1.set_title('Average Satisfaction Over Time')
-            ax1.set_xlabel('Time Steps')
-            ax1.set_ylabel('Satisfaction')
-            ax1.grid(True)
-            
-            # Plot traffic flow
-            ax2.plot(df['tick'], df['waiting_count'] + df['moving_count'], 'r-')
-            ax2.set_title('Total Traffic Flow')
-            ax2.set_xlabel('Time Steps')
-            ax2.set_ylabel('Vehicles')
-            ax2.grid(True)
-            
-            # Plot light changes
-            ax3.plot(df['tick'], df['light_changes'], 'g-')
-            ax3.set_title('Light Changes Over Time')
-            ax3.set_xlabel('Time Steps')
-            ax3.set_ylabel('Number of Changes')
-            ax3.grid(True)
-            
-            # Adjust layout
-            plt.tight_layout()
-            
-            # Save the plot
-            plt.savefig('data/learning_curve.png')
-            plt.close()
-            
+            if self.learning_curve_plot is None:
+                self.learning_curve_plot = LearningCurvePlot()
+            self.learning_curve_plot.render(ticks, 'data/learning_curve.png')
         except Exception as e:
             print(f"Error plotting learning curve: {e}")
             import traceback
@@ -214,66 +373,28 @@ class DataRecorder(QObject):
     def plot_episode_progress(self):
         """Plot metrics across episodes to show learning progress"""
         try:
-            episode_metrics = pd.read_csv(self.episode_metrics_file)
-            if len(episode_metrics) < 2:  # Need at least 2 episodes to plot progress
-                return
-                
-            # Create figure with subplots
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
-            
-            # Plot score progression
-            ax1.plot(episode_metrics['episode'], episode_metrics['score'], 'b-')
-            ax1.set_title('Episode Score Progression')
-            ax1.set_xlabel('Episode')
-            ax1.set_ylabel('Score')
-            ax1.grid(True)
-            
-            # Plot satisfaction progression
-            ax2.plot(episode_metrics['episode'], episode_metrics['avg_satisfaction'], 'g-')
-            ax2.set_title('Average Satisfaction Progression')
-            ax2.set_xlabel('Episode')
-            ax2.set_ylabel('Satisfaction')
-            ax2.grid(True)
-            
-            # Plot commute time progression
-            ax3.plot(episode_metrics['episode'], episode_metrics['avg_commute'], 'r-')
-            ax3.set_title('Average Commute Time Progression')
-            ax3.set_xlabel('Episode')
-            ax3.set_ylabel('Commute Time')
-            ax3.grid(True)
-            
-            # Plot light changes progression
-            ax4.plot(episode_metrics['episode'], episode_metrics['light_changes'], 'm-')
-            ax4.set_title('Light Changes Progression')
-            ax4.set_xlabel('Episode')
-            ax4.set_ylabel('Number of Changes')
-            ax4.grid(True)
-            
-            # Add overall title
-            plt.suptitle('Learning Progress Across Episodes', fontsize=16)
-            
-            # Adjust layout
-            plt.tight_layout()
-            
-            # Save the plot
-            plt.savefig('data/episode_progress.png')
-            plt.close()
-            
+            self.progress_plot.render('data/episode_progress.png')
         except Exception as e:
             print(f"Error plotting episode progress: {e}")
             import traceback
             traceback.print_exc()
 
     def save_data(self):
-        """Save collected data to CSV files"""
-        # Save episode data
-        if self.episode_data:
-            pd.DataFrame(self.episode_data).to_csv(f'data/episode_{self.current_episode}_vehicles.csv', index=False)
-        
-        # Save tick data
-        if self.episode_data:
-            pd.DataFrame(self.episode_data).to_csv(f'data/episode_{self.current_episode}_ticks.csv', index=False)
-        
-        # Save episode summaries
-        if self.episode_data:
-            pd.DataFrame(self.episode_data).to_csv('data/episode_summaries.csv', index=False) 
\ No newline at end of file
+        """Archive the current episode as typed binary tables (see episode_archive.py)"""
+        if not len(self.episode_data) and not self.vehicle_failures:
+            return
+        events = self.simulation.vehicle_events.snapshot() if self.simulation is not None else None
+        self._submit(self._archive_episode, self.current_episode, self.episode_data.snapshot(),
+                     events, list(self.vehicle_failures))
+    
+    def _archive_episode(self, episode, ticks, events, failures):
+        """Build the per-vehicle tables and write the archive (writer thread)"""
+        tables = {'ticks': ticks}
+        if events is not None:
+            end_tick = int(ticks['tick'][-1]) if len(ticks['tick']) else None
+            summary = vehicle_summary(events, end_tick).reset_index()
+            tables['events'] = events
+            tables['vehicles'] = {name: summary[name].to_numpy() for name in summary.columns}
+        if failures:
+            tables['failures'] = records_to_columns(failures)
+        save_episode(self.archive_dir, episode, tables)
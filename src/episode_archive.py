@@ -0,0 +1,184 @@
+"""
+Binary Episode Archives
+
+Replaces the per-episode CSV dumps with typed, columnar files that can be
+memory-mapped back, so analysis across many episodes is limited by disk
+speed rather than by CSV parsing.
+
+Layout (one root per run, e.g. data/episodes/<run>, since episode numbers
+restart every run; one directory per episode):
+    <root>/episode_<n>/meta.json             - schema version, row counts, dtypes
+    <root>/episode_<n>/ticks/<column>.npy    - one row per simulation tick
+    <root>/episode_<n>/events/<column>.npy   - vehicle lifecycle events (see vehicle_events.py)
+    <root>/episode_<n>/vehicles/<column>.npy - one row per vehicle (journey summary)
+    <root>/episode_<n>/failures/<column>.npy - vehicles that failed to finish, if any
+
+With compress=True each table is instead a single compressed
+<table>.npz file: smaller on disk, but loaded into memory instead of
+memory-mapped.
+
+Archived episodes are never overwritten: saving an episode that already
+exists raises FileExistsError.
+
+Usage:
+    archive = EpisodeArchive("data/episodes/20260101_120000_4242")
+    ticks = archive.load(3)['ticks']            # dict of memory-mapped columns
+    satisfaction = archive.concat('ticks', 'avg_satisfaction')
+"""
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from src.tick_buffer import LIGHT_PHASES, columns_to_dataframe
+
+# Bump when the layout or the meaning of a column changes
+# (2: 'vehicles' holds journey summaries, failures moved to 'failures')
+SCHEMA_VERSION = 2
+
+
+def _to_array(values):
+    """Typed array for one column (strings become fixed-width unicode)"""
+    array = np.asarray(values)
+    if array.dtype == object:
+        array = array.astype(str)
+    return array
+
+
+def records_to_columns(records):
+    """Turn a list of row dicts into a dict of typed column arrays"""
+    if not records:
+        return {}
+    return {name: _to_array([record.get(name) for record in records]) for name in records[0]}
+
+
+def save_episode(root, episode, tables, compress=False, extra_meta=None):
+    """Write one episode's tables.
+
+    The episode is written to a temporary directory and renamed into
+    place, so a crash never leaves a half-written episode behind.
+
+    Args:
+        root: Archive directory of the run
+        episode: Episode number
+        tables: Dict of table name -> dict of column name -> 1-D array
+        compress: Store each table as one compressed .npz instead of .npy columns
+        extra_meta: Optional dict stored in meta.json
+
+    Returns:
+        Path of the episode directory
+
+    Raises:
+        FileExistsError: If the episode is already archived
+    """
+    path = os.path.join(root, f"episode_{episode}")
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists; archived episodes are never overwritten")
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    meta = {
+        'schema_version': SCHEMA_VERSION,
+        'episode': episode,
+        'compressed': compress,
+        'light_phases': list(LIGHT_PHASES),
+        'tables': {},
+    }
+    for table, columns in tables.items():
+        columns = {name: _to_array(values) for name, values in columns.items()}
+        rows = len(next(iter(columns.values()))) if columns else 0
+        meta['tables'][table] = {
+            'rows': rows,
+            'columns': {name: array.dtype.str for name, array in columns.items()},
+        }
+        if compress:
+            np.savez_compressed(os.path.join(tmp_path, f"{table}.npz"), **columns)
+        else:
+            os.makedirs(os.path.join(tmp_path, table))
+            for name, array in columns.items():
+                np.save(os.path.join(tmp_path, table, f"{name}.npy"), array)
+    if extra_meta:
+        meta.update(extra_meta)
+
+    with open(os.path.join(tmp_path, "meta.json"), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    os.rename(tmp_path, path)  # Fails instead of replacing an episode written meanwhile
+    return path
+
+
+def load_episode(path, mmap=True):
+    """Load an episode directory written by save_episode.
+
+    Returns:
+        Dict with 'meta' plus one dict of column arrays per table. Columns
+        of uncompressed archives are read-only memory maps when mmap=True.
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    if meta['schema_version'] > SCHEMA_VERSION:
+        raise ValueError(f"{path} uses schema version {meta['schema_version']}, "
+                         f"this code reads up to {SCHEMA_VERSION}")
+
+    episode = {'meta': meta}
+    for table, info in meta['tables'].items():
+        if meta['compressed']:
+            with np.load(os.path.join(path, f"{table}.npz")) as data:
+                episode[table] = {name: data[name] for name in info['columns']}
+        else:
+            mmap_mode = 'r' if mmap else None
+            episode[table] = {name: np.load(os.path.join(path, table, f"{name}.npy"), mmap_mode=mmap_mode)
+                              for name in info['columns']}
+    return episode
+
+
+class EpisodeArchive:
+    """All archived episodes under one root directory"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def episodes(self):
+        """Sorted episode numbers present in the archive"""
+        numbers = []
+        for path in glob.glob(os.path.join(self.root, "episode_*")):
+            suffix = os.path.basename(path)[len("episode_"):]
+            if suffix.isdigit() and os.path.exists(os.path.join(path, "meta.json")):
+                numbers.append(int(suffix))
+        return sorted(numbers)
+
+    def save(self, episode, tables, compress=False, extra_meta=None):
+        return save_episode(self.root, episode, tables, compress, extra_meta)
+
+    def load(self, episode, mmap=True):
+        return load_episode(os.path.join(self.root, f"episode_{episode}"), mmap)
+
+    def to_dataframe(self, episode, table='ticks'):
+        """One table of one episode as a DataFrame"""
+        columns = self.load(episode)[table]
+        if table == 'ticks':
+            return columns_to_dataframe(columns)
+        return pd.DataFrame(columns, copy=False)
+
+    def concat(self, table, column, episodes=None):
+        """One column across many episodes, concatenated.
+
+        Returns:
+            (values, episode_index) where episode_index[i] is the episode
+            values[i] came from
+        """
+        episodes = self.episodes() if episodes is None else episodes
+        values = []
+        index = []
+        for episode in episodes:
+            data = self.load(episode)[table]
+            if column in data:
+                values.append(data[column])
+                index.append(np.full(len(data[column]), episode, dtype=np.int64))
+        if not values:
+            return np.array([]), np.array([], dtype=np.int64)
+        return np.concatenate(values), np.concatenate(index)
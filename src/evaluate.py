@@ -0,0 +1,233 @@
+"""
+Policy Evaluation Harness
+
+Runs a saved PPO model and the baseline controllers over the same seeded
+scenarios on the headless engine and reports the mean and a 95%
+confidence interval for every metric.
+
+Metrics per episode:
+- wait: Ticks spent waiting per vehicle
+- commute: Ticks from spawn to arrival for vehicles that arrived
+- throughput: Vehicles that reached their destination
+- satisfaction: Average driver satisfaction at the end of the episode
+
+Every evaluated controller is stored as an 'evaluation' run in the
+results database; --report prints the latest stored results again
+without re-running anything.
+
+Usage:
+    python -m src.evaluate --model data/ppo_traffic.zip --episodes 100
+    python -m src.evaluate --episodes 100 --controllers fixed_time actuated max_pressure
+    python -m src.evaluate --report
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.controllers import BASELINE_CONTROLLERS, make_controller
+from src.results_store import DEFAULT_DB, ResultsStore
+
+METRICS = ['wait', 'commute', 'throughput', 'satisfaction']
+
+# Per-process caches so every worker builds the simulation and loads the
+# PPO model only once, no matter how many episodes it runs
+_worker_simulation = None
+_worker_controllers = {}
+
+
+def _get_worker_simulation():
+    global _worker_simulation
+    if _worker_simulation is None:
+        from src.headless import create_headless_simulation
+        _worker_simulation = create_headless_simulation(seed=0)
+    return _worker_simulation
+
+
+def _get_worker_controller(name, kwargs):
+    key = (name, tuple(sorted(kwargs.items())))
+    if key not in _worker_controllers:
+        _worker_controllers[key] = make_controller(name, **kwargs)
+    return _worker_controllers[key]
+
+
+def run_episode(simulation, controller, seed):
+    """Run one full episode with a controller and return its metrics"""
+    from src.headless import seed_everything
+
+    seed_everything(seed)
+    simulation.reset()
+    controller.reset()
+
+    first_seen = {}  # vehicle_id -> tick the vehicle was first seen
+    commute_times = []
+    waiting_ticks = 0
+    arrived_before = 0
+
+    while not simulation.episode_ended:
+        waiting = simulation.get_waiting_vehicles()
+        observation = np.array([waiting['north'], waiting['south'], waiting['east'], waiting['west']])
+        action = controller.act_single(observation, simulation.current_tick)
+
+        simulation.set_traffic_lights(action)
+        simulation.update_simulation()
+        tick = simulation.current_tick
+
+        for vehicle in simulation.active_vehicles:
+            first_seen.setdefault(vehicle.vehicle_id, tick)
+            if vehicle.state == "waiting":
+                waiting_ticks += 1
+
+        # Vehicles removed this tick have arrived
+        for vehicle in simulation.removed_vehicles[arrived_before:]:
+            commute_times.append(tick - first_seen.get(vehicle.vehicle_id, tick))
+        arrived_before = len(simulation.removed_vehicles)
+
+    return {
+        'wait': waiting_ticks / max(len(first_seen), 1),
+        'commute': float(np.mean(commute_times)) if commute_times else math.nan,
+        'throughput': len(simulation.removed_vehicles),
+        'satisfaction': simulation.get_avg_satisfaction(),
+    }
+
+
+def _evaluate_job(job):
+    """Evaluate one (controller, seed) pair (pool worker)"""
+    import torch
+    torch.set_num_threads(1)
+
+    name, kwargs, seed = job
+    metrics = run_episode(_get_worker_simulation(), _get_worker_controller(name, kwargs), seed)
+    return {'controller': name, 'seed': seed, **metrics}
+
+
+def summarize(episodes):
+    """Mean, standard deviation and 95% confidence interval per controller and metric"""
+    rows = []
+    for controller, group in episodes.groupby('controller', sort=False):
+        row = {'controller': controller, 'episodes': len(group)}
+        for metric in METRICS:
+            values = group[metric].dropna()
+            mean = values.mean() if len(values) else math.nan
+            half_width = 1.96 * values.std(ddof=1) / math.sqrt(len(values)) if len(values) > 1 else math.nan
+            row[metric] = mean
+            row[f'{metric}_ci_low'] = mean - half_width
+            row[f'{metric}_ci_high'] = mean + half_width
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def evaluate(controllers, episodes=100, workers=None, base_seed=0):
+    """Evaluate controllers on the same seeded scenarios.
+
+    Args:
+        controllers: List of (name, kwargs) pairs, e.g. [("ppo", {"model_path": ...})]
+        episodes: Number of seeded scenarios per controller
+        workers: Number of worker processes (defaults to all cores)
+        base_seed: Seed of the first scenario
+
+    Returns:
+        (summary DataFrame, per-episode DataFrame)
+    """
+    seeds = range(base_seed, base_seed + episodes)
+    jobs = [(name, kwargs, seed) for name, kwargs in controllers for seed in seeds]
+    workers = workers or os.cpu_count()
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        results = list(pool.map(_evaluate_job, jobs, chunksize=chunksize))
+
+    per_episode = pd.DataFrame(results)
+    return summarize(per_episode), per_episode
+
+
+def store_results(per_episode, controllers, db_path=DEFAULT_DB):
+    """Save per-episode results as one 'evaluation' run per controller"""
+    store = ResultsStore(db_path)
+    try:
+        for name, kwargs in controllers:
+            group = per_episode[per_episode['controller'] == name].sort_values('seed')
+            run_id = store.start_run(name, "evaluation", config={'controller': name, **kwargs})
+            store.add_episodes(run_id, [{
+                'episode': i,
+                'seed': int(row.seed),
+                'wait': row.wait,
+                'avg_commute': None if math.isnan(row.commute) else row.commute,
+                'throughput': row.throughput,
+                'avg_satisfaction': row.satisfaction,
+            } for i, row in enumerate(group.itertuples())])
+    finally:
+        store.close()
+
+
+def load_results(db_path=DEFAULT_DB):
+    """Per-episode results of the latest evaluation run of every controller"""
+    store = ResultsStore(db_path)
+    try:
+        return store.query("""
+            SELECT r.name AS controller, e.seed, e.wait, e.avg_commute AS commute,
+                   e.throughput, e.avg_satisfaction AS satisfaction
+            FROM episodes e JOIN runs r ON r.run_id = e.run_id
+            WHERE r.run_id IN (SELECT MAX(run_id) FROM runs WHERE kind = 'evaluation' GROUP BY name)
+            ORDER BY r.run_id, e.episode
+        """)
+    finally:
+        store.close()
+
+
+def format_summary(summary):
+    """Render the summary as 'mean [low, high]' columns"""
+    table = summary[['controller', 'episodes']].copy()
+    for metric in METRICS:
+        table[metric] = [
+            f"{row[metric]:.2f} [{row[f'{metric}_ci_low']:.2f}, {row[f'{metric}_ci_high']:.2f}]"
+            for _, row in summary.iterrows()
+        ]
+    return table.to_string(index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a PPO model against baseline controllers")
+    parser.add_argument('--model', help="Saved PPO model (.zip) to evaluate")
+    parser.add_argument('--controllers', nargs='+', default=list(BASELINE_CONTROLLERS),
+                        choices=list(BASELINE_CONTROLLERS), help="Baseline controllers to include")
+    parser.add_argument('--episodes', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the first scenario")
+    parser.add_argument('--output', default="data", help="Directory for the result CSVs")
+    parser.add_argument('--db', default=DEFAULT_DB, help="Results database ('' to skip)")
+    parser.add_argument('--report', action='store_true', help="Summarize the stored results and exit")
+    args = parser.parse_args()
+
+    if args.report:
+        per_episode = load_results(args.db)
+        if per_episode.empty:
+            print(f"No evaluation results in {args.db}")
+        else:
+            print(format_summary(summarize(per_episode)))
+        return
+
+    controllers = [(name, {}) for name in args.controllers]
+    if args.model:
+        controllers.insert(0, ("ppo", {'model_path': args.model}))
+
+    start = time.time()
+    summary, per_episode = evaluate(controllers, args.episodes, args.workers, args.seed)
+    print(f"Evaluated {len(per_episode)} episodes in {time.time() - start:.1f}s\n")
+    print(format_summary(summary))
+
+    os.makedirs(args.output, exist_ok=True)
+    summary.to_csv(os.path.join(args.output, "evaluation_summary.csv"), index=False)
+    per_episode.to_csv(os.path.join(args.output, "evaluation_episodes.csv"), index=False)
+    if args.db:
+        store_results(per_episode, controllers, args.db)
+
+
+if __name__ == "__main__":
+    main()
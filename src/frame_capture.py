@@ -0,0 +1,175 @@
+"""
+Headless Frame Capture
+
+Produces visual output from machines without a display (training nodes,
+CI): the scene is drawn with SDL's dummy video driver into the usual
+screen surface, which lives in memory only, and every Nth tick its pixels
+are handed off for encoding.
+
+Outputs:
+- PNG sequence: frame_000000.png, frame_000001.png, ... encoded by a pool
+  of worker processes, so PNG compression never runs on the simulation
+  thread
+- Pipe: raw RGB24 frames written to the stdin of an external encoder
+  (e.g. ffmpeg) from a background thread
+
+Both paths are bounded: if encoding falls behind, capture() waits for the
+oldest frame instead of queueing frames without limit.
+
+Usage:
+    capture = FrameCapture("data/frames", every=5)
+    simulation.set_frame_capture(capture)
+    ...
+    capture.close()
+
+    python -m src.frame_capture --ticks 2000 --every 5 --output data/frames
+    python -m src.frame_capture --ticks 2000 --pipe "ffmpeg -y -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r 30 -i - data/episode.mp4"
+"""
+import argparse
+import atexit
+import multiprocessing
+import os
+import shlex
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.recorder_backend import RecorderWriter
+
+
+def _init_worker():
+    """Encoder processes never open a window"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+def encode_png(path, pixels, size):
+    """Write raw RGB24 pixels as a PNG (runs in a worker process)"""
+    import pygame
+    surface = pygame.image.frombuffer(pixels, size, 'RGB')
+    pygame.image.save(surface, path)
+    return path
+
+
+class FrameCapture:
+    """Grabs every Nth simulation tick from the (offscreen) screen surface"""
+
+    def __init__(self, output="data/frames", every=10, workers=2, pipe_command=None, max_pending=8):
+        """
+        Args:
+            output: Directory for the PNG sequence (unused with pipe_command)
+            every: Capture one frame every this many ticks
+            workers: Encoder processes for PNG output
+            pipe_command: Encoder command line reading raw RGB24 frames on
+                stdin; {width} and {height} are filled in
+            max_pending: Frames allowed to wait for encoding before capture() blocks
+        """
+        self.output = output
+        self.every = every
+        self.max_pending = max_pending
+        self.frames = 0
+        self.size = None
+        self._pending = deque()
+        self._pool = None
+        self._process = None
+        self._writer = None
+        self.pipe_command = pipe_command
+        self.workers = workers
+        if not pipe_command:
+            os.makedirs(output, exist_ok=True)
+        atexit.register(self.close)
+
+    def _start(self, size):
+        """Start the encoder the first time the frame size is known"""
+        self.size = size
+        if self.pipe_command:
+            command = self.pipe_command.format(width=size[0], height=size[1])
+            self._process = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE)
+            self._writer = RecorderWriter(queue_size=self.max_pending)
+        else:
+            context = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                             initializer=_init_worker)
+
+    def capture(self, simulation):
+        """Draw the current state and queue it for encoding, on every Nth tick"""
+        if simulation.current_tick % self.every:
+            return
+        import pygame
+        from src.shared import PygameContext
+
+        try:
+            screen = PygameContext.get_screen()
+        except RuntimeError:
+            # Headless runs never set up the context; the dummy display
+            # surface opened by src.config serves as the frame buffer
+            PygameContext.initialize(pygame.display.get_surface())
+            screen = PygameContext.get_screen()
+        if self.size is None:
+            self._start(screen.get_size())
+
+        # The screen surface is drawn into in place and only its pixels
+        # leave this process
+        simulation.draw(None)
+        pixels = pygame.image.tobytes(screen, 'RGB')
+
+        if self._process is not None:
+            self._writer.submit(self._process.stdin.write, pixels)
+        else:
+            while len(self._pending) >= self.max_pending:
+                self._wait_oldest()
+            path = os.path.join(self.output, f"frame_{self.frames:06d}.png")
+            self._pending.append(self._pool.submit(encode_png, path, pixels, self.size))
+        self.frames += 1
+
+    def _wait_oldest(self):
+        try:
+            self._pending.popleft().result()
+        except Exception as e:
+            print(f"Error encoding frame: {e}")
+
+    def close(self):
+        """Finish encoding every captured frame and stop the encoder"""
+        while self._pending:
+            self._wait_oldest()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._process is not None:
+            self._writer.close()
+            self._process.stdin.close()
+            self._process.wait()
+            self._process = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a headless episode to frames")
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--every', type=int, default=5, help="Capture one frame every N ticks")
+    parser.add_argument('--output', default="data/frames", help="Directory for the PNG sequence")
+    parser.add_argument('--pipe', help="Encoder command reading raw RGB24 frames on stdin "
+                                       "({width} and {height} are filled in)")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--controller', default="fixed_time", help="Baseline controller picking the lights")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from src.headless import create_headless_simulation
+    from src.controllers import make_controller
+
+    simulation = create_headless_simulation(seed=args.seed)
+    controller = make_controller(args.controller)
+    controller.reset()
+    capture = FrameCapture(args.output, args.every, args.workers, args.pipe)
+    simulation.set_frame_capture(capture)
+    for _ in range(args.ticks):
+        action = controller.act_single(simulation.get_observation(), simulation.current_tick)
+        simulation.set_traffic_lights(action)
+        simulation.update_simulation()
+        if simulation.episode_ended:
+            break
+    capture.close()
+    print(f"Captured {capture.frames} frames")
+
+
+if __name__ == "__main__":
+    main()
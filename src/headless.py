@@ -0,0 +1,63 @@
+"""
+Headless Simulation Engine
+
+Runs the traffic simulation without a visible window so that training,
+sweeps and evaluations can run on machines without a display (or many of
+them at once in a process pool).
+
+Key Components:
+- enable_headless: Points SDL and Qt at their offscreen drivers
+- seed_everything: Makes a run repeatable (buildings, spawns, PPO weights)
+- create_headless_simulation: Builds a Simulation ready to be stepped
+"""
+import os
+import random
+import numpy as np
+
+
+def enable_headless():
+    """Use SDL's dummy video/audio drivers and Qt's offscreen platform.
+
+    Must be called before src.config is imported, because importing it
+    initializes Pygame and opens the display.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def seed_everything(seed):
+    """Seed every random number generator the simulation and PPO use"""
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        import torch
+        torch.manual_seed(seed)
+    except ImportError:
+        pass
+
+
+def create_headless_simulation(seed=None, with_rl_agent=False):
+    """Create a Simulation that can be stepped without drawing.
+
+    Use simulation.set_traffic_lights(action) followed by
+    simulation.update_simulation() to advance one tick, exactly like
+    TrafficEnv.step does.
+
+    Args:
+        seed: Optional seed applied before the buildings and first spawn
+            schedule are generated
+        with_rl_agent: Also build the simulation's own PPO agent
+    """
+    enable_headless()
+
+    # Imported here so that the environment variables above are in place
+    # before Pygame is initialized by src.config
+    from src.simulation import Simulation
+
+    if seed is not None:
+        seed_everything(seed)
+    simulation = Simulation(with_rl_agent=with_rl_agent)
+    simulation.seed = seed  # Stored in replays (see src.replay)
+    simulation.reset()
+    return simulation
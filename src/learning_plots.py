@@ -0,0 +1,164 @@
+"""
+Learning-Curve Figures for the Data Recorder
+
+The recorder used to build new matplotlib figures after every episode and
+re-read the whole metrics CSV to draw them. These classes keep one figure
+each for the whole run instead:
+
+- Axes, titles and Line2D objects are created once
+- A refresh only swaps the line data (set_data) and rescales the axes
+- Long histories are downsampled with LTTB (Largest-Triangle-Three-Buckets)
+  to a fixed number of points, so drawing 100k episodes costs about the
+  same as drawing 1k
+
+Figures use the Agg canvas directly (no pyplot), so they can be rendered
+from the recorder's writer thread.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Points kept per line after downsampling
+MAX_PLOT_POINTS = 2000
+
+
+def lttb(x, y, threshold=MAX_PLOT_POINTS):
+    """Downsample a line with Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point and, for every bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket. Peaks and dips survive, unlike with
+    plain striding.
+
+    Returns:
+        (x, y) arrays with at most `threshold` points
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # threshold - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        # Twice the triangle area for every candidate in the bucket
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return x[selected], y[selected]
+
+
+class _PersistentFigure:
+    """A figure whose lines are created once and updated in place"""
+
+    def __init__(self, figsize, rows, cols, panels, title=None):
+        """
+        Args:
+            panels: One (title, xlabel, ylabel, line style) per subplot
+        """
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        axes = np.ravel(self.figure.subplots(rows, cols))
+        self.axes = []
+        self.lines = []
+        for ax, (panel_title, xlabel, ylabel, style) in zip(axes, panels):
+            line, = ax.plot([], [], style)
+            ax.set_title(panel_title)
+            ax.set_xlabel(xlabel)
+            ax.set_ylabel(ylabel)
+            ax.grid(True)
+            self.axes.append(ax)
+            self.lines.append(line)
+        if title:
+            self.figure.suptitle(title, fontsize=16)
+        self.figure.tight_layout()
+
+    def set_lines(self, x, ys):
+        """Replace the data of every line (one y array per subplot)"""
+        for ax, line, y in zip(self.axes, self.lines, ys):
+            line.set_data(*lttb(x, y))
+            ax.relim()
+            ax.autoscale_view()
+
+    def save(self, path):
+        self.figure.savefig(path)
+
+
+class LearningCurvePlot(_PersistentFigure):
+    """Satisfaction, traffic and light changes over the ticks of one episode"""
+
+    def __init__(self):
+        super().__init__((10, 12), 3, 1, [
+            ('Average Satisfaction Over Time', 'Time Steps', 'Satisfaction', 'b-'),
+            ('Total Traffic Flow', 'Time Steps', 'Vehicles', 'r-'),
+            ('Light Changes Over Time', 'Time Steps', 'Number of Changes', 'g-'),
+        ])
+
+    def render(self, ticks, path):
+        """Draw tick columns (see TickBuffer.snapshot) and save the PNG"""
+        self.set_lines(ticks['tick'], [
+            ticks['avg_satisfaction'],
+            ticks['waiting_count'] + ticks['moving_count'],
+            ticks['light_changes'],
+        ])
+        self.save(path)
+
+
+class EpisodeProgressPlot(_PersistentFigure):
+    """Per-episode metrics across the whole run.
+
+    Keeps its own in-memory history, loaded once from the metrics CSV, so
+    refreshing never has to read the file again.
+    """
+    METRICS = ('score', 'avg_satisfaction', 'avg_commute', 'light_changes')
+
+    def __init__(self):
+        super().__init__((15, 12), 2, 2, [
+            ('Episode Score Progression', 'Episode', 'Score', 'b-'),
+            ('Average Satisfaction Progression', 'Episode', 'Satisfaction', 'g-'),
+            ('Average Commute Time Progression', 'Episode', 'Commute Time', 'r-'),
+            ('Light Changes Progression', 'Episode', 'Number of Changes', 'm-'),
+        ], title='Learning Progress Across Episodes')
+        self.history = {name: [] for name in ('episode',) + self.METRICS}
+
+    def __len__(self):
+        return len(self.history['episode'])
+
+    def load(self, metrics_file):
+        """Start from the episodes already saved in metrics_file"""
+        if not os.path.exists(metrics_file):
+            return
+        try:
+            saved = pd.read_csv(metrics_file)
+            for name in self.history:
+                self.history[name].extend(saved[name].tolist())
+        except Exception as e:
+            print(f"Error loading episode history: {e}")
+
+    def add_episode(self, metrics):
+        """Append one episode's metrics dict"""
+        for name, values in self.history.items():
+            values.append(metrics[name])
+
+    def render(self, path):
+        """Draw the history and save the PNG (needs at least 2 episodes)"""
+        if len(self) < 2:
+            return
+        self.set_lines(self.history['episode'], [self.history[name] for name in self.METRICS])
+        self.save(path)
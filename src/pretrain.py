@@ -0,0 +1,124 @@
+"""
+Behavior-Cloning Warm Start for PPO
+
+A freshly initialized PPO policy flips the lights almost at random, so the
+first tens of thousands of training steps are mostly wasted. Instead we:
+
+1. Record (observation, action) pairs from a good heuristic controller
+   (max-pressure by default) on the headless engine
+2. Fit the PPO MlpPolicy to imitate them with supervised learning
+   (maximize the log-probability of the heuristic's action)
+3. Hand the warmed-up policy to PPO.learn, which then only has to improve
+   on the heuristic instead of discovering it from scratch
+
+Usage:
+    python -m src.pretrain --controller max_pressure --episodes 20 --output data/ppo_warm.zip
+"""
+import argparse
+
+import numpy as np
+import torch
+
+from src.controllers import make_controller
+
+
+def collect_demonstrations(simulation, controller, episodes=10, seed=0):
+    """Run a controller and record what it does.
+
+    Args:
+        simulation: A (headless) Simulation
+        controller: Signal controller to imitate
+        episodes: Number of episodes to record
+        seed: Seed of the first episode
+
+    Returns:
+        (observations, actions) arrays with one row per tick
+    """
+    from src.headless import seed_everything
+
+    observations = []
+    actions = []
+    for episode in range(episodes):
+        seed_everything(seed + episode)
+        simulation.reset()
+        controller.reset()
+        while not simulation.episode_ended:
+            waiting = simulation.get_waiting_vehicles()
+            observation = [waiting['north'], waiting['south'], waiting['east'], waiting['west']]
+            action = controller.act_single(observation, simulation.current_tick)
+            observations.append(observation)
+            actions.append(action)
+            simulation.set_traffic_lights(action)
+            simulation.update_simulation()
+    return np.array(observations, dtype=np.float32), np.array(actions, dtype=np.int64)
+
+
+def behavior_clone(model, observations, actions, epochs=10, batch_size=256, learning_rate=0.001):
+    """Fit a PPO model's policy to demonstrated actions.
+
+    Only the policy (actor) is trained: the loss is the negative
+    log-probability the policy assigns to the demonstrated action.
+
+    Returns:
+        Fraction of demonstrations the policy now reproduces
+    """
+    policy = model.policy
+    policy.set_training_mode(True)
+    optimizer = torch.optim.Adam(policy.parameters(), lr=learning_rate)
+
+    obs_tensor = torch.as_tensor(observations, device=policy.device)
+    action_tensor = torch.as_tensor(actions, device=policy.device)
+    n = len(obs_tensor)
+
+    for epoch in range(epochs):
+        permutation = torch.randperm(n, device=policy.device)
+        total_loss = 0.0
+        for start in range(0, n, batch_size):
+            batch = permutation[start:start + batch_size]
+            _, log_prob, _ = policy.evaluate_actions(obs_tensor[batch], action_tensor[batch])
+            loss = -log_prob.mean()
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(batch)
+        print(f"Behavior cloning epoch {epoch + 1}/{epochs}: loss {total_loss / n:.4f}")
+
+    policy.set_training_mode(False)
+    with torch.no_grad():
+        predicted, _, _ = policy(obs_tensor, deterministic=True)
+    accuracy = (predicted.reshape(-1) == action_tensor).float().mean().item()
+    print(f"Policy matches the heuristic on {accuracy:.1%} of demonstrations")
+    return accuracy
+
+
+def warm_start(model, simulation, controller_name="max_pressure", episodes=10, epochs=10, seed=0):
+    """Record a heuristic controller and clone it into a PPO model"""
+    controller = make_controller(controller_name)
+    print(f"Recording {episodes} episodes of the {controller_name} controller...")
+    observations, actions = collect_demonstrations(simulation, controller, episodes, seed)
+    return behavior_clone(model, observations, actions, epochs=epochs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm-start a PPO policy from a heuristic controller")
+    parser.add_argument('--controller', default="max_pressure", help="Controller to imitate")
+    parser.add_argument('--episodes', type=int, default=10)
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--train-steps', type=int, default=0, help="PPO steps to run after cloning")
+    parser.add_argument('--output', default="data/ppo_warm.zip")
+    args = parser.parse_args()
+
+    from src.headless import create_headless_simulation
+    simulation = create_headless_simulation(seed=args.seed)
+
+    from src.rl_agent import TrafficRLAgent
+    agent = TrafficRLAgent(simulation)
+    agent.warm_start(args.controller, episodes=args.episodes, epochs=args.epochs, seed=args.seed)
+    if args.train_steps:
+        agent.model.learn(total_timesteps=args.train_steps)
+    agent.save(args.output)
+
+
+if __name__ == "__main__":
+    main()
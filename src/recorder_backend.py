@@ -0,0 +1,76 @@
+"""
+Background Writer for the Data Recorder
+
+Saving CSVs and rendering matplotlib PNGs at the end of an episode takes
+hundreds of milliseconds. Doing that on the simulation thread freezes the
+render loop and the RL step, so DataRecorder hands the work to a
+RecorderWriter instead:
+
+- submit() puts a task on a bounded queue and returns immediately
+- A single daemon thread runs the tasks in submission order
+- If the queue is full, submit() blocks (backpressure) instead of letting
+  unwritten episodes pile up in memory
+- flush() waits for every queued task; close() runs automatically at exit
+  so no episode is lost when the program quits
+"""
+import atexit
+import queue
+import threading
+import traceback
+
+
+class RecorderWriter:
+    """Runs recorder I/O tasks on a background thread, in order"""
+
+    def __init__(self, queue_size=64):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="RecorderWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, task, *args):
+        """Queue task(*args); blocks while the queue is full"""
+        if self._closed:
+            # Too late for the background thread: do the work right here
+            self._call(task, args)
+            return
+        self._queue.put(('task', task, args))
+
+    def pending(self):
+        """Approximate number of tasks waiting to run"""
+        return self._queue.qsize()
+
+    def flush(self):
+        """Block until every task submitted so far has run"""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        done.wait()
+
+    def close(self):
+        """Run the remaining tasks and stop the thread (safe to call twice)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(('stop',))
+        self._thread.join()
+
+    def _call(self, task, args):
+        try:
+            task(*args)
+        except Exception as e:
+            print(f"Error in recorder task {getattr(task, '__name__', task)}: {e}")
+            traceback.print_exc()
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            kind = message[0]
+            if kind == 'task':
+                self._call(message[1], message[2])
+            elif kind == 'flush':
+                message[1].set()
+            elif kind == 'stop':
+                return
@@ -0,0 +1,252 @@
+"""
+Simulation / Render Pipeline
+
+The simulation and the display run on separate threads and only share
+immutable frame snapshots:
+
+- SimulationWorker (background thread) runs the ticks on the fixed-timestep
+  clock and, after each batch, publishes a FrameSnapshot: light states,
+  vehicle draw data and the numbers the dashboard shows
+- SnapshotBuffer holds two slots; the worker fills the back slot and swaps
+  it to the front, the renderer always takes the front (newest) one
+- SnapshotRenderer (main thread, where the window and its event queue
+  live) draws the newest snapshot and forwards input events to the worker
+
+The worker never waits for the display, and the renderer never sees a
+tick that is only half done. Everything that changes the simulation from
+another thread (keyboard, dashboard controls) is queued with
+SimulationWorker.call (or call_sync, to wait for it) and runs on the worker
+between ticks.
+
+While the RL agent trains, its training thread steps the simulation
+instead (see TrafficEnv). The worker then stops ticking and only
+publishes snapshots; both sides hold Simulation.lock while they touch the
+simulation, so a snapshot always shows a finished step.
+
+Usage:
+    worker = SimulationWorker(simulation, data_recorder)
+    renderer = SnapshotRenderer(simulation, worker)
+    worker.start()
+    ...  # on a timer in the main thread:
+    snapshot = renderer.render()
+"""
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import pygame
+
+from src.camera import Camera
+from src.config import HEIGHT, WIDTH
+from src.shared import get_screen
+
+# Draw data of one vehicle: enough for draw_vehicles, nothing mutable
+VehicleSnapshot = namedtuple('VehicleSnapshot', [
+    'vehicle_id', 'vehicle_type', 'size_multiplier', 'color', 'state',
+    'direction', 'position', 'previous_position',
+])
+
+# Everything one frame (and the dashboard) shows. status is None for
+# snapshots that are only drawn, otherwise a dict built for this snapshot
+# alone (see Simulation.get_dashboard_status).
+FrameSnapshot = namedtuple('FrameSnapshot', [
+    'tick', 'published', 'tick_rate', 'ns_light', 'ew_light', 'vehicles',
+    'debug_mode', 'lane_counts', 'episode_ended', 'status',
+])
+
+
+def snapshot_positions(snapshot, alpha):
+    """Vehicle positions blended between the previous and the snapshot's tick"""
+    if alpha >= 1.0:
+        return [vehicle.position for vehicle in snapshot.vehicles]
+    positions = []
+    for vehicle in snapshot.vehicles:
+        current, previous = vehicle.position, vehicle.previous_position
+        if previous is None:
+            positions.append(current)
+        else:
+            positions.append((previous[0] + (current[0] - previous[0]) * alpha,
+                              previous[1] + (current[1] - previous[1]) * alpha))
+    return positions
+
+
+def draw_snapshot(renderer, buildings, snapshot, alpha=1.0, camera=None):
+    """Draw a snapshot with a DirtyRectRenderer (through a Camera, if given)"""
+    renderer.draw(buildings, snapshot.ns_light, snapshot.ew_light, snapshot.vehicles,
+                  snapshot.debug_mode, positions=snapshot_positions(snapshot, alpha),
+                  directions=[vehicle.direction for vehicle in snapshot.vehicles], camera=camera,
+                  lane_counts=snapshot.lane_counts)
+
+
+class SnapshotBuffer:
+    """Two-slot handoff of frame snapshots from one writer to one reader"""
+
+    def __init__(self):
+        self._slots = [None, None]
+        self._front = 0
+        self._lock = threading.Lock()
+        self.sequence = 0  # Snapshots published so far
+
+    def publish(self, snapshot):
+        """Store a snapshot in the back slot and make it the front one"""
+        back = 1 - self._front
+        self._slots[back] = snapshot
+        with self._lock:
+            self._front = back
+            self.sequence += 1
+
+    def latest(self):
+        """The newest snapshot (None before the first one)"""
+        with self._lock:
+            return self._slots[self._front]
+
+
+class SimulationWorker(threading.Thread):
+    """Runs the simulation on its own thread and publishes snapshots"""
+
+    MAX_WAIT = 0.05  # Longest sleep between checks, in seconds
+
+    def __init__(self, simulation, data_recorder=None, tick=None):
+        """
+        Args:
+            simulation: The Simulation to run; no other thread may change it
+                except through call()
+            data_recorder: Passed to Simulation.advance_tick
+            tick: Optional function that runs one tick instead of
+                advance_tick (e.g. a scripted test scenario)
+        """
+        super().__init__(name="SimulationWorker", daemon=True)
+        self.simulation = simulation
+        self.data_recorder = data_recorder
+        self.tick = tick
+        self.buffer = SnapshotBuffer()
+        self.commands = queue.Queue()
+        self._stop_event = threading.Event()
+
+    def call(self, function, *args):
+        """Run function(*args) on the simulation thread before the next tick"""
+        self.commands.put((function, args))
+
+    def call_sync(self, function, *args):
+        """Run function(*args) on the simulation thread and wait for its result"""
+        if not self.is_alive() or threading.current_thread() is self:
+            with self.simulation.lock:
+                return function(*args)
+        done = threading.Event()
+        outcome = {}
+
+        def run():
+            try:
+                outcome['result'] = function(*args)
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                done.set()
+
+        self.call(run)
+        done.wait()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome.get('result')
+
+    def stop(self):
+        """Stop after the current batch of ticks and wait for the thread"""
+        self._stop_event.set()
+        self.commands.put(None)  # Wake the thread if it is waiting
+        if self.is_alive():
+            self.join()
+
+    def _run_commands(self, timeout):
+        """Run queued commands, waiting up to timeout for the first one.
+
+        Returns:
+            Whether any command ran
+        """
+        ran = False
+        while True:
+            try:
+                item = self.commands.get(timeout=timeout) if timeout > 0 else self.commands.get_nowait()
+            except queue.Empty:
+                return ran
+            timeout = 0
+            if item is None:
+                continue
+            function, args = item
+            try:
+                with self.simulation.lock:
+                    function(*args)
+            except Exception as e:
+                print(f"Error in simulation command {getattr(function, '__name__', function)}: {e}")
+            ran = True
+
+    def publish(self):
+        with self.simulation.lock:
+            self.buffer.publish(self.simulation.snapshot(dashboard=True))
+
+    def run(self):
+        simulation = self.simulation
+        self.publish()
+        wait = 0.0
+        while not self._stop_event.is_set() and simulation.running:
+            changed = self._run_commands(wait)
+            if simulation.training_active:
+                # The training thread steps the simulation; only show it
+                self.publish()
+                simulation.timestep.reset()  # Don't catch up on the ticks missed meanwhile
+                wait = self.MAX_WAIT
+                continue
+            try:
+                with simulation.lock:
+                    ticks = simulation.advance_due_ticks(self.data_recorder, self.tick)
+            except Exception as e:
+                print(f"Error in simulation thread: {e}")
+                simulation.running = False
+                break
+            if changed or ticks:
+                self.publish()
+
+            if simulation.turbo:
+                wait = 0.0
+            else:
+                # Sleep until the next tick is due; commands wake us earlier
+                timestep = simulation.timestep
+                wait = min((1.0 - timestep.accumulator) / timestep.tick_rate, self.MAX_WAIT)
+        self._run_commands(0)  # Nobody waiting in call_sync is left hanging
+        self.publish()
+
+
+class SnapshotRenderer:
+    """Draws the worker's newest snapshot (call from the main thread)"""
+
+    def __init__(self, simulation, worker, camera=None):
+        self.simulation = simulation
+        self.worker = worker
+        self.camera = camera or Camera((WIDTH, HEIGHT), get_screen().get_size())
+        self.last_snapshot = None  # Snapshot, alpha and view of the last frame drawn
+        self.last_alpha = 0.0
+        self.last_camera_state = None
+
+    def render(self):
+        """Forward input events to the worker and draw one frame.
+
+        Returns:
+            The snapshot that was drawn (None before the first one)
+        """
+        for event in pygame.event.get():
+            # Zoom and pan belong to the view; everything else to the simulation
+            if not self.camera.handle_event(event):
+                self.worker.call(self.simulation.handle_event, event)
+
+        snapshot = self.worker.buffer.latest()
+        if snapshot is None:
+            return None
+        alpha = min((time.perf_counter() - snapshot.published) * snapshot.tick_rate, 1.0)
+        if (snapshot is self.last_snapshot and self.last_alpha >= 1.0
+                and self.camera.state == self.last_camera_state):
+            return snapshot  # The screen already shows exactly this state
+        draw_snapshot(self.simulation.renderer, self.simulation.buildings, snapshot, alpha, self.camera)
+        self.last_snapshot = snapshot
+        self.last_alpha = alpha
+        self.last_camera_state = self.camera.state
+        return snapshot
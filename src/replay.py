@@ -0,0 +1,414 @@
+"""
+Episode Replays
+
+Records everything needed to redraw an episode frame by frame, so long
+training runs can be inspected afterwards instead of watched live at the
+simulation's frame rate.
+
+A replay file (one compressed .npz per episode) holds:
+- Header: seed, episode, buildings and the spawn schedule
+- Per frame: simulation tick, light colors and the controller's action
+- Per frame and vehicle: position, state and heading
+
+Positions are quantized to 1/4 pixel and delta-encoded against the
+previous frame, which keeps them small and very compressible. Every
+`keyframe_interval` frames all positions are stored absolute, so seeking
+only has to decode forward from the nearest keyframe.
+
+ReplayPlayer rebuilds the scene and draws it with the same draw_*
+functions as the live simulation, at any speed and in any order.
+
+Usage:
+    simulation.set_replay_recorder(ReplayRecorder("data/replays"))
+    python -m src.replay data/replays/episode_3.npz --speed 4
+"""
+import argparse
+import atexit
+import json
+import os
+
+import numpy as np
+
+from src.tick_buffer import LIGHT_COLORS, light_phase_code
+
+# Replay positions are stored in units of 1/QUANTIZATION pixels
+QUANTIZATION = 4
+
+# Bump when the layout or the meaning of an array changes
+REPLAY_VERSION = 1
+
+VEHICLE_TYPES = ('car', 'van', 'truck')
+VEHICLE_STATES = ('moving', 'waiting', 'arrived')
+DIRECTIONS = ('up', 'down', 'left', 'right')
+LANES = ('north', 'south', 'east', 'west')
+
+
+class ReplayRecorder:
+    """Captures frames of the simulation and writes one replay per episode.
+
+    The simulation calls start_episode() from reset() and capture() once
+    per tick (see Simulation.set_replay_recorder).
+    """
+
+    def __init__(self, directory="data/replays", keyframe_interval=50, every=1, seed=None):
+        """
+        Args:
+            directory: Where the episode_<n>.npz files are written
+            keyframe_interval: Frames between absolute position keyframes
+            every: Record only every n-th episode (1 = all of them)
+            seed: Seed the run was started with, stored in the header
+        """
+        self.directory = directory
+        self.keyframe_interval = keyframe_interval
+        self.every = every
+        self.seed = seed
+        self.episode = -1
+        self.recording = False
+        atexit.register(self.finish)
+
+    def start_episode(self, simulation):
+        """Save the running episode (if any) and start recording the next one"""
+        self.finish()
+        self.episode += 1
+        self.recording = self.episode % self.every == 0
+        if not self.recording:
+            return
+
+        self.header = {
+            'version': REPLAY_VERSION,
+            'episode': self.episode,
+            'seed': getattr(simulation, 'seed', self.seed),
+            'keyframe_interval': self.keyframe_interval,
+            'quantization': QUANTIZATION,
+        }
+        self.buildings = list(simulation.buildings)
+        self.schedule = [(entry['spawn_tick'], LANES.index(entry['start']), LANES.index(entry['destination']))
+                         for entry in simulation.spawn_schedule]
+
+        # Per frame
+        self.frame_ticks = []
+        self.frame_lights = []
+        self.frame_actions = []
+        self.frame_rows = []
+
+        # Per frame and vehicle
+        self.row_vehicle = []
+        self.row_x = []
+        self.row_y = []
+        self.row_state = []
+        self.row_direction = []
+
+        # Per vehicle: vehicle_id -> (type, color, first frame)
+        self.vehicles = {}
+        self._last_positions = {}
+
+    def capture(self, simulation, action=None):
+        """Record the current frame.
+
+        Args:
+            simulation: The simulation after its tick update
+            action: Light action the controller picked this tick (None if none)
+        """
+        if not self.recording:
+            return
+        # Imported here: src.collision pulls in the Pygame display setup
+        from src.collision import get_vehicle_direction
+
+        frame = len(self.frame_ticks)
+        keyframe = frame % self.keyframe_interval == 0
+        last_positions = {} if keyframe else self._last_positions
+        positions = {}
+        rows = 0
+        for vehicle in simulation.active_vehicles:
+            coords = vehicle.interpolated_position or vehicle.get_current_coords()
+            if coords is None:
+                continue
+            vehicle_id = vehicle.vehicle_id
+            if vehicle_id not in self.vehicles:
+                self.vehicles[vehicle_id] = (VEHICLE_TYPES.index(vehicle.vehicle_type), vehicle.color, frame)
+            x = round(coords[0] * QUANTIZATION)
+            y = round(coords[1] * QUANTIZATION)
+            previous = last_positions.get(vehicle_id)
+            if previous is None:
+                self.row_x.append(x)
+                self.row_y.append(y)
+            else:
+                self.row_x.append(x - previous[0])
+                self.row_y.append(y - previous[1])
+            positions[vehicle_id] = (x, y)
+            self.row_vehicle.append(vehicle_id)
+            self.row_state.append(VEHICLE_STATES.index(vehicle.state))
+            try:
+                direction = DIRECTIONS.index(get_vehicle_direction(vehicle))
+            except (ValueError, IndexError):
+                direction = DIRECTIONS.index('right')
+            self.row_direction.append(direction)
+            rows += 1
+
+        self._last_positions = positions
+        self.frame_ticks.append(simulation.current_tick)
+        self.frame_lights.append(light_phase_code((simulation.ns_light, simulation.ew_light)))
+        self.frame_actions.append(-1 if action is None else int(action))
+        self.frame_rows.append(rows)
+
+    def finish(self):
+        """Write the episode recorded so far, if it has any frames"""
+        if not self.recording or not self.frame_ticks:
+            return None
+        try:
+            path = self.save(os.path.join(self.directory, f"episode_{self.episode}.npz"))
+        except Exception as e:
+            print(f"Error saving replay: {e}")
+            path = None
+        self.recording = False
+        return path
+
+    def save(self, path):
+        """Write the recorded frames to path (atomically)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        vehicle_ids = sorted(self.vehicles)
+        buildings = np.array([building[:4] for building in self.buildings], dtype=np.int32).reshape(-1, 4)
+        arrays = {
+            'header': np.array(json.dumps(self.header)),
+            'buildings': buildings,
+            'building_colors': np.array([building[4] for building in self.buildings], dtype=np.uint8).reshape(-1, 3),
+            'schedule': np.array(self.schedule, dtype=np.int32).reshape(-1, 3),
+            'frame_tick': np.array(self.frame_ticks, dtype=np.int32),
+            'frame_light': np.array(self.frame_lights, dtype=np.int8),
+            'frame_action': np.array(self.frame_actions, dtype=np.int8),
+            'frame_rows': np.array(self.frame_rows, dtype=np.int16),
+            'row_vehicle': np.array(self.row_vehicle, dtype=np.int32),
+            'row_x': np.array(self.row_x, dtype=np.int16),
+            'row_y': np.array(self.row_y, dtype=np.int16),
+            'row_state': np.array(self.row_state, dtype=np.int8),
+            'row_direction': np.array(self.row_direction, dtype=np.int8),
+            'vehicle_id': np.array(vehicle_ids, dtype=np.int32),
+            'vehicle_type': np.array([self.vehicles[v][0] for v in vehicle_ids], dtype=np.int8),
+            'vehicle_color': np.array([self.vehicles[v][1] for v in vehicle_ids], dtype=np.uint8).reshape(-1, 3),
+            'vehicle_first_frame': np.array([self.vehicles[v][2] for v in vehicle_ids], dtype=np.int32),
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+        return path
+
+
+class ReplayVehicle:
+    """The parts of a Vehicle that draw_vehicles needs"""
+    __slots__ = ('vehicle_id', 'vehicle_type', 'color', 'size_multiplier',
+                 'interpolated_position', 'position', 'state', 'direction')
+
+    def __init__(self, vehicle_id, vehicle_type, color):
+        self.vehicle_id = vehicle_id
+        self.vehicle_type = vehicle_type
+        self.color = color
+        self.size_multiplier = 1.0 if vehicle_type == "car" else 1.5 if vehicle_type == "truck" else 1.2
+        self.interpolated_position = None
+        self.position = None
+        self.state = "moving"
+        self.direction = 'right'
+
+
+class ReplayFrame:
+    """Decoded state of one frame"""
+
+    def __init__(self, index, tick, ns_light, ew_light, action, vehicles):
+        self.index = index
+        self.tick = tick
+        self.ns_light = ns_light
+        self.ew_light = ew_light
+        self.action = action
+        self.vehicles = vehicles
+
+
+class ReplayPlayer:
+    """Decodes a replay file and draws its frames"""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        self.header = json.loads(str(arrays.pop('header')))
+        if self.header['version'] > REPLAY_VERSION:
+            raise ValueError(f"{path} uses replay version {self.header['version']}, "
+                             f"this code reads up to {REPLAY_VERSION}")
+        self.keyframe_interval = self.header['keyframe_interval']
+        self.scale = 1.0 / self.header['quantization']
+        self.arrays = arrays
+        self.offsets = np.concatenate([[0], np.cumsum(arrays['frame_rows'], dtype=np.int64)])
+
+        self.buildings = [(int(x), int(y), int(width), int(height), tuple(int(c) for c in color))
+                          for (x, y, width, height), color in zip(arrays['buildings'], arrays['building_colors'])]
+        self.schedule = [{'spawn_tick': int(tick), 'start': LANES[start], 'destination': LANES[destination]}
+                         for tick, start, destination in arrays['schedule']]
+        self.vehicles = {
+            int(vehicle_id): ReplayVehicle(int(vehicle_id), VEHICLE_TYPES[vehicle_type], tuple(int(c) for c in color))
+            for vehicle_id, vehicle_type, color in zip(arrays['vehicle_id'], arrays['vehicle_type'],
+                                                       arrays['vehicle_color'])
+        }
+
+        # Row columns as Python lists: decoding walks them one row at a time
+        self._rows = [arrays[name].tolist() for name in ('row_vehicle', 'row_x', 'row_y', 'row_state', 'row_direction')]
+        self._frame = -1
+        self._positions = {}
+
+    def __len__(self):
+        return len(self.arrays['frame_tick'])
+
+    def frame_of_tick(self, tick):
+        """Index of the first frame at or after a simulation tick"""
+        return min(int(np.searchsorted(self.arrays['frame_tick'], tick)), len(self) - 1)
+
+    def _decode(self, frame):
+        """Advance the decoded positions by one frame"""
+        vehicle_ids, xs, ys = self._rows[0], self._rows[1], self._rows[2]
+        previous = {} if frame % self.keyframe_interval == 0 else self._positions
+        positions = {}
+        for row in range(self.offsets[frame], self.offsets[frame + 1]):
+            vehicle_id = vehicle_ids[row]
+            last = previous.get(vehicle_id)
+            if last is None:
+                positions[vehicle_id] = (xs[row], ys[row])
+            else:
+                positions[vehicle_id] = (last[0] + xs[row], last[1] + ys[row])
+        self._positions = positions
+        self._frame = frame
+
+    def seek(self, frame):
+        """Decode up to a frame, starting from its keyframe if needed"""
+        frame = max(0, min(frame, len(self) - 1))
+        keyframe = frame - frame % self.keyframe_interval
+        if not keyframe <= self._frame <= frame:
+            self._frame = keyframe - 1
+        while self._frame < frame:
+            self._decode(self._frame + 1)
+        return frame
+
+    def frame(self, index):
+        """Decoded ReplayFrame at a frame index"""
+        index = self.seek(index)
+        states, directions = self._rows[3], self._rows[4]
+        vehicles = []
+        for row in range(self.offsets[index], self.offsets[index + 1]):
+            vehicle = self.vehicles[self._rows[0][row]]
+            x, y = self._positions[vehicle.vehicle_id]
+            vehicle.interpolated_position = (x * self.scale, y * self.scale)
+            vehicle.state = VEHICLE_STATES[states[row]]
+            vehicle.direction = DIRECTIONS[directions[row]]
+            vehicles.append(vehicle)
+
+        # Phase codes enumerate (NS, EW) color pairs, NS first
+        ns, ew = divmod(int(self.arrays['frame_light'][index]), len(LIGHT_COLORS))
+        action = int(self.arrays['frame_action'][index])
+        return ReplayFrame(index, int(self.arrays['frame_tick'][index]), LIGHT_COLORS[ns], LIGHT_COLORS[ew],
+                           None if action < 0 else action, vehicles)
+
+    def render(self, index, debug_mode=False):
+        """Draw a frame onto the Pygame screen with the live draw_* functions"""
+        from src.visualization import draw_background, draw_traffic_lights, draw_vehicles
+
+        frame = self.frame(index)
+        draw_background(self.buildings)
+        draw_traffic_lights(frame.ns_light, frame.ew_light)
+        draw_vehicles(frame.vehicles, debug_mode, [vehicle.direction for vehicle in frame.vehicles])
+        return frame
+
+
+def _draw_timeline(screen, font, player, frame, speed, paused):
+    """Progress bar with keyframe ticks and a status line"""
+    import pygame
+    from src.config import BLACK, WHITE
+
+    width, height = screen.get_size()
+    bar = pygame.Rect(20, height - 30, width - 40, 10)
+    pygame.draw.rect(screen, BLACK, bar)
+    for keyframe in range(0, len(player), player.keyframe_interval):
+        x = bar.x + bar.width * keyframe // max(len(player) - 1, 1)
+        pygame.draw.line(screen, (90, 90, 90), (x, bar.y), (x, bar.bottom))
+    handle_x = bar.x + bar.width * frame.index // max(len(player) - 1, 1)
+    pygame.draw.circle(screen, WHITE, (handle_x, bar.centery), 7)
+
+    status = (f"Episode {player.header['episode']}  tick {frame.tick}  "
+              f"frame {frame.index + 1}/{len(player)}  {speed:g}x{'  paused' if paused else ''}")
+    screen.blit(font.render(status, True, WHITE, BLACK), (20, height - 60))
+    return bar
+
+
+def play(path, speed=1.0, fps=20, debug_mode=False):
+    """Interactive replay window.
+
+    Controls: SPACE pause, LEFT/RIGHT step (paused) or jump one keyframe,
+    UP/DOWN change speed, HOME/END jump to start/end, click or drag the
+    timeline to scrub, ESC quit.
+    """
+    import pygame
+    from src.config import screen
+    from src.shared import PygameContext
+    from src.visualization import text_cache
+
+    PygameContext.initialize(screen)
+    pygame.display.set_caption(f"Replay - {os.path.basename(path)}")
+    font = text_cache.font(24)
+    clock = PygameContext.get_clock()
+    player = ReplayPlayer(path)
+
+    position = 0.0
+    paused = False
+    scrubbing = False
+    bar = None
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                step = 1 if paused else player.keyframe_interval
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    position += step
+                elif event.key == pygame.K_LEFT:
+                    position -= step
+                elif event.key == pygame.K_UP:
+                    speed = min(speed * 2, 64)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed / 2, 0.125)
+                elif event.key == pygame.K_HOME:
+                    position = 0
+                elif event.key == pygame.K_END:
+                    position = len(player) - 1
+            elif event.type == pygame.MOUSEBUTTONDOWN and bar and bar.inflate(0, 20).collidepoint(event.pos):
+                scrubbing = True
+            elif event.type == pygame.MOUSEBUTTONUP:
+                scrubbing = False
+            if scrubbing and event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+                fraction = (event.pos[0] - bar.x) / bar.width
+                position = fraction * (len(player) - 1)
+
+        if not paused and not scrubbing:
+            position += speed
+        position = max(0.0, min(position, len(player) - 1))
+
+        frame = player.render(int(position), debug_mode)
+        bar = _draw_timeline(screen, font, player, frame, speed, paused)
+        pygame.display.flip()
+        clock.tick(fps)
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back a recorded episode")
+    parser.add_argument('path', help="Replay file (e.g. data/replays/episode_0.npz)")
+    parser.add_argument('--speed', type=float, default=1.0, help="Frames advanced per displayed frame")
+    parser.add_argument('--fps', type=int, default=20, help="Display frame rate")
+    parser.add_argument('--debug', action='store_true', help="Draw vehicle ids")
+    args = parser.parse_args()
+    play(args.path, args.speed, args.fps, args.debug)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+SQLite Results Store
+
+One local database (data/results.db by default) for the results of every
+training run, sweep trial and evaluation, instead of loose CSV files:
+
+- runs: One row per training run / sweep trial / evaluated controller
+- configs: Distinct hyperparameter sets, shared between runs
+- episodes: Per-episode metrics, keyed by (run_id, episode)
+
+The database runs in WAL (write-ahead log) mode, so several training
+processes can append at the same time while the dashboard reads. Writers
+insert whole batches in one transaction and wait (busy_timeout) instead
+of failing when another process holds the write lock.
+
+Usage:
+    store = ResultsStore()
+    run_id = store.start_run("ppo", config={'gamma': 0.99, 'learning_rate': 3e-4})
+    store.add_episodes(run_id, [{'episode': 0, 'score': 12.5}, ...])
+    store.best_by_param('gamma')   # mean score for every gamma tried
+"""
+import json
+import os
+import socket
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_DB = "data/results.db"
+
+# Hyperparameters stored as their own (indexed, queryable) config columns
+CONFIG_PARAMS = ('learning_rate', 'batch_size', 'n_steps', 'gamma')
+
+# Metric columns of the episodes table (all optional)
+EPISODE_COLUMNS = ('seed', 'score', 'avg_satisfaction', 'avg_commute', 'wait',
+                   'throughput', 'light_changes', 'completion_rate')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS configs (
+    config_id INTEGER PRIMARY KEY,
+    params TEXT NOT NULL UNIQUE,
+    learning_rate REAL,
+    batch_size INTEGER,
+    n_steps INTEGER,
+    gamma REAL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    config_id INTEGER REFERENCES configs(config_id),
+    started_at TEXT NOT NULL,
+    host TEXT,
+    pid INTEGER
+);
+CREATE TABLE IF NOT EXISTS episodes (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    episode INTEGER NOT NULL,
+    seed INTEGER,
+    score REAL,
+    avg_satisfaction REAL,
+    avg_commute REAL,
+    wait REAL,
+    throughput REAL,
+    light_changes INTEGER,
+    completion_rate REAL,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, episode)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_config ON runs(config_id);
+CREATE INDEX IF NOT EXISTS idx_runs_kind ON runs(kind, name);
+CREATE INDEX IF NOT EXISTS idx_episodes_episode ON episodes(episode);
+CREATE INDEX IF NOT EXISTS idx_episodes_score ON episodes(score);
+"""
+
+
+class ResultsStore:
+    """Connection to the results database.
+
+    A connection must stay on the thread (and process) that created it;
+    open one ResultsStore per writer.
+    """
+
+    def __init__(self, path=DEFAULT_DB, timeout=30.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # isolation_level=None: transactions are opened explicitly below
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _write(self, statements):
+        """Run (sql, params) pairs in one write transaction, return the last cursor"""
+        cursor = self.connection.cursor()
+        # IMMEDIATE takes the write lock up front, so two writers queue
+        # on busy_timeout instead of deadlocking on a lock upgrade
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in statements:
+                cursor.execute(sql, params)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        return cursor
+
+    def get_config_id(self, config):
+        """Id of a hyperparameter set, adding it if it is new"""
+        params = json.dumps(config, sort_keys=True, default=str)
+        row = self.connection.execute("SELECT config_id FROM configs WHERE params = ?", (params,)).fetchone()
+        if row:
+            return row[0]
+        values = [config.get(name) for name in CONFIG_PARAMS]
+        self._write([(
+            "INSERT OR IGNORE INTO configs (params, learning_rate, batch_size, n_steps, gamma) VALUES (?, ?, ?, ?, ?)",
+            [params] + values,
+        )])
+        return self.connection.execute("SELECT config_id FROM configs WHERE params = ?", (params,)).fetchone()[0]
+
+    def start_run(self, name, kind="training", config=None):
+        """Register a new run and return its run_id"""
+        config_id = self.get_config_id(config) if config else None
+        cursor = self._write([(
+            "INSERT INTO runs (name, kind, config_id, started_at, host, pid) VALUES (?, ?, ?, ?, ?, ?)",
+            (name, kind, config_id, datetime.now().isoformat(timespec='seconds'),
+             socket.gethostname(), os.getpid()),
+        )])
+        return cursor.lastrowid
+
+    def add_episodes(self, run_id, rows):
+        """Insert a batch of episode dicts (must contain 'episode') in one transaction"""
+        if not rows:
+            return
+        now = datetime.now().isoformat(timespec='seconds')
+        columns = ('run_id', 'episode') + EPISODE_COLUMNS + ('recorded_at',)
+        sql = (f"INSERT OR REPLACE INTO episodes ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+        self._write([(sql, [run_id, row['episode']] + [row.get(name) for name in EPISODE_COLUMNS] + [now])
+                     for row in rows])
+
+    # Queries
+
+    def query(self, sql, params=()):
+        """Run a read query and return a DataFrame"""
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def runs(self, kind=None):
+        """All runs with their hyperparameters and episode counts"""
+        where = "WHERE r.kind = ?" if kind else ""
+        return self.query(f"""
+            SELECT r.run_id, r.name, r.kind, r.started_at, c.learning_rate, c.batch_size,
+                   c.n_steps, c.gamma, COUNT(e.episode) AS episodes, AVG(e.score) AS mean_score
+            FROM runs r
+            LEFT JOIN configs c ON c.config_id = r.config_id
+            LEFT JOIN episodes e ON e.run_id = r.run_id
+            {where}
+            GROUP BY r.run_id
+            ORDER BY r.run_id
+        """, (kind,) if kind else ())
+
+    def episodes(self, run_ids=None, columns=('episode', 'score')):
+        """Episode metrics of some (or all) runs"""
+        selected = ', '.join(f"e.{name}" for name in columns)
+        if run_ids is None:
+            return self.query(f"SELECT e.run_id, {selected} FROM episodes e ORDER BY e.run_id, e.episode")
+        run_ids = list(run_ids)
+        placeholders = ', '.join('?' * len(run_ids))
+        return self.query(f"SELECT e.run_id, {selected} FROM episodes e WHERE e.run_id IN ({placeholders}) "
+                          f"ORDER BY e.run_id, e.episode", run_ids)
+
+    def top_episodes(self, limit=5, kind=None):
+        """Highest-scoring episodes across runs"""
+        where = "WHERE r.kind = ?" if kind else ""
+        return self.query(f"""
+            SELECT r.name, e.run_id, e.episode, e.score, e.avg_satisfaction, e.avg_commute
+            FROM episodes e JOIN runs r ON r.run_id = e.run_id
+            {where}
+            ORDER BY e.score DESC
+            LIMIT ?
+        """, ((kind, limit) if kind else (limit,)))
+
+    def best_by_param(self, param, kind=None):
+        """Mean score and episode count for every value of one hyperparameter"""
+        if param not in CONFIG_PARAMS:
+            raise ValueError(f"Unknown hyperparameter {param!r}, expected one of {CONFIG_PARAMS}")
+        where = "AND r.kind = ?" if kind else ""
+        return self.query(f"""
+            SELECT c.{param}, AVG(e.score) AS mean_score, MAX(e.score) AS best_score,
+                   COUNT(*) AS episodes
+            FROM episodes e
+            JOIN runs r ON r.run_id = e.run_id
+            JOIN configs c ON c.config_id = r.config_id
+            WHERE e.score IS NOT NULL {where}
+            GROUP BY c.{param}
+            ORDER BY mean_score DESC
+        """, (kind,) if kind else ())
@@ -1,6 +1,11 @@
+import os
+import socket
 from stable_baselines3 import PPO
 from stable_baselines3.common.vec_env import DummyVecEnv
 from src.traffic_env import TrafficEnv
+from src.trajectory_store import TrajectoryRecorder, TrajectoryWriter
+from src.telemetry import TelemetryRing
+from src.pretrain import warm_start as pretrain_policy
 import numpy as np
 from PyQt5.QtCore import QObject, pyqtSignal, QThread, QMutex
 
@@ -39,37 +44,56 @@ class TrainingThread(QThread):
             self.error.emit(str(e))
 
 class TrafficRLAgent(QObject):
-    # Signals for visualization updates
-    traffic_update = pyqtSignal(dict)  # Emits traffic counts by direction
-    reward_update = pyqtSignal(int, float)  # Emits (step, reward)
+    # Live training numbers are pushed to self.telemetry (see src/telemetry.py)
     training_finished = pyqtSignal()
     training_error = pyqtSignal(str)
     
-    def __init__(self, simulation_interface):
+    def __init__(self, simulation_interface, learning_rate=0.0003, n_steps=2048,
+                 batch_size=64, gamma=0.99, verbose=1, trajectory_dir=None, worker_id=None):
         """
         Initialize the RL agent for traffic light control.
         
         Args:
             simulation_interface: Interface to the traffic simulation
+            learning_rate: PPO learning rate (same range as the control panel)
+            n_steps: Steps collected before each policy update
+            batch_size: Minibatch size for each update
+            gamma: Discount factor for future rewards
+            verbose: Stable-Baselines3 logging level (0 = silent)
+            trajectory_dir: If set, every transition collected during training
+                is streamed to a trajectory store in this directory
+            worker_id: This process's directory in the trajectory store
+                (default: host name and process id, so training processes
+                sharing a store never write to the same files)
         """
         super().__init__()
+        self.simulation = simulation_interface
         
         # Create the environment
-        self.env = TrafficEnv(simulation_interface)
-        self.env = DummyVecEnv([lambda: self.env])
+        env = TrafficEnv(simulation_interface)
+        
+        # Optionally keep the rollouts on disk for analysis and offline RL
+        self.trajectory_recorder = None
+        if trajectory_dir:
+            if worker_id is None:
+                worker_id = f"{socket.gethostname()}_{os.getpid()}"
+            env = TrajectoryRecorder(env, TrajectoryWriter(trajectory_dir, worker_id))
+            self.trajectory_recorder = env
+        
+        self.env = DummyVecEnv([lambda: env])
         
         # Initialize the PPO agent
         self.model = PPO(
             "MlpPolicy",
             self.env,
-            learning_rate=0.0003,
-            n_steps=2048,
-            batch_size=64,
+            learning_rate=learning_rate,
+            n_steps=n_steps,
+            batch_size=batch_size,
             n_epochs=10,
-            gamma=0.99,
+            gamma=gamma,
             gae_lambda=0.95,
             clip_range=0.2,
-            verbose=1
+            verbose=verbose
         )
         
         # Training parameters
@@ -79,6 +103,10 @@ class TrafficRLAgent(QObject):
         self.training_thread = None
         self.mutex = QMutex()  # For thread-safe operations
         
+        # Step/reward/traffic rows for the dashboard, sampled by the UI thread
+        self.telemetry = TelemetryRing()
+        self.traffic_counts_interval = 16  # Recount vehicles every N steps
+        
     def train(self):
         """Train the RL agent in a separate thread"""
         if self.is_training:
@@ -87,28 +115,32 @@ class TrafficRLAgent(QObject):
         print(f"Starting RL agent training for {self.total_timesteps} steps...")
         self.is_training = True
         
-        # Custom callback for visualization
+        # Custom callback for visualization. It runs on every environment
+        # step, so it only writes one row into the telemetry ring buffer:
+        # no locks and no cross-thread Qt signals.
+        telemetry = self.telemetry
+        row = np.zeros(len(telemetry.fields))
+        
         def callback(locals, globals):
-            self.mutex.lock()
+            # Check if training was stopped (a plain bool read needs no lock)
+            if not self.is_training:
+                return False
+            
             try:
-                # Check if training was stopped
-                if not self.is_training:
-                    self.mutex.unlock()
-                    return False
-                    
-                # Get current traffic counts
-                traffic_counts = self.env.get_attr('simulation')[0].get_traffic_counts()
-                self.traffic_update.emit(traffic_counts)
+                # num_timesteps lives on the model, not in the rollout locals
+                current_step = self.model.num_timesteps
+                row[0] = current_step
+                row[1] = locals.get('rewards', [0])[0]
                 
-                # Get current reward
-                current_step = locals.get('num_timesteps', 0)
-                current_reward = locals.get('rewards', [0])[0]
-                self.reward_update.emit(current_step, current_reward)
+                # Traffic counts change slowly, so refresh them only now and then
+                if current_step % self.traffic_counts_interval == 0 and self.simulation is not None:
+                    traffic_counts = self.simulation.get_traffic_counts()
+                    row[2:6] = (traffic_counts['north'], traffic_counts['south'],
+                                traffic_counts['east'], traffic_counts['west'])
                 
-                self.mutex.unlock()
+                telemetry.push(row)
                 return True
             except Exception as e:
-                self.mutex.unlock()
                 print(f"Error in callback: {str(e)}")
                 return False
         
@@ -123,6 +155,8 @@ class TrafficRLAgent(QObject):
         self.mutex.lock()
         self.is_training = False
         self.mutex.unlock()
+        if self.trajectory_recorder:
+            self.trajectory_recorder.flush()
         print("Training completed!")
         self.training_finished.emit()
         
@@ -143,6 +177,19 @@ class TrafficRLAgent(QObject):
             self.training_thread.terminate()
             self.training_thread.wait()
         
+    def warm_start(self, controller_name="max_pressure", episodes=10, epochs=10, seed=0):
+        """
+        Pretrain the policy by imitating a heuristic controller before PPO
+        training starts (behavior cloning, see src/pretrain.py).
+        
+        Returns:
+            Fraction of the recorded decisions the policy reproduces
+        """
+        accuracy = pretrain_policy(self.model, self.simulation, controller_name, episodes, epochs, seed)
+        # Recording ran whole episodes, so start training from a fresh one
+        self.simulation.reset()
+        return accuracy
+        
     def save(self, path):
         """Save the trained model"""
         self.model.save(path)
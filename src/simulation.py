@@ -1,14 +1,25 @@
 import random
+import threading
+import time
 import pygame
 import numpy as np
 import torch
 from src.config import WIDTH, HEIGHT, BUILDING_COLORS, DEBUG_MODE, SLOW_MODE, EPISODE_LENGTH, WHITE, BLACK, LANES, SPEED_SLIDER, TRAINING_SLIDER, MAX_VEHICLES_PER_LANE, ROAD_WIDTH
-from src.visualization import draw_buildings, draw_road, draw_traffic_lights, draw_vehicle, draw_debug_info
+from src.visualization import DirtyRectRenderer, get_vehicle_draw_position, ensure_vehicle_color, text_cache
+from src.render_pipeline import FrameSnapshot, VehicleSnapshot, draw_snapshot
 from src.vehicle_spawner import generate_vehicle_spawn_schedule, spawn_vehicles
-from src.collision import check_collision, get_vehicle_position
-from src.shared import get_screen, get_clock
+from src.collision import check_collision, get_vehicle_position, get_vehicle_direction
+from src.shared import get_screen
 from src.rl_agent import TrafficRLAgent
 from src.agent import Vehicle
+from src.controllers import FixedTimeController, PolicyController
+from src.vehicle_events import VehicleEventLog
+from src.timestep import FixedTimestep
+
+# Turbo mode: simulate for this long per call to step(), and only draw a
+# frame every TURBO_RENDER_INTERVAL seconds
+TURBO_FRAME_BUDGET = 0.015
+TURBO_RENDER_INTERVAL = 0.5
 
 # Check if CUDA is available
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -25,7 +36,12 @@ Key Components:
 """
 
 class Simulation:
-    def __init__(self):
+    def __init__(self, with_rl_agent=True):
+        """
+        Args:
+            with_rl_agent: Build the built-in PPO agent. Headless runners that
+                bring their own agent or controller pass False to skip it.
+        """
         try:
             # Initialize buildings
             self.buildings = []
@@ -48,6 +64,10 @@ class Simulation:
             # Current simulation mode
             self.simulation_mode = "RL"  # Default mode
             
+            # Signal controller that picks light phases each tick (None = manual)
+            self.controller = None
+            self.fallback_controller = FixedTimeController(cycle=100)
+            
             # Add log counter for debug output
             self.log_counter = 0
             
@@ -62,23 +82,49 @@ class Simulation:
                 'west': 0
             }
             
+            # Per-vehicle lifecycle events of the current episode
+            self.vehicle_events = VehicleEventLog()
+            
+            # Held by whichever thread changes the simulation: the
+            # SimulationWorker for ticks and commands, the RL training
+            # thread for each environment step (see TrafficEnv)
+            self.lock = threading.RLock()
+            
+            # Draws frames by updating only the screen areas that changed
+            self.renderer = DirtyRectRenderer()
+            
+            # Optional frame recorder for offline replays (see src.replay)
+            self.replay_recorder = None
+            self.last_action = None
+            
+            # Optional offscreen frame capture (see src.frame_capture)
+            self.frame_capture = None
+            
             # Initialize simulation state
             self.reset()
             self.episode_ended = False
-            self.current_fps = SPEED_SLIDER['default_fps']
+            self.current_fps = SPEED_SLIDER['default_fps']  # Simulation ticks per second at 1x
+            self.speed_multiplier = 1
+            self.turbo = False
+            self.timestep = FixedTimestep(tick_rate=self.current_fps)
+            self.previous_positions = {}  # vehicle_id -> position one tick earlier (for interpolation)
+            self.last_render_time = 0.0
             self.current_training_steps = TRAINING_SLIDER['default_steps']
             self.slider_dragging = False
             self.training_slider_dragging = False
             
             # Initialize RL agent
             try:
-                self.rl_agent = TrafficRLAgent(self)
+                self.rl_agent = TrafficRLAgent(self) if with_rl_agent else None
                 self.training_in_progress = False
             except Exception as e:
                 print(f"Warning: Failed to initialize RL agent: {e}")
                 self.rl_agent = None
                 self.training_in_progress = False
             
+            # RL mode is the default, so start with the agent's policy
+            self.set_mode(self.simulation_mode)
+            
             # Initialize tensors for GPU acceleration
             try:
                 self.vehicle_positions = torch.zeros((MAX_VEHICLES_PER_LANE * 4, 2), device=DEVICE)
@@ -142,12 +188,37 @@ class Simulation:
         self.running = True
         self.episode_ended = False
         self.light_change_count = 0  # Track number of light changes per episode
+        self.vehicle_events.clear()
+        if self.replay_recorder is not None:
+            self.replay_recorder.start_episode(self)
     
     def set_data_recorder(self, data_recorder):
         """Set the data recorder for the simulation"""
         self.data_recorder = data_recorder
         data_recorder.set_simulation(self)  # Set the simulation reference
     
+    def set_replay_recorder(self, replay_recorder):
+        """Record replays of this and every following episode (None to stop)"""
+        if self.replay_recorder is not None:
+            self.replay_recorder.finish()
+        self.replay_recorder = replay_recorder
+        if replay_recorder is not None:
+            replay_recorder.start_episode(self)
+    
+    def set_frame_capture(self, frame_capture):
+        """Render every Nth tick to PNGs or an encoder pipe (None to stop)"""
+        if self.frame_capture is not None:
+            self.frame_capture.close()
+        self.frame_capture = frame_capture
+    
+    def capture_frame(self):
+        """Hand the finished tick to the replay recorder and frame capture, if any"""
+        if self.replay_recorder is not None:
+            self.replay_recorder.capture(self, self.last_action)
+        self.last_action = None
+        if self.frame_capture is not None:
+            self.frame_capture.capture(self)
+    
     def get_avg_commute_time(self):
         """Get average commute time of completed vehicles"""
         if not self.removed_vehicles:
@@ -191,6 +262,8 @@ class Simulation:
     
     def set_traffic_lights(self, action):
         """Set traffic lights based on action with yellow transitions"""
+        self.last_action = action  # Kept for the replay, even if the lights are mid-transition
+        
         # Only change lights if they're not in yellow transition
         if self.ns_light == "yellow" or self.ew_light == "yellow":
             return
@@ -223,47 +296,9 @@ class Simulation:
         """Handle user input events"""
         try:
             for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
+                self.handle_event(event)
+                if not self.running:
                     return
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.running = False
-                        return
-                    elif event.key == pygame.K_d:
-                        global DEBUG_MODE
-                        DEBUG_MODE = not DEBUG_MODE
-                    elif event.key == pygame.K_s:
-                        global SLOW_MODE
-                        SLOW_MODE = not SLOW_MODE
-                    elif event.key == pygame.K_e:
-                        if not self.episode_ended:
-                            self.episode_ended = True
-                            if hasattr(self, 'data_recorder'):
-                                self.data_recorder.end_episode(self.light_change_count)
-                    elif event.key == pygame.K_n:
-                        if self.episode_ended:
-                            self.reset()
-                    elif event.key == pygame.K_c and self.tutorial_mode:
-                        self.tutorial_step += 1
-                    elif self.manual_mode:
-                        if event.key == pygame.K_SPACE:
-                            # Only change lights if they're not in yellow transition
-                            if self.ns_light != "yellow" and self.ew_light != "yellow":
-                                # Start yellow transition for current green light
-                                if self.ns_light == "green":
-                                    self.ns_light = "yellow"
-                                    self.light_timer = 3
-                                elif self.ew_light == "green":
-                                    self.ew_light = "yellow"
-                                    self.light_timer = 3
-                                # Set the other light to green
-                                if self.ns_light == "yellow":
-                                    self.ew_light = "green"
-                                else:
-                                    self.ns_light = "green"
-                                if hasattr(self, 'data_recorder'):
-                                    self.data_recorder.record_light_change()
         except pygame.error as e:
             if "display Surface quit" in str(e):
                 self.running = False
@@ -271,6 +306,52 @@ class Simulation:
             else:
                 raise
     
+    def handle_event(self, event):
+        """Handle one input event (on the thread that runs the simulation)"""
+        if event.type == pygame.QUIT:
+            self.running = False
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.running = False
+            elif event.key == pygame.K_d:
+                global DEBUG_MODE
+                DEBUG_MODE = not DEBUG_MODE
+            elif event.key == pygame.K_s:
+                global SLOW_MODE
+                SLOW_MODE = not SLOW_MODE
+            elif event.key == pygame.K_e:
+                if not self.episode_ended:
+                    self.episode_ended = True
+                    if hasattr(self, 'data_recorder'):
+                        self.data_recorder.end_episode(self.light_change_count)
+            elif event.key == pygame.K_n:
+                if self.episode_ended:
+                    self.reset()
+            elif event.key == pygame.K_c and self.tutorial_mode:
+                self.tutorial_step += 1
+            elif event.key in (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4):
+                self.speed_multiplier = event.key - pygame.K_0
+            elif event.key == pygame.K_f:
+                self.set_turbo(not self.turbo)
+            elif self.manual_mode:
+                if event.key == pygame.K_SPACE:
+                    # Only change lights if they're not in yellow transition
+                    if self.ns_light != "yellow" and self.ew_light != "yellow":
+                        # Start yellow transition for current green light
+                        if self.ns_light == "green":
+                            self.ns_light = "yellow"
+                            self.light_timer = 3
+                        elif self.ew_light == "green":
+                            self.ew_light = "yellow"
+                            self.light_timer = 3
+                        # Set the other light to green
+                        if self.ns_light == "yellow":
+                            self.ew_light = "green"
+                        else:
+                            self.ns_light = "green"
+                        if hasattr(self, 'data_recorder'):
+                            self.data_recorder.record_light_change()
+    
     def get_light_state(self):
         """Get the current state of the traffic lights"""
         return (self.ns_light, self.ew_light)
@@ -449,37 +530,23 @@ class Simulation:
                     vehicle.position_time = 0
                     
                     self.active_vehicles.append(vehicle)
+        
+        # Log spawns, stops, starts, intersection entries/exits and arrivals
+        # (after spawning, so new vehicles are stamped with this tick)
+        self.vehicle_events.observe(self.current_tick, self.active_vehicles, vehicles_to_remove)
     
-    def draw(self, data_recorder):
-        """Draw the current simulation state"""
+    def draw(self, data_recorder, alpha=1.0):
+        """Draw the current simulation state
+        
+        Args:
+            alpha: Fraction of the way from the previous to the current tick
+                at which vehicles are drawn (1.0 = exactly the current tick)
+        """
+        self.last_render_time = time.perf_counter()
         try:
-            screen = get_screen()
-            screen.fill(WHITE)
-            
-            # Draw buildings
-            draw_buildings(self.buildings)
-            
-            # Draw road and traffic lights
-            draw_road()
-            draw_traffic_lights(self.ns_light, self.ew_light)
-            
-            # Draw vehicles
-            for vehicle in self.active_vehicles:
-                draw_vehicle(vehicle, DEBUG_MODE)
-            
-            # Draw debug info if debug mode is enabled
-            if DEBUG_MODE:
-                # Calculate lane occupancy
-                lane_counts = {}
-                for vehicle in self.active_vehicles:
-                    if vehicle.position in ['north', 'south', 'east', 'west']:
-                        lane_counts[vehicle.position] = lane_counts.get(vehicle.position, 0) + 1
-                
-                draw_debug_info(self.ns_light, self.ew_light, self.active_vehicles, 
-                              self.spawn_schedule, self.current_tick, EPISODE_LENGTH, lane_counts)
-            
-            # Force display update
-            pygame.display.flip()
+            # Same drawing path as the render thread (see src.render_pipeline):
+            # only the areas that changed since the last frame are redrawn
+            draw_snapshot(self.renderer, self.buildings, self.snapshot(), alpha)
         except pygame.error as e:
             if "display Surface quit" in str(e):
                 self.running = False
@@ -487,6 +554,50 @@ class Simulation:
             else:
                 raise
     
+    def snapshot(self, dashboard=False):
+        """Immutable copy of the current state for drawing (see FrameSnapshot)
+        
+        Args:
+            dashboard: Also collect the statistics the dashboard shows
+        """
+        vehicles = []
+        for vehicle in self.active_vehicles:
+            position = get_vehicle_draw_position(vehicle)
+            if position is None:
+                continue
+            ensure_vehicle_color(vehicle)
+            vehicles.append(VehicleSnapshot(
+                vehicle.vehicle_id, vehicle.vehicle_type, vehicle.size_multiplier, vehicle.color,
+                vehicle.state, get_vehicle_direction(vehicle), position,
+                self.previous_positions.get(vehicle.vehicle_id)))
+        lane_counts = self.vehicle_events.lane_counts if DEBUG_MODE else {}
+        
+        # Backdate the snapshot by the part of a tick the clock has already
+        # used, so the renderer interpolates from the moment the tick was due
+        tick_rate = self.timestep.tick_rate
+        published = time.perf_counter() - self.timestep.accumulator / tick_rate
+        return FrameSnapshot(self.current_tick, published, tick_rate, self.ns_light, self.ew_light,
+                             tuple(vehicles), DEBUG_MODE, lane_counts, self.episode_ended,
+                             self.get_dashboard_status() if dashboard else None)
+    
+    def get_dashboard_status(self):
+        """Statistics and messages shown by the dashboard"""
+        tutorial_message = None
+        if self.tutorial_mode and self.tutorial_step < len(self.tutorial_messages):
+            tutorial_message = self.tutorial_messages[self.tutorial_step]
+        return {
+            'waiting_count': sum(1 for v in self.active_vehicles if v.state == "waiting"),
+            'moving_count': sum(1 for v in self.active_vehicles if v.state == "moving"),
+            'arrived_count': len(self.removed_vehicles),
+            'avg_satisfaction': self.get_avg_satisfaction(),
+            'episode': getattr(self.data_recorder, 'current_episode', 0) if hasattr(self, 'data_recorder') else 0,
+            'metrics': self.get_metrics(),
+            'traffic_counts': self.get_traffic_counts(),
+            'tutorial_message': tutorial_message,
+            'training_in_progress': self.training_active,
+            'current_training_steps': self.current_training_steps,
+        }
+    
     def update_simulation(self):
         """Update the simulation for one step without drawing (used by RL)"""
         if not self.episode_ended:
@@ -519,6 +630,7 @@ class Simulation:
             
             # Increment tick counter
             self.current_tick += 1
+            self.capture_frame()
             
             # Check if episode should end
             if self.current_tick >= EPISODE_LENGTH or (not self.active_vehicles and not self.spawn_schedule):
@@ -559,34 +671,86 @@ class Simulation:
         observation = waiting.cpu().numpy().astype(np.int32)
         return observation
     
+    @property
+    def training_active(self):
+        """Whether the RL training thread is stepping the simulation"""
+        return self.rl_agent is not None and self.rl_agent.is_training
+    
     def step(self, data_recorder):
-        """Update the simulation state with GPU acceleration"""
+        """Run the simulation ticks that are due and draw one frame.
+        
+        Called once per rendered frame when the simulation and the display
+        share a thread (SimulationWorker runs advance_due_ticks on its own
+        thread instead).
+        """
         # Handle events
         self.handle_events()
         
-        # Update traffic lights based on mode
-        if self.simulation_mode == "RL":
+        self.advance_due_ticks(data_recorder)
+        if self.turbo:
+            # Draw only now and then while simulating as fast as possible
+            if time.perf_counter() - self.last_render_time >= TURBO_RENDER_INTERVAL:
+                self.draw(data_recorder)
+            return
+        
+        # Draw everything
+        self.draw(data_recorder, alpha=self.timestep.alpha)
+    
+    def advance_due_ticks(self, data_recorder, tick=None):
+        """Run the ticks that are due on the fixed-timestep clock.
+        
+        How many ticks that is depends on the elapsed time, the ticks-per-
+        second setting (current_fps) and the speed multiplier. In turbo mode
+        ticks run back to back for TURBO_FRAME_BUDGET seconds instead.
+        
+        Args:
+            tick: Optional function that runs one tick instead of advance_tick
+        
+        Returns:
+            Number of ticks run
+        """
+        if tick is None:
+            tick = lambda: self.advance_tick(data_recorder)
+        
+        # SLOW_MODE keeps its old meaning: a quarter of the normal speed
+        self.timestep.tick_rate = self.current_fps * self.speed_multiplier * (0.25 if SLOW_MODE else 1)
+        
+        if self.turbo:
+            # No interpolation: the state moves on too far between frames
+            self.previous_positions = {}
+            ticks = 0
+            deadline = time.perf_counter() + TURBO_FRAME_BUDGET
+            while self.running and time.perf_counter() < deadline:
+                tick()
+                ticks += 1
+            return ticks
+        
+        ticks = self.timestep.advance()
+        for i in range(ticks):
+            if i == ticks - 1:
+                # Interpolate from the state just before the last tick
+                self.previous_positions = {v.vehicle_id: v.interpolated_position for v in self.active_vehicles}
+            tick()
+        return ticks
+    
+    def set_turbo(self, enabled):
+        """Turbo mode runs ticks back to back and skips most frames"""
+        self.turbo = enabled
+        self.timestep.reset()
+    
+    def advance_tick(self, data_recorder):
+        """Run one simulation tick (controller, lights, spawns, vehicles, recording)"""
+        # Let the active controller pick the light phase
+        # (manual mode has no controller: lights change in handle_events)
+        if self.controller is not None:
+            observation = self.get_observation()
             try:
-                # Get observation and action from RL agent
-                observation = self.get_observation()
-                action = self.rl_agent.predict(observation)
-                self.set_traffic_lights(action)
+                action = self.controller.act_single(observation, self.current_tick)
             except Exception as e:
-                print(f"Error in RL mode: {str(e)}")
-                # Fallback to alternating pattern if RL fails
-                if self.current_tick % 100 < 50:
-                    self.set_traffic_lights(0)  # NS green
-                else:
-                    self.set_traffic_lights(1)  # EW green
-        elif self.manual_mode:
-            # Manual control is handled in handle_events
-            pass
-        else:  # Tutorial mode
-            # Tutorial mode uses simple alternating pattern
-            if self.current_tick % 100 < 50:
-                self.set_traffic_lights(0)  # NS green
-            else:
-                self.set_traffic_lights(1)  # EW green
+                print(f"Error in {self.controller.name} controller: {str(e)}")
+                # Fallback to the alternating pattern if the controller fails
+                action = self.fallback_controller.act_single(observation, self.current_tick)
+            self.set_traffic_lights(action)
         
         # Update traffic light states
         self.update_traffic_lights()
@@ -600,6 +764,7 @@ class Simulation:
         
         # Update current tick
         self.current_tick += 1
+        self.capture_frame()
         
         # Record data for visualization
         waiting_count = sum(1 for v in self.active_vehicles if v.state == "waiting")
@@ -610,16 +775,6 @@ class Simulation:
         if hasattr(self, 'data_recorder'):
             data_recorder.record_tick(self.current_tick, f"NS:{self.ns_light},EW:{self.ew_light}", 
                                     waiting_count, moving_count, arrived_count, avg_satisfaction)
-        
-        # Draw everything
-        self.draw(data_recorder)
-        
-        # Control simulation speed using the fps value
-        clock = get_clock()
-        if SLOW_MODE:
-            clock.tick(5)  # Even slower for debugging
-        else:
-            clock.tick(20)  # Reduced default speed
     
     def set_traffic_mode(self, mode):
         """Set the traffic generation mode"""
@@ -647,23 +802,35 @@ class Simulation:
         self.tutorial_mode = (mode == "Tutorial")
         self.manual_mode = (mode == "Manual")
         
+        # Pick the controller for the mode
+        if mode == "RL" and self.rl_agent is not None:
+            self.set_controller(PolicyController(agent=self.rl_agent))
+        elif self.manual_mode:
+            self.set_controller(None)
+        else:
+            # Tutorial mode (or RL without an agent) uses the alternating pattern
+            self.set_controller(FixedTimeController(cycle=100))
+        
         # Reset tutorial step when entering tutorial mode
         if self.tutorial_mode:
             self.tutorial_step = 0
+    
+    def set_controller(self, controller):
+        """Plug in a signal controller (see src.controllers); None hands control to the keyboard"""
+        if controller is not None:
+            controller.reset()
+        self.controller = controller
             
     def draw_tutorial_message(self):
         """Draw the current tutorial message"""
         if self.tutorial_step < len(self.tutorial_messages):
             message = self.tutorial_messages[self.tutorial_step]
-            font = pygame.font.Font(None, 36)
-            text = font.render(message, True, WHITE)
+            text = text_cache.render(message, 36, WHITE)
             text_rect = text.get_rect(center=(WIDTH//2, HEIGHT - 50))
             get_screen().blit(text, text_rect)
             
             # Draw instruction
-            instruction = "Press SPACE to continue"
-            instruction_font = pygame.font.Font(None, 24)
-            instruction_text = instruction_font.render(instruction, True, WHITE)
+            instruction_text = text_cache.render("Press SPACE to continue", 24, WHITE)
             instruction_rect = instruction_text.get_rect(center=(WIDTH//2, HEIGHT - 20))
             get_screen().blit(instruction_text, instruction_rect)
     
@@ -0,0 +1,266 @@
+"""
+Parallel Hyperparameter Sweep for the Traffic RL Agent
+
+Trains many TrafficRLAgent configurations at once on the headless engine
+and prunes the clearly losing ones early with successive halving:
+
+1. Every trial trains for a small budget (min_steps) and is evaluated
+2. Only the best 1/eta of the trials survive to the next rung
+3. Survivors keep training from their checkpoint with eta times the budget
+4. Repeat until one trial is left or the budget reaches max_steps
+
+Trials of the same rung run in parallel across a process pool, so the
+sweep scales with the number of cores. Every trial is also a 'sweep' run
+in the results database; each worker process appends its rung scores
+(stored as episode = rung) directly.
+
+Usage:
+    python -m src.sweep --mode grid --workers 16
+    python -m src.sweep --mode random --trials 64 --max-steps 200000
+"""
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from src.results_store import DEFAULT_DB, ResultsStore
+
+# Default search space, using the same ranges as the control panel.
+# A list is searched as-is; a tuple ("log" | "uniform" | "int", low, high)
+# is sampled in random mode.
+DEFAULT_SPACE = {
+    'learning_rate': [0.0001, 0.0003, 0.001, 0.003],
+    'batch_size': [32, 64, 128, 256],
+    'n_steps': [512, 1024, 2048],
+    'gamma': [0.95, 0.99, 0.999],
+}
+
+RANDOM_SPACE = {
+    'learning_rate': ("log", 0.0001, 0.01),
+    'batch_size': [32, 64, 128, 256],
+    'n_steps': [512, 1024, 2048, 4096],
+    'gamma': ("uniform", 0.9, 0.999),
+}
+
+
+def grid_configs(space):
+    """Every combination of the listed values in the search space"""
+    names = list(space)
+    values = [space[name] if isinstance(space[name], list) else [space[name]] for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def sample_value(spec, rng):
+    """Draw one value from a search-space entry"""
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    if isinstance(spec, tuple):
+        kind, low, high = spec
+        if kind == "log":
+            return math.exp(rng.uniform(math.log(low), math.log(high)))
+        if kind == "int":
+            return rng.randint(low, high)
+        return rng.uniform(low, high)
+    return spec
+
+
+def random_configs(space, n_trials, seed=0):
+    """Random search: n_trials independent samples from the search space"""
+    rng = random.Random(seed)
+    return [{name: sample_value(spec, rng) for name, spec in space.items()}
+            for _ in range(n_trials)]
+
+
+def _train_trial(job):
+    """Train one trial up to its rung budget and evaluate it (pool worker)"""
+    from src.headless import create_headless_simulation
+
+    simulation = create_headless_simulation(seed=job['seed'])
+
+    import torch
+    from stable_baselines3.common.evaluation import evaluate_policy
+    from src.rl_agent import TrafficRLAgent
+
+    # One trial per core: keep PyTorch from oversubscribing the machine
+    torch.set_num_threads(1)
+
+    params = job['params']
+    agent = TrafficRLAgent(
+        simulation,
+        learning_rate=params['learning_rate'],
+        n_steps=int(params['n_steps']),
+        batch_size=int(params['batch_size']),
+        gamma=params['gamma'],
+        verbose=0
+    )
+    if os.path.exists(job['checkpoint']):
+        # Resume the survivor where the previous rung left off
+        agent.load(job['checkpoint'])
+    elif job['warm_start']:
+        # First rung: start from a policy that imitates a heuristic controller
+        agent.warm_start(job['warm_start'], seed=job['seed'])
+
+    start = time.time()
+    agent.model.learn(total_timesteps=job['train_steps'], reset_num_timesteps=False)
+    agent.save(job['checkpoint'])
+
+    mean_reward, std_reward = evaluate_policy(
+        agent.model, agent.env, n_eval_episodes=job['eval_episodes'], deterministic=True
+    )
+
+    if job['db']:
+        # Workers write concurrently; the store serializes them with WAL locking
+        store = ResultsStore(job['db'])
+        store.add_episodes(job['run_id'], [{'episode': job['rung'], 'seed': job['seed'], 'score': float(mean_reward)}])
+        store.close()
+    return {
+        'trial': job['trial'],
+        'rung': job['rung'],
+        'total_steps': job['total_steps'],
+        'score': float(mean_reward),
+        'score_std': float(std_reward),
+        'seconds': time.time() - start,
+    }
+
+
+def successive_halving(configs, output_dir, workers=None, min_steps=2048, max_steps=65536,
+                       eta=3, eval_episodes=3, seed=0, warm_start=None, db_path=DEFAULT_DB):
+    """Run a successive-halving sweep over a list of configurations.
+
+    Args:
+        configs: List of parameter dicts (see grid_configs / random_configs)
+        output_dir: Directory for checkpoints and the results table
+        workers: Number of worker processes (defaults to all cores)
+        min_steps: Training budget of the first rung
+        max_steps: Largest budget a single trial may reach
+        eta: Keep the best 1/eta trials at every rung
+        eval_episodes: Evaluation episodes used to score a trial
+        seed: Seed shared by every trial so they see the same traffic
+        warm_start: Optional controller name to behavior-clone before training
+        db_path: Results database to record every trial in (None to skip)
+
+    Returns:
+        DataFrame of all trials ranked by their best score
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count()
+
+    trials = {i: {'trial': i, **config} for i, config in enumerate(configs)}
+    survivors = list(trials)
+    history = []
+
+    run_ids = {}
+    if db_path:
+        store = ResultsStore(db_path)
+        sweep_name = os.path.basename(os.path.normpath(output_dir))
+        run_ids = {i: store.start_run(f"{sweep_name}/trial_{i}", "sweep", config) for i, config in enumerate(configs)}
+        store.close()
+
+    # Spawned workers start clean instead of inheriting a forked Pygame/Torch state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        rung = 0
+        trained_steps = 0
+        budget = min_steps
+        while survivors:
+            budget = min(budget, max_steps)
+            print(f"Rung {rung}: {len(survivors)} trials, {budget} steps each")
+            jobs = [{
+                'trial': trial,
+                'rung': rung,
+                'params': configs[trial],
+                'seed': seed,
+                'train_steps': budget - trained_steps,
+                'total_steps': budget,
+                'eval_episodes': eval_episodes,
+                'warm_start': warm_start,
+                'checkpoint': os.path.join(output_dir, f"trial_{trial}.zip"),
+                'db': db_path,
+                'run_id': run_ids.get(trial),
+            } for trial in survivors]
+            results = list(pool.map(_train_trial, jobs))
+            history.extend(results)
+
+            for result in results:
+                print(f"  trial {result['trial']}: score {result['score']:.3f} "
+                      f"({result['seconds']:.1f}s)")
+
+            if len(survivors) == 1 or budget >= max_steps:
+                break
+
+            # Keep the best 1/eta of the rung
+            results.sort(key=lambda r: r['score'], reverse=True)
+            keep = max(1, len(results) // eta)
+            survivors = [r['trial'] for r in results[:keep]]
+            trained_steps = budget
+            budget *= eta
+            rung += 1
+
+    # Rank every trial by the last (largest-budget) score it reached
+    history_df = pd.DataFrame(history)
+    final = history_df.sort_values('rung').groupby('trial').tail(1).set_index('trial')
+    table = pd.DataFrame(trials.values()).set_index('trial')
+    table = table.join(final[['rung', 'total_steps', 'score', 'score_std']])
+    table = table.sort_values(['rung', 'score'], ascending=False)
+    table.insert(0, 'rank', range(1, len(table) + 1))
+
+    results_file = os.path.join(output_dir, "results.csv")
+    table.to_csv(results_file)
+    history_df.to_csv(os.path.join(output_dir, "history.csv"), index=False)
+    print(f"Results written to {results_file}")
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel PPO hyperparameter sweep")
+    parser.add_argument('--mode', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--trials', type=int, default=27, help="Number of random-search trials")
+    parser.add_argument('--space', help="JSON file with a custom search space")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--min-steps', type=int, default=2048)
+    parser.add_argument('--max-steps', type=int, default=65536)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--eval-episodes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warm-start', default=None, help="Controller to behavior-clone first (e.g. max_pressure)")
+    parser.add_argument('--output', default=None, help="Output directory (default data/sweeps/<timestamp>)")
+    parser.add_argument('--db', default=DEFAULT_DB, help="Results database ('' to skip)")
+    args = parser.parse_args()
+
+    if args.space:
+        with open(args.space) as f:
+            # JSON has no tuples: ["log", 1e-4, 1e-2] style lists become samplers
+            space = {name: tuple(spec) if isinstance(spec, list) and spec and isinstance(spec[0], str) else spec
+                     for name, spec in json.load(f).items()}
+    else:
+        space = DEFAULT_SPACE if args.mode == 'grid' else RANDOM_SPACE
+
+    if args.mode == 'grid':
+        configs = grid_configs(space)
+    else:
+        configs = random_configs(space, args.trials, seed=args.seed)
+
+    output_dir = args.output or os.path.join("data", "sweeps", time.strftime("%Y%m%d_%H%M%S"))
+    table = successive_halving(
+        configs, output_dir,
+        workers=args.workers,
+        min_steps=args.min_steps,
+        max_steps=args.max_steps,
+        eta=args.eta,
+        eval_episodes=args.eval_episodes,
+        seed=args.seed,
+        warm_start=args.warm_start,
+        db_path=args.db
+    )
+    print(table.head(10).to_string())
+
+
+if __name__ == "__main__":
+    main()
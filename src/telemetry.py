@@ -0,0 +1,82 @@
+"""
+Training Telemetry Channel
+
+Moves live training numbers (step, reward, traffic counts) from the
+training thread to the dashboard without slowing training down.
+
+- The training callback pushes one row per step into TelemetryRing, a
+  preallocated NumPy ring buffer. Pushing is a single row assignment plus
+  an integer increment: no locks, no Qt signals.
+- TelemetrySampler lives in the UI thread and drains the ring on a QTimer
+  (10 Hz by default), emitting each batch with one signal.
+
+The ring has exactly one writer (the training thread) and one reader (the
+UI thread). The writer only advances write_index after a row is complete,
+and the reader only moves read_index, so no lock is needed. If the reader
+falls `capacity` rows behind, the oldest rows are dropped (the oldest one
+sits in the slot the writer may be filling).
+"""
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+TELEMETRY_FIELDS = ('step', 'reward', 'north', 'south', 'east', 'west')
+
+
+class TelemetryRing:
+    """Lock-free single-producer/single-consumer ring buffer of float rows"""
+
+    def __init__(self, capacity=4096, fields=TELEMETRY_FIELDS):
+        self.fields = fields
+        self.capacity = capacity
+        self.data = np.zeros((capacity, len(fields)), dtype=np.float64)
+        self.write_index = 0  # Rows ever written (advanced by the producer only)
+        self.read_index = 0   # Rows ever read (advanced by the consumer only)
+
+    def push(self, row):
+        """Append one row (producer side)"""
+        self.data[self.write_index % self.capacity] = row
+        self.write_index += 1  # Publish the row only once it is fully written
+
+    def drain(self):
+        """Return all rows written since the last drain (consumer side)"""
+        end = self.write_index
+        start = max(self.read_index, end - self.capacity)
+        if start >= end:
+            return self.data[:0].copy()
+        rows = self.data[np.arange(start, end) % self.capacity]
+
+        # Rows the producer overwrote while we were copying are unreliable,
+        # and so is the one in the slot it writes next
+        overwritten = self.write_index - self.capacity - start + 1
+        if overwritten > 0:
+            rows = rows[overwritten:]
+        self.read_index = end
+        return rows
+
+    def clear(self):
+        self.read_index = self.write_index
+
+
+class TelemetrySampler(QObject):
+    """Drains a TelemetryRing at a fixed rate in the UI thread"""
+    # Emits an (N, len(fields)) array with every row since the last sample
+    batch_ready = pyqtSignal(object)
+
+    def __init__(self, ring, hz=10, parent=None):
+        super().__init__(parent)
+        self.ring = ring
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.sample)
+        self.set_rate(hz)
+
+    def set_rate(self, hz):
+        """Change how many times per second the UI is updated"""
+        self.timer.start(max(1, int(1000 / hz)))
+
+    def sample(self):
+        rows = self.ring.drain()
+        if len(rows):
+            self.batch_ready.emit(rows)
+
+    def stop(self):
+        self.timer.stop()
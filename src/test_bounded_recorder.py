@@ -0,0 +1,142 @@
+"""BoundedTickRecorder: exact aggregates, reservoir sample, rollups and spill files"""
+import numpy as np
+import pytest
+
+from src.bounded_recorder import VALUE_COLUMNS, BoundedTickRecorder, load_rollup
+from src.tick_buffer import LIGHT_PHASES
+
+
+def make_ticks(count, seed=0):
+    """Random tick rows as columns (tick, phase, then the VALUE_COLUMNS)"""
+    rng = np.random.default_rng(seed)
+    return {
+        'tick': np.arange(count),
+        'light_phase': rng.integers(0, len(LIGHT_PHASES), count),
+        'waiting_count': rng.integers(0, 40, count),
+        'moving_count': rng.integers(0, 40, count),
+        'arrived_count': np.cumsum(rng.integers(0, 2, count)),
+        'avg_satisfaction': rng.uniform(0, 10, count),
+        'light_changes': np.cumsum(rng.integers(0, 2, count)),
+    }
+
+
+def record(recorder, ticks):
+    for row in zip(*(ticks[name].tolist() for name in ticks)):
+        recorder.append(*row)
+
+
+def test_aggregates_match_numpy():
+    ticks = make_ticks(12345)  # Not a multiple of the block size: some ticks stay staged
+    recorder = BoundedTickRecorder(reservoir_size=64)
+    record(recorder, ticks)
+    aggregates = recorder.aggregates()
+    assert len(recorder) == 12345
+    for name in VALUE_COLUMNS:
+        values = ticks[name].astype(float)
+        assert aggregates['mean'][name] == pytest.approx(values.mean())
+        assert aggregates['std'][name] == pytest.approx(np.std(values))
+        assert aggregates['min'][name] == values.min()
+        assert aggregates['max'][name] == values.max()
+    np.testing.assert_array_equal(recorder.phase_counts,
+                                  np.bincount(ticks['light_phase'], minlength=len(LIGHT_PHASES)))
+
+
+def test_aggregates_leave_staged_ticks_alone():
+    ticks = make_ticks(25)
+    recorder = BoundedTickRecorder(reservoir_size=64)
+    record(recorder, ticks)
+    first = recorder.aggregates()
+    assert recorder.aggregates() == first
+    assert first['mean']['waiting_count'] == pytest.approx(ticks['waiting_count'].mean())
+
+
+def test_reservoir_keeps_real_rows_in_tick_order():
+    ticks = make_ticks(5000)
+    recorder = BoundedTickRecorder(reservoir_size=100, seed=1)
+    record(recorder, ticks)
+    sample = recorder.snapshot()
+    assert len(sample['tick']) == 100
+    assert len(np.unique(sample['tick'])) == 100
+    assert np.all(np.diff(sample['tick']) > 0)
+    for name in ('light_phase', 'waiting_count', 'moving_count', 'light_changes'):
+        np.testing.assert_array_equal(sample[name], ticks[name][sample['tick']])
+    np.testing.assert_allclose(sample['avg_satisfaction'], ticks['avg_satisfaction'][sample['tick']])
+
+
+def test_short_episode_keeps_every_tick():
+    ticks = make_ticks(30)
+    recorder = BoundedTickRecorder(reservoir_size=100)
+    record(recorder, ticks)
+    np.testing.assert_array_equal(recorder.snapshot()['tick'], ticks['tick'])
+
+
+def test_reservoir_sample_is_uniform():
+    # Every tick should be kept with probability reservoir_size / ticks,
+    # whether it came early or late in the episode
+    ticks, kept, trials = 2000, 100, 300
+    rows = make_ticks(ticks)
+    counts = np.zeros(ticks)
+    for seed in range(trials):
+        recorder = BoundedTickRecorder(reservoir_size=kept, seed=seed)
+        record(recorder, rows)
+        counts[recorder.snapshot()['tick']] += 1
+    expected = trials * kept / ticks
+    quarters = counts.reshape(4, -1).mean(axis=1)
+    np.testing.assert_allclose(quarters, expected, rtol=0.1)
+
+
+def test_rollups_cover_every_tick(tmp_path):
+    ticks = make_ticks(12345)
+    recorder = BoundedTickRecorder(reservoir_size=64, rollup_capacity=2048, spill_dir=str(tmp_path))
+    record(recorder, ticks)
+    recorder.clear()
+    for window in recorder.windows:
+        rows = load_rollup(str(tmp_path), 0, window)
+        assert len(rows) == -(-12345 // window)
+        assert rows['count'].sum() == 12345
+        np.testing.assert_array_equal(rows['tick'], np.arange(0, 12345, window))
+
+    rows = load_rollup(str(tmp_path), 0, 10)
+    waiting = ticks['waiting_count'].astype(float)
+    np.testing.assert_allclose(rows['waiting_count_mean'][:-1], waiting[:12340].reshape(-1, 10).mean(axis=1),
+                               rtol=1e-6)
+    assert rows['waiting_count_mean'][-1] == pytest.approx(waiting[12340:].mean())
+    assert rows['waiting_count_max'][-1] == waiting[12340:].max()
+
+
+def test_history_includes_spilled_rows(tmp_path):
+    ticks = make_ticks(5000)
+    recorder = BoundedTickRecorder(reservoir_size=64, rollup_capacity=16, spill_dir=str(tmp_path))
+    record(recorder, ticks)
+    assert recorder.rollups[10].spilled > 0
+    assert len(recorder.rollups[10].recent()) <= 16
+    history = recorder.rollup(10)
+    np.testing.assert_array_equal(history['tick'], np.arange(0, 5000, 10))
+
+
+def test_without_spill_dir_old_rows_are_dropped():
+    recorder = BoundedTickRecorder(reservoir_size=64, rollup_capacity=16)
+    record(recorder, make_ticks(5000))
+    history = recorder.rollup(10)
+    assert 0 < len(history) <= 16
+    assert history['tick'][-1] == 4990
+
+
+def test_episodes_spill_to_their_own_files(tmp_path):
+    recorder = BoundedTickRecorder(reservoir_size=64, spill_dir=str(tmp_path))
+    record(recorder, make_ticks(300))
+    recorder.clear()
+    record(recorder, make_ticks(500))
+    recorder.clear()
+    assert load_rollup(str(tmp_path), 0, 10)['count'].sum() == 300
+    assert load_rollup(str(tmp_path), 1, 10)['count'].sum() == 500
+    assert len(recorder) == 0
+
+
+def test_refuses_spill_dir_of_another_run(tmp_path):
+    recorder = BoundedTickRecorder(reservoir_size=64, spill_dir=str(tmp_path))
+    record(recorder, make_ticks(300))
+    recorder.clear()
+    with pytest.raises(FileExistsError):
+        BoundedTickRecorder(spill_dir=str(tmp_path))
+    assert load_rollup(str(tmp_path), 0, 10)['count'].sum() == 300
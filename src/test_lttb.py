@@ -0,0 +1,68 @@
+"""lttb: Largest-Triangle-Three-Buckets downsampling"""
+import numpy as np
+import pytest
+
+from src.learning_plots import lttb
+
+
+def reference_lttb(x, y, threshold):
+    """Straightforward LTTB (Steinarsson 2013), one point per bucket"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    kept = [0]
+    previous = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+        average_x = np.mean(x[next_start:next_end])
+        average_y = np.mean(y[next_start:next_end])
+        areas = [abs((x[previous] - average_x) * (y[j] - y[previous])
+                     - (x[previous] - x[j]) * (average_y - y[previous])) for j in range(start, end)]
+        previous = start + int(np.argmax(areas))
+        kept.append(previous)
+    kept.append(n - 1)
+    return x[kept], y[kept]
+
+
+def test_short_lines_are_unchanged():
+    x, y = np.arange(10), np.arange(10) ** 2
+    out_x, out_y = lttb(x, y, threshold=10)
+    np.testing.assert_array_equal(out_x, x)
+    np.testing.assert_array_equal(out_y, y)
+    out_x, _ = lttb(x, y, threshold=2)
+    assert len(out_x) == 10
+
+
+@pytest.mark.parametrize("n, threshold", [(1000, 100), (1001, 37), (50, 49), (100000, 2000)])
+def test_keeps_threshold_points_of_the_original_line(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(0.1, 1.0, n))
+    y = rng.normal(size=n)
+    out_x, out_y = lttb(x, y, threshold)
+    assert len(out_x) == len(out_y) == threshold
+    assert out_x[0] == x[0] and out_x[-1] == x[-1]
+    assert np.all(np.diff(out_x) > 0)
+    index = np.searchsorted(x, out_x)
+    np.testing.assert_array_equal(x[index], out_x)
+    np.testing.assert_array_equal(y[index], out_y)
+
+
+def test_matches_reference_implementation():
+    rng = np.random.default_rng(0)
+    x = np.arange(3000, dtype=float)
+    y = np.cumsum(rng.normal(size=3000))
+    out_x, out_y = lttb(x, y, 300)
+    expected_x, expected_y = reference_lttb(x, y, 300)
+    np.testing.assert_array_equal(out_x, expected_x)
+    np.testing.assert_array_equal(out_y, expected_y)
+
+
+def test_keeps_spikes():
+    x = np.arange(10000, dtype=float)
+    y = np.zeros(10000)
+    y[1234] = 50.0
+    y[8765] = -50.0
+    _, out_y = lttb(x, y, 100)
+    assert out_y.max() == 50.0
+    assert out_y.min() == -50.0
@@ -0,0 +1,46 @@
+"""SimulationWorker: the worker stops ticking while the RL agent trains"""
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from src.headless import create_headless_simulation
+from src.render_pipeline import SimulationWorker
+
+
+def wait_for_tick_change(simulation, timeout=2.0):
+    tick = simulation.current_tick
+    deadline = time.perf_counter() + timeout
+    while simulation.current_tick == tick and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    return simulation.current_tick != tick
+
+
+def test_only_the_environment_steps_the_simulation_while_training():
+    simulation = create_headless_simulation(seed=1, with_rl_agent=True)
+    simulation.current_fps = 100
+    agent = simulation.rl_agent
+    env = agent.env.envs[0]
+    worker = SimulationWorker(simulation)
+    worker.start()
+    try:
+        assert wait_for_tick_change(simulation)
+
+        agent.is_training = True
+        time.sleep(2 * SimulationWorker.MAX_WAIT)  # Let the worker finish its current batch
+        tick = simulation.current_tick
+        time.sleep(0.3)
+        assert simulation.current_tick == tick
+
+        for step in range(5):
+            env.step(step % 2)
+            assert simulation.current_tick == tick + step + 1
+        time.sleep(0.3)
+        assert simulation.current_tick == tick + 5
+        assert worker.buffer.latest().tick == tick + 5
+
+        agent.is_training = False
+        assert wait_for_tick_change(simulation)
+    finally:
+        worker.stop()
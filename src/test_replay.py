@@ -0,0 +1,70 @@
+"""Replay recording and decoding: record -> ReplayPlayer.frame(i) must give back every frame"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest
+
+from src.headless import create_headless_simulation
+from src.replay import QUANTIZATION, ReplayPlayer, ReplayRecorder
+
+
+def quantized(coords):
+    return (round(coords[0] * QUANTIZATION) / QUANTIZATION, round(coords[1] * QUANTIZATION) / QUANTIZATION)
+
+
+@pytest.fixture(scope="module")
+def recording(tmp_path_factory):
+    """A recorded episode and, per frame, what the simulation looked like"""
+    simulation = create_headless_simulation(seed=3)
+    recorder = ReplayRecorder(str(tmp_path_factory.mktemp("replays")), keyframe_interval=10)
+    recorder.start_episode(simulation)
+    expected = []
+    for _ in range(300):
+        simulation.update_simulation()
+        recorder.capture(simulation, action=simulation.current_tick % 2)
+        expected.append({
+            'tick': simulation.current_tick,
+            'lights': (simulation.ns_light, simulation.ew_light),
+            'vehicles': {vehicle.vehicle_id: (quantized(vehicle.interpolated_position or vehicle.get_current_coords()),
+                                              vehicle.state)
+                         for vehicle in simulation.active_vehicles},
+        })
+    path = recorder.finish()
+    return ReplayPlayer(path), expected
+
+
+def assert_frame(player, expected, index):
+    frame = player.frame(index)
+    assert frame.index == index
+    assert frame.tick == expected[index]['tick']
+    assert (frame.ns_light, frame.ew_light) == expected[index]['lights']
+    assert frame.action == expected[index]['tick'] % 2
+    decoded = {vehicle.vehicle_id: (vehicle.interpolated_position, vehicle.state) for vehicle in frame.vehicles}
+    assert decoded == expected[index]['vehicles']
+
+
+def test_every_frame_decodes_in_order(recording):
+    player, expected = recording
+    assert len(player) == len(expected)
+    assert any(frame['vehicles'] for frame in expected)
+    for index in range(len(player)):
+        assert_frame(player, expected, index)
+
+
+@pytest.mark.parametrize("order", [
+    [0, 10, 49, 51, 150, 200, 299],       # Forward, across keyframes
+    [299, 200, 151, 150, 149, 9, 10, 0],  # Backward, also onto and next to keyframes
+    [55, 54, 55, 56, 45, 65],             # Back and forth inside one keyframe interval
+])
+def test_seeking(recording, order):
+    player, expected = recording
+    for index in order:
+        assert_frame(player, expected, index)
+
+
+def test_seek_clamps_to_the_recording(recording):
+    player, expected = recording
+    assert player.seek(-5) == 0
+    assert player.seek(len(player) + 10) == len(player) - 1
+    assert player.frame_of_tick(expected[42]['tick']) == 42
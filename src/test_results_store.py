@@ -0,0 +1,83 @@
+"""ResultsStore: queries and several processes writing to one database"""
+import multiprocessing
+import sqlite3
+
+import pytest
+
+from src.results_store import ResultsStore
+
+CONFIG = {'learning_rate': 3e-4, 'batch_size': 64, 'n_steps': 2048, 'gamma': 0.99}
+
+
+def write_run(path, name, batches, batch_size):
+    """One training process: register a run and append episodes in batches"""
+    store = ResultsStore(path, timeout=60.0)
+    run_id = store.start_run(name, config=CONFIG)
+    for batch in range(batches):
+        store.add_episodes(run_id, [{'episode': batch * batch_size + i, 'score': float(i), 'seed': batch}
+                                    for i in range(batch_size)])
+    store.close()
+    return run_id
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.db"))
+    yield store
+    store.close()
+
+
+def test_concurrent_writers(tmp_path):
+    path = str(tmp_path / "results.db")
+    ResultsStore(path).close()  # Create the schema once, as the dashboard would
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(4) as pool:
+        run_ids = pool.starmap(write_run, [(path, f"worker_{i}", 25, 20) for i in range(4)])
+
+    store = ResultsStore(path)
+    assert sorted(run_ids) == [1, 2, 3, 4]
+    runs = store.runs()
+    assert len(runs) == 4
+    assert runs['episodes'].tolist() == [500] * 4
+    assert store.query("SELECT COUNT(*) AS n FROM configs")['n'][0] == 1
+    episodes = store.episodes(run_ids=[run_ids[0]])
+    assert episodes['episode'].tolist() == list(range(500))
+    store.close()
+
+
+def test_runs_and_rankings(store):
+    first = store.start_run("ppo", config=CONFIG)
+    second = store.start_run("ppo", config=dict(CONFIG, gamma=0.9))
+    baseline = store.start_run("fixed_time", kind="evaluation")
+    store.add_episodes(first, [{'episode': 0, 'score': 1.0}, {'episode': 1, 'score': 3.0}])
+    store.add_episodes(second, [{'episode': 0, 'score': 10.0}])
+    store.add_episodes(baseline, [{'episode': 0, 'score': 5.0}])
+
+    runs = store.runs(kind="training")
+    assert runs['run_id'].tolist() == [first, second]
+    assert runs['mean_score'].tolist() == [2.0, 10.0]
+
+    assert store.top_episodes(2)['score'].tolist() == [10.0, 5.0]
+    assert store.top_episodes(5, kind="training")['run_id'].tolist() == [second, first, first]
+
+    by_gamma = store.best_by_param('gamma')
+    assert by_gamma['gamma'].tolist() == [0.9, 0.99]
+    assert by_gamma['mean_score'].tolist() == [10.0, 2.0]
+    with pytest.raises(ValueError):
+        store.best_by_param('clip_range')
+
+
+def test_rewriting_an_episode_replaces_it(store):
+    run_id = store.start_run("ppo")
+    store.add_episodes(run_id, [{'episode': 0, 'score': 1.0}])
+    store.add_episodes(run_id, [{'episode': 0, 'score': 2.0}])
+    episodes = store.episodes([run_id])
+    assert episodes['score'].tolist() == [2.0]
+
+
+def test_failed_batch_writes_nothing(store):
+    run_id = store.start_run("ppo")
+    # The second row breaks a constraint after the first one was inserted
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add_episodes(run_id, [{'episode': 0, 'score': 1.0}, {'episode': None, 'score': 2.0}])
+    assert len(store.episodes([run_id])) == 0
@@ -0,0 +1,89 @@
+"""TelemetryRing: ordered, lossless draining and dropping of rows the reader missed"""
+import threading
+
+import numpy as np
+
+from src.telemetry import TELEMETRY_FIELDS, TelemetryRing
+
+
+def row(step):
+    return [step, step * 0.5, step % 7, step % 5, step % 3, step % 2]
+
+
+def test_drain_returns_rows_in_order_once():
+    ring = TelemetryRing(capacity=8)
+    assert ring.drain().shape == (0, len(TELEMETRY_FIELDS))
+    for step in range(5):
+        ring.push(row(step))
+    np.testing.assert_array_equal(ring.drain(), [row(step) for step in range(5)])
+    assert len(ring.drain()) == 0
+
+    ring.push(row(5))
+    np.testing.assert_array_equal(ring.drain(), [row(5)])
+
+
+def test_wraps_around_the_buffer():
+    ring = TelemetryRing(capacity=8)
+    for start in range(0, 40, 6):
+        for step in range(start, start + 6):
+            ring.push(row(step))
+        np.testing.assert_array_equal(ring.drain()[:, 0], np.arange(start, start + 6))
+
+
+def test_slow_reader_gets_the_newest_rows():
+    ring = TelemetryRing(capacity=8)
+    for step in range(20):
+        ring.push(row(step))
+    # The oldest slot is the next one the producer writes, so it is skipped too
+    np.testing.assert_array_equal(ring.drain()[:, 0], np.arange(13, 20))
+
+
+def test_exactly_full_ring_skips_the_slot_being_written():
+    ring = TelemetryRing(capacity=8)
+    for step in range(8):
+        ring.push(row(step))
+    np.testing.assert_array_equal(ring.drain()[:, 0], np.arange(1, 8))
+    ring.push(row(8))
+    np.testing.assert_array_equal(ring.drain(), [row(8)])
+
+
+def test_one_row_short_of_full_keeps_every_row():
+    ring = TelemetryRing(capacity=8)
+    for step in range(7):
+        ring.push(row(step))
+    np.testing.assert_array_equal(ring.drain()[:, 0], np.arange(7))
+
+
+def test_clear_skips_unread_rows():
+    ring = TelemetryRing(capacity=8)
+    for step in range(3):
+        ring.push(row(step))
+    ring.clear()
+    assert len(ring.drain()) == 0
+    ring.push(row(3))
+    np.testing.assert_array_equal(ring.drain(), [row(3)])
+
+
+def test_concurrent_producer_and_consumer():
+    # Large enough that the reader never falls a full ring behind
+    ring = TelemetryRing(capacity=1 << 16)
+    total = 50000
+    done = threading.Event()
+
+    def produce():
+        for step in range(total):
+            ring.push(row(step))
+        done.set()
+
+    drained = []
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while not done.is_set():
+        drained.append(ring.drain())
+    producer.join()
+    drained.append(ring.drain())
+
+    rows = np.concatenate(drained)
+    np.testing.assert_array_equal(rows[:, 0], np.arange(total))
+    # Every row is complete: no column from another step
+    np.testing.assert_array_equal(rows, [row(step) for step in range(total)])
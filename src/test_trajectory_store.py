@@ -0,0 +1,53 @@
+"""Trajectory store: writing, reading back and resuming after a crash"""
+import numpy as np
+
+from src.trajectory_store import INFO_KEYS, TrajectoryReader, TrajectoryWriter
+
+
+def make_batch(count, first_step):
+    steps = np.arange(first_step, first_step + count)
+    return {
+        'obs': np.stack([steps] * 4, axis=1).astype(np.int32),
+        'action': (steps % 2).astype(np.int16),
+        'reward': steps.astype(np.float32),
+        'done': np.zeros(count, dtype=np.uint8),
+        'info': np.zeros((count, len(INFO_KEYS)), dtype=np.float32),
+    }
+
+
+def test_rows_and_episodes_read_back(tmp_path):
+    writer = TrajectoryWriter(str(tmp_path), worker_id="a", chunk_size=64)
+    writer.add_batch(make_batch(100, 0), 100, episode_ends=[(40, 1.0), (100, 2.0)])
+    writer.add_batch(make_batch(50, 100), 50, episode_ends=[(30, 3.0)])
+    writer.close()
+
+    reader = TrajectoryReader(str(tmp_path))
+    assert reader.num_transitions == 150
+    rewards = np.concatenate([batch['reward'] for batch in reader.iter_batches(batch_size=16)])
+    np.testing.assert_array_equal(rewards, np.arange(150))
+    episodes = reader.episodes()
+    assert episodes['start'].tolist() == [0, 40, 100]
+    assert episodes['length'].tolist() == [40, 60, 30]
+    # Episode 1 spans the first two chunks
+    np.testing.assert_array_equal(reader.episode(0, 40, 60)['reward'], np.arange(40, 100))
+
+
+def test_resume_after_a_partial_write(tmp_path):
+    writer = TrajectoryWriter(str(tmp_path), worker_id="a")
+    writer.add_batch(make_batch(20, 0), 20, episode_ends=[(20, 1.0)])
+    writer.close()
+
+    # A crashed run: its index rows reached episodes.bin, its manifest never did
+    crashed = TrajectoryWriter(str(tmp_path), worker_id="a")
+    crashed._write_batch(make_batch(30, 20), 30, [(10, 99.0), (30, 99.0)])
+    crashed._closed = True
+
+    writer = TrajectoryWriter(str(tmp_path), worker_id="a")
+    writer.add_batch(make_batch(15, 20), 15, episode_ends=[(15, 2.0)])
+    writer.close()
+
+    episodes = TrajectoryReader(str(tmp_path)).episodes()
+    assert episodes['episode'].tolist() == [0, 1]
+    assert episodes['return'].tolist() == [1.0, 2.0]
+    assert episodes['start'].tolist() == [0, 20]
+    assert episodes['length'].tolist() == [20, 15]
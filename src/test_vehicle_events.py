@@ -0,0 +1,107 @@
+"""Vehicle lifecycle events and the per-vehicle summaries built from them"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+
+from src.vehicle_events import (ARRIVE, ENTER, EVENT_DTYPE, EXIT, SPAWN, START, STOP, VehicleEventLog, lane_code,
+                                vehicle_summary)
+
+NORTH, EAST = lane_code('north'), lane_code('east')
+INTERSECTION = lane_code('intersection')
+
+
+def make_events(rows):
+    return np.array(rows, dtype=EVENT_DTYPE)
+
+
+EVENTS = make_events([
+    # Vehicle 1: two stops (4 + 2 ticks), arrives at tick 30
+    (0, 1, SPAWN, NORTH), (5, 1, STOP, NORTH), (9, 1, START, NORTH),
+    (12, 1, ENTER, INTERSECTION), (15, 1, EXIT, EAST), (20, 1, STOP, EAST), (22, 1, START, EAST),
+    (30, 1, ARRIVE, EAST),
+    # Vehicle 2: still waiting when the episode ends
+    (3, 2, SPAWN, EAST), (10, 2, STOP, EAST),
+    # Vehicle 3: removed while stopped
+    (4, 3, SPAWN, NORTH), (6, 3, STOP, NORTH), (18, 3, ARRIVE, NORTH),
+])
+
+
+def test_summary_of_finished_and_running_journeys():
+    summary = vehicle_summary(EVENTS, end_tick=40)
+    assert summary.index.tolist() == [1, 2, 3]
+    assert summary.loc[1].to_dict() == {'spawn_lane': NORTH, 'spawn_tick': 0, 'arrive_tick': 30,
+                                        'travel_time': 30, 'stops': 2, 'delay': 6}
+    assert summary.loc[2].to_dict() == {'spawn_lane': EAST, 'spawn_tick': 3, 'arrive_tick': -1,
+                                        'travel_time': -1, 'stops': 1, 'delay': 30}
+    assert summary.loc[3, 'delay'] == 12
+
+
+def test_summary_defaults_to_the_last_event_and_accepts_columns():
+    columns = {name: EVENTS[name] for name in EVENTS.dtype.names}
+    summary = vehicle_summary(columns)
+    assert summary.loc[2, 'delay'] == 30 - 10
+
+
+def test_summary_of_no_events():
+    summary = vehicle_summary(make_events([]))
+    assert len(summary) == 0
+
+
+class FakeVehicle:
+    def __init__(self, vehicle_id, position, state="moving"):
+        self.vehicle_id = vehicle_id
+        self.position = position
+        self.state = state
+
+
+def test_observe_records_changes_and_lane_counts():
+    log = VehicleEventLog(capacity=2)  # Small, so it has to grow
+    car = FakeVehicle(1, 'north')
+    log.observe(0, [car])
+    car.state = "waiting"
+    log.observe(1, [car])
+    car.state, car.position = "moving", 'intersection'
+    log.observe(2, [car])
+    assert log.lane_counts == {'north': 0, 'south': 0, 'east': 0, 'west': 0}
+    car.position = 'east'
+    log.observe(3, [car])
+    assert log.lane_counts['east'] == 1
+    car.state = "arrived"
+    log.observe(4, [], [car])
+    assert log.lane_counts['east'] == 0
+
+    events = log.events()
+    # Position changes are recorded before state changes of the same tick
+    assert events['event'].tolist() == [SPAWN, STOP, ENTER, START, EXIT, ARRIVE]
+    assert events['tick'].tolist() == [0, 1, 2, 2, 3, 4]
+
+
+def test_simulation_stamps_spawns_with_the_tick_vehicles_appear():
+    from src.controllers import make_controller
+    from src.headless import create_headless_simulation
+
+    simulation = create_headless_simulation(seed=5)
+    controller = make_controller("fixed_time")
+    controller.reset()
+    appeared = {}
+    for _ in range(400):
+        simulation.set_traffic_lights(controller.act_single(simulation.get_observation(), simulation.current_tick))
+        tick = simulation.current_tick
+        simulation.update_simulation()
+        for vehicle in simulation.active_vehicles:
+            appeared.setdefault(vehicle.vehicle_id, tick)
+
+    events = simulation.vehicle_events.events()
+    summary = vehicle_summary(events, simulation.current_tick)
+    assert len(appeared) > 0
+    assert summary['spawn_tick'].to_dict() == appeared
+    assert (summary['delay'] <= simulation.current_tick - summary['spawn_tick']).all()
+
+    # The running lane counts agree with the vehicles on the lanes
+    counts = {lane: 0 for lane in ('north', 'south', 'east', 'west')}
+    for vehicle in simulation.active_vehicles:
+        if vehicle.position in counts:
+            counts[vehicle.position] += 1
+    assert simulation.vehicle_events.lane_counts == counts
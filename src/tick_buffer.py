@@ -0,0 +1,116 @@
+"""
+Columnar Tick Buffer
+
+Stores per-tick simulation data as preallocated NumPy columns instead of
+one Python dict per tick. Appending writes a few scalars into arrays that
+double in size when full; episode statistics are single vectorized
+reductions, and DataFrames are built on top of the columns without
+copying them.
+
+Light states are stored as small integer phase codes (see
+light_phase_code) rather than strings.
+"""
+import numpy as np
+import pandas as pd
+
+LIGHT_COLORS = ('red', 'yellow', 'green')
+
+# Every (NS, EW) combination, indexed by phase code
+LIGHT_PHASES = tuple(f"NS:{ns},EW:{ew}" for ns in LIGHT_COLORS for ew in LIGHT_COLORS)
+_PHASE_CODES = {name: code for code, name in enumerate(LIGHT_PHASES)}
+
+# Column name -> dtype
+TICK_COLUMNS = {
+    'tick': np.int64,
+    'light_phase': np.int8,
+    'waiting_count': np.int32,
+    'moving_count': np.int32,
+    'arrived_count': np.int32,
+    'avg_satisfaction': np.float64,
+    'light_changes': np.int32,
+}
+
+
+def light_phase_code(light_state):
+    """Convert "NS:green,EW:red" (or a (ns, ew) tuple) into a phase code"""
+    if isinstance(light_state, tuple):
+        light_state = f"NS:{light_state[0]},EW:{light_state[1]}"
+    return _PHASE_CODES[light_state]
+
+
+def light_phase_name(code):
+    """Convert a phase code back into "NS:<color>,EW:<color>" """
+    return LIGHT_PHASES[code]
+
+
+class TickBuffer:
+    """Growable, preallocated columns with one row per recorded tick"""
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.size = 0
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in TICK_COLUMNS.items()}
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        """Double the capacity of every column"""
+        self.capacity *= 2
+        for name, array in self.columns.items():
+            grown = np.zeros(self.capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.columns[name] = grown
+
+    def append(self, tick, light_phase, waiting_count, moving_count, arrived_count,
+               avg_satisfaction, light_changes):
+        """Add one tick (light_phase is a code from light_phase_code)"""
+        if self.size == self.capacity:
+            self._grow()
+        i = self.size
+        columns = self.columns
+        columns['tick'][i] = tick
+        columns['light_phase'][i] = light_phase
+        columns['waiting_count'][i] = waiting_count
+        columns['moving_count'][i] = moving_count
+        columns['arrived_count'][i] = arrived_count
+        columns['avg_satisfaction'][i] = avg_satisfaction
+        columns['light_changes'][i] = light_changes
+        self.size += 1
+
+    def column(self, name):
+        """View (not a copy) of the filled part of a column"""
+        return self.columns[name][:self.size]
+
+    def aggregates(self):
+        """Mean, min, max and standard deviation of every value column"""
+        names = [name for name in self.columns if name not in ('tick', 'light_phase')]
+        stats = {'mean': np.mean, 'min': np.min, 'max': np.max, 'std': np.std}
+        if not self.size:
+            return {stat: {name: 0.0 for name in names} for stat in stats}
+        return {stat: {name: float(reduce(self.column(name))) for name in names}
+                for stat, reduce in stats.items()}
+
+    def snapshot(self):
+        """Copy of the filled columns, safe to hand to another thread"""
+        return {name: array[:self.size].copy() for name, array in self.columns.items()}
+
+    def clear(self):
+        """Forget all rows but keep the allocated memory for the next episode"""
+        self.size = 0
+
+    def to_dataframe(self):
+        """DataFrame backed by the column arrays (no copy).
+
+        The light phase is exposed as a categorical 'light_state' column
+        whose codes are the stored phase codes.
+        """
+        return columns_to_dataframe({name: self.column(name) for name in self.columns})
+
+
+def columns_to_dataframe(columns):
+    """Build a DataFrame on top of a dict of tick columns without copying them"""
+    data = dict(columns)
+    if 'light_phase' in data:
+        data['light_state'] = pd.Categorical.from_codes(data.pop('light_phase'), categories=LIGHT_PHASES)
+    return pd.DataFrame(data, copy=False)
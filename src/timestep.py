@@ -0,0 +1,54 @@
+"""
+Fixed-Timestep Clock
+
+Decouples the simulation rate from the render rate. Every rendered frame
+adds the elapsed wall-clock time to an accumulator; the simulation then
+runs as many whole ticks as have built up (possibly none, possibly
+several) and the leftover fraction of a tick is used to interpolate
+vehicle positions, so motion stays smooth at any speed.
+
+Example at 20 ticks/s rendered at 60 FPS: one tick every third frame, the
+frames in between are drawn 1/3 and 2/3 of the way to the next state.
+"""
+import time
+
+
+class FixedTimestep:
+    """Turns wall-clock time into a whole number of simulation ticks"""
+
+    def __init__(self, tick_rate=20.0, max_ticks_per_frame=100):
+        """
+        Args:
+            tick_rate: Simulation ticks per second of wall-clock time
+            max_ticks_per_frame: Upper bound per frame; if the simulation
+                cannot keep up, the backlog is dropped instead of growing
+        """
+        self.tick_rate = tick_rate
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.accumulator = 0.0  # Pending simulation time, in ticks
+        self.last_time = None
+
+    def reset(self):
+        """Forget the pending time (after a pause or a turbo run)"""
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def advance(self, now=None):
+        """Number of ticks to run for this frame"""
+        now = time.perf_counter() if now is None else now
+        if self.last_time is not None:
+            self.accumulator += (now - self.last_time) * self.tick_rate
+        self.last_time = now
+
+        ticks = int(self.accumulator)
+        if ticks > self.max_ticks_per_frame:
+            ticks = self.max_ticks_per_frame
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= ticks
+        return ticks
+
+    @property
+    def alpha(self):
+        """How far the display is between the previous and the current tick (0-1)"""
+        return min(self.accumulator, 1.0)
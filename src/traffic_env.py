@@ -1,4 +1,6 @@
 # traffic_env.py
+from contextlib import nullcontext
+
 import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
@@ -45,16 +47,21 @@ class TrafficEnv(gym.Env):
         """
         super().reset(seed=seed)
         
-        # Reset the simulation
-        if self.simulation:
-            self.simulation.reset()
-        
-        # Reset episode tracking
-        self.current_step = 0
-        self.total_reward = 0
-        
-        # Get initial observation
-        return self._get_observation(), {}
+        with self._simulation_lock():
+            # Reset the simulation
+            if self.simulation:
+                self.simulation.reset()
+            
+            # Reset episode tracking
+            self.current_step = 0
+            self.total_reward = 0
+            
+            # Get initial observation
+            return self._get_observation(), {}
+    
+    def _simulation_lock(self):
+        """The simulation's lock, so the display thread never sees a half-done step"""
+        return getattr(self.simulation, 'lock', None) or nullcontext()
     
     def step(self, action):
         """
@@ -70,66 +77,67 @@ class TrafficEnv(gym.Env):
             truncated (bool): Whether the episode was truncated
             info (dict): Additional information
         """
-        if self.simulation:
-            # Apply action and update simulation
-            self.simulation.set_traffic_lights(action)
-            self.simulation.update_simulation()
-            
-            # Calculate base metrics
-            try:
-                avg_commute = self.simulation.get_avg_commute_time()
-                avg_satisfaction = self.simulation.get_avg_satisfaction()
-                waiting_count = sum(1 for v in self.simulation.active_vehicles if v.state == "waiting")
-                moving_count = sum(1 for v in self.simulation.active_vehicles if v.state == "moving")
+        with self._simulation_lock():
+            if self.simulation:
+                # Apply action and update simulation
+                self.simulation.set_traffic_lights(action)
+                self.simulation.update_simulation()
                 
-                # Calculate reward components
-                # 1. Commute time penalty (normalized)
-                commute_penalty = -0.15 * min(avg_commute / 100, 1.0)  # Slightly increased penalty
+                # Calculate base metrics
+                try:
+                    avg_commute = self.simulation.get_avg_commute_time()
+                    avg_satisfaction = self.simulation.get_avg_satisfaction()
+                    waiting_count = sum(1 for v in self.simulation.active_vehicles if v.state == "waiting")
+                    moving_count = sum(1 for v in self.simulation.active_vehicles if v.state == "moving")
+                    
+                    # Calculate reward components
+                    # 1. Commute time penalty (normalized)
+                    commute_penalty = -0.15 * min(avg_commute / 100, 1.0)  # Slightly increased penalty
+                    
+                    # 2. Satisfaction bonus (normalized)
+                    satisfaction_bonus = 0.4 * (avg_satisfaction / 10.0)  # Slightly reduced base bonus
+                    
+                    # 3. Flow bonus (reward for moving vehicles)
+                    flow_bonus = 0.25 * (moving_count / max(1, waiting_count + moving_count))
+                    
+                    # 4. Queue penalty (penalize long queues)
+                    queue_penalty = -0.15 * min(waiting_count / 20, 1.0)  # Reduced penalty
+                    
+                    # 5. Satisfaction threshold bonus (reward for maintaining high satisfaction)
+                    satisfaction_threshold_bonus = 0.05 if avg_satisfaction >= 7.0 else 0.0
+                    
+                    # Combine rewards
+                    reward = commute_penalty + satisfaction_bonus + flow_bonus + queue_penalty + satisfaction_threshold_bonus
+                    
+                    # Additional penalty if vehicles are stuck at episode end
+                    if self.simulation.episode_ended and self.simulation.active_vehicles:
+                        stuck_penalty = -3 * len(self.simulation.active_vehicles)  # Further reduced penalty
+                        reward += stuck_penalty
+                    
+                    observation = self._get_observation()
+                    terminated = self.simulation.episode_ended
+                    truncated = self.current_step >= self.max_steps
+                    
+                    info = {
+                        'avg_satisfaction': avg_satisfaction,
+                        'avg_commute_time': avg_commute,
+                        'stuck_vehicles': len(self.simulation.active_vehicles),
+                        'waiting_count': waiting_count,
+                        'moving_count': moving_count
+                    }
+                except Exception as e:
+                    print(f"Error calculating reward: {str(e)}")
+                    # Provide default values if calculation fails
+                    reward = 0
+                    info = {
+                        'avg_satisfaction': 0,
+                        'avg_commute_time': 0,
+                        'stuck_vehicles': 0,
+                        'waiting_count': 0,
+                        'moving_count': 0
+                    }
                 
-                # 2. Satisfaction bonus (normalized)
-                satisfaction_bonus = 0.4 * (avg_satisfaction / 10.0)  # Slightly reduced base bonus
-                
-                # 3. Flow bonus (reward for moving vehicles)
-                flow_bonus = 0.25 * (moving_count / max(1, waiting_count + moving_count))
-                
-                # 4. Queue penalty (penalize long queues)
-                queue_penalty = -0.15 * min(waiting_count / 20, 1.0)  # Reduced penalty
-                
-                # 5. Satisfaction threshold bonus (reward for maintaining high satisfaction)
-                satisfaction_threshold_bonus = 0.05 if avg_satisfaction >= 7.0 else 0.0
-                
-                # Combine rewards
-                reward = commute_penalty + satisfaction_bonus + flow_bonus + queue_penalty + satisfaction_threshold_bonus
-                
-                # Additional penalty if vehicles are stuck at episode end
-                if self.simulation.episode_ended and self.simulation.active_vehicles:
-                    stuck_penalty = -3 * len(self.simulation.active_vehicles)  # Further reduced penalty
-                    reward += stuck_penalty
-                
-                observation = self._get_observation()
-                terminated = self.simulation.episode_ended
-                truncated = self.current_step >= self.max_steps
-                
-                info = {
-                    'avg_satisfaction': avg_satisfaction,
-                    'avg_commute_time': avg_commute,
-                    'stuck_vehicles': len(self.simulation.active_vehicles),
-                    'waiting_count': waiting_count,
-                    'moving_count': moving_count
-                }
-            except Exception as e:
-                print(f"Error calculating reward: {str(e)}")
-                # Provide default values if calculation fails
-                reward = 0
-                info = {
-                    'avg_satisfaction': 0,
-                    'avg_commute_time': 0,
-                    'stuck_vehicles': 0,
-                    'waiting_count': 0,
-                    'moving_count': 0
-                }
-            
-            return observation, reward, terminated, truncated, info
+                return observation, reward, terminated, truncated, info
     
     def _get_observation(self):
         """Get the current observation state"""
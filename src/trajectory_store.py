@@ -0,0 +1,327 @@
+"""
+On-Disk Trajectory Store for RL Rollouts
+
+Keeps every transition collected during PPO training instead of throwing
+it away after each update, so analysis and offline-RL jobs can use it.
+
+Layout (one directory per rollout worker, so workers never share a file;
+every writing process needs its own worker id):
+    <root>/worker_<id>/manifest.json      - schema and number of valid rows
+    <root>/worker_<id>/<field>_<chunk>.npy - fixed-size, memory-mapped chunks
+    <root>/worker_<id>/episodes.bin        - append-only episode index
+
+Key Components:
+- TrajectoryWriter: Appends transitions from a background thread
+- TrajectoryRecorder: Gym wrapper that streams TrafficEnv transitions to a writer
+- TrajectoryReader: Memory-maps all workers' chunks for reading
+"""
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+
+import gymnasium as gym
+import numpy as np
+
+# Keys of the info dict returned by TrafficEnv.step, stored as float32 columns
+INFO_KEYS = ('avg_satisfaction', 'avg_commute_time', 'stuck_vehicles', 'waiting_count', 'moving_count')
+
+# One row of the episode index
+EPISODE_DTYPE = np.dtype([
+    ('episode', np.int64),
+    ('start', np.int64),   # Index of the first transition (within the worker)
+    ('length', np.int64),
+    ('return', np.float64),
+])
+
+
+def _field_specs(obs_shape, info_keys):
+    """dtype and per-row shape of every stored field"""
+    return {
+        'obs': (np.int32, tuple(obs_shape)),
+        'action': (np.int16, ()),
+        'reward': (np.float32, ()),
+        'done': (np.uint8, ()),
+        'info': (np.float32, (len(info_keys),)),
+    }
+
+
+def _write_json_atomic(path, data):
+    """Write JSON to a temp file and rename it over the target"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class TrajectoryWriter:
+    """Append-only writer for one rollout worker.
+
+    add_batch only puts arrays on a queue; a background thread copies them
+    into memory-mapped chunk files. The queue is bounded so a stalled disk
+    eventually slows the producer down instead of exhausting memory.
+    """
+
+    def __init__(self, root, worker_id=0, obs_shape=(4,), info_keys=INFO_KEYS,
+                 chunk_size=65536, queue_size=256):
+        self.directory = os.path.join(root, f"worker_{worker_id}")
+        os.makedirs(self.directory, exist_ok=True)
+        self.info_keys = tuple(info_keys)
+        self.chunk_size = chunk_size
+        self.specs = _field_specs(obs_shape, self.info_keys)
+
+        # Resume an existing store instead of overwriting it
+        manifest_path = os.path.join(self.directory, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            self.chunk_size = manifest['chunk_size']
+            self.num_rows = manifest['num_rows']
+            self.num_episodes = manifest['num_episodes']
+        else:
+            self.num_rows = 0
+            self.num_episodes = 0
+        self.episode_start = self.num_rows
+
+        # Index rows past the manifest's count were written by a run that
+        # stopped before its next sync; drop them so new rows follow on
+        episodes_path = os.path.join(self.directory, "episodes.bin")
+        valid_size = self.num_episodes * EPISODE_DTYPE.itemsize
+        if os.path.exists(episodes_path) and os.path.getsize(episodes_path) > valid_size:
+            os.truncate(episodes_path, valid_size)
+
+        self._chunk_index = None
+        self._chunk = {}
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="TrajectoryWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add_batch(self, fields, count, episode_ends=()):
+        """Queue `count` transitions for writing.
+
+        Args:
+            fields: Dict of field name -> array with at least `count` rows
+            count: Number of valid rows in the arrays
+            episode_ends: (row offset after the last step, episode return)
+                for every episode that finished inside this batch
+        """
+        self._queue.put(('batch', fields, count, list(episode_ends)))
+
+    def flush(self):
+        """Block until everything queued so far is on disk"""
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        done.wait()
+
+    def close(self):
+        """Flush and stop the writer thread (safe to call twice)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(('stop',))
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            kind = message[0]
+            if kind == 'batch':
+                self._write_batch(*message[1:])
+            elif kind == 'flush':
+                self._sync()
+                message[1].set()
+            elif kind == 'stop':
+                self._sync()
+                return
+
+    def _open_chunk(self, index):
+        """Create (or reopen) the memory-mapped files of one chunk"""
+        self._flush_chunk()
+        self._chunk = {}
+        for name, (dtype, shape) in self.specs.items():
+            path = os.path.join(self.directory, f"{name}_{index:05d}.npy")
+            if os.path.exists(path):
+                self._chunk[name] = np.load(path, mmap_mode='r+')
+            else:
+                self._chunk[name] = np.lib.format.open_memmap(
+                    path, mode='w+', dtype=dtype, shape=(self.chunk_size,) + shape)
+        self._chunk_index = index
+
+    def _flush_chunk(self):
+        for array in self._chunk.values():
+            array.flush()
+
+    def _write_batch(self, fields, count, episode_ends):
+        offset = 0
+        while offset < count:
+            chunk_index, row = divmod(self.num_rows, self.chunk_size)
+            if chunk_index != self._chunk_index:
+                self._open_chunk(chunk_index)
+            n = min(count - offset, self.chunk_size - row)
+            for name in self.specs:
+                self._chunk[name][row:row + n] = fields[name][offset:offset + n]
+            self.num_rows += n
+            offset += n
+
+        # Episode index rows are appended once the episode's data is written
+        if episode_ends:
+            batch_start = self.num_rows - count
+            rows = np.zeros(len(episode_ends), dtype=EPISODE_DTYPE)
+            for i, (end_offset, episode_return) in enumerate(episode_ends):
+                end = batch_start + end_offset
+                rows[i] = (self.num_episodes, self.episode_start, end - self.episode_start, episode_return)
+                self.num_episodes += 1
+                self.episode_start = end
+            with open(os.path.join(self.directory, "episodes.bin"), 'ab') as f:
+                rows.tofile(f)
+
+    def _sync(self):
+        """Flush chunk data, then publish the new row count in the manifest"""
+        self._flush_chunk()
+        _write_json_atomic(os.path.join(self.directory, "manifest.json"), {
+            'chunk_size': self.chunk_size,
+            'num_rows': self.num_rows,
+            'num_episodes': self.num_episodes,
+            'info_keys': list(self.info_keys),
+            'fields': {name: {'dtype': np.dtype(dtype).str, 'shape': list(shape)}
+                       for name, (dtype, shape) in self.specs.items()},
+        })
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    """Records (observation, action, reward, done, info) from TrafficEnv.
+
+    Transitions are staged in small preallocated arrays and handed to the
+    writer thread whole, so the rollout loop only pays for a few array
+    assignments per step.
+    """
+
+    def __init__(self, env, writer, batch_size=1024):
+        super().__init__(env)
+        self.writer = writer
+        self.batch_size = batch_size
+        self._last_obs = None
+        self._episode_return = 0.0
+        self._new_staging()
+
+    def _new_staging(self):
+        self._staging = {name: np.zeros((self.batch_size,) + shape, dtype=dtype)
+                         for name, (dtype, shape) in self.writer.specs.items()}
+        self._count = 0
+        self._episode_ends = []
+
+    def _hand_off(self):
+        if self._count:
+            self.writer.add_batch(self._staging, self._count, self._episode_ends)
+            self._new_staging()
+
+    def reset(self, **kwargs):
+        observation, info = self.env.reset(**kwargs)
+        self._last_obs = observation
+        self._episode_return = 0.0
+        return observation, info
+
+    def step(self, action):
+        observation, reward, terminated, truncated, info = self.env.step(action)
+
+        i = self._count
+        self._staging['obs'][i] = self._last_obs
+        self._staging['action'][i] = int(action)
+        self._staging['reward'][i] = reward
+        self._staging['done'][i] = terminated or truncated
+        self._staging['info'][i] = [info.get(key, 0.0) for key in self.writer.info_keys]
+        self._count += 1
+        self._episode_return += reward
+        self._last_obs = observation
+
+        if terminated or truncated:
+            self._episode_ends.append((self._count, self._episode_return))
+            self._episode_return = 0.0
+        if self._count == self.batch_size:
+            self._hand_off()
+        return observation, reward, terminated, truncated, info
+
+    def flush(self):
+        """Send the partially filled batch and wait until it is on disk"""
+        self._hand_off()
+        self.writer.flush()
+
+    def close(self):
+        self._hand_off()
+        self.writer.close()
+        super().close()
+
+
+class TrajectoryReader:
+    """Reads a trajectory store without loading it into RAM.
+
+    Chunks are opened with np.load(mmap_mode='r'), so only the pages that
+    are actually touched are read from disk.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.workers = []
+        for directory in sorted(glob.glob(os.path.join(root, "worker_*"))):
+            manifest_path = os.path.join(directory, "manifest.json")
+            if not os.path.exists(manifest_path):
+                continue
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            self.workers.append((directory, manifest))
+        self.info_keys = tuple(self.workers[0][1]['info_keys']) if self.workers else INFO_KEYS
+
+    @property
+    def num_transitions(self):
+        return sum(manifest['num_rows'] for _, manifest in self.workers)
+
+    def _chunks(self, directory, manifest):
+        """Yield (start row, dict of memory-mapped arrays) for every chunk"""
+        chunk_size = manifest['chunk_size']
+        for start in range(0, manifest['num_rows'], chunk_size):
+            valid = min(chunk_size, manifest['num_rows'] - start)
+            index = start // chunk_size
+            yield start, {
+                name: np.load(os.path.join(directory, f"{name}_{index:05d}.npy"), mmap_mode='r')[:valid]
+                for name in manifest['fields']
+            }
+
+    def episodes(self):
+        """Episode index of every worker as one structured array"""
+        tables = []
+        for worker, (directory, manifest) in enumerate(self.workers):
+            path = os.path.join(directory, "episodes.bin")
+            if not os.path.exists(path):
+                continue
+            rows = np.fromfile(path, dtype=EPISODE_DTYPE)[:manifest['num_episodes']]
+            table = np.empty(len(rows), dtype=[('worker', np.int32)] + EPISODE_DTYPE.descr)
+            table['worker'] = worker
+            for name in EPISODE_DTYPE.names:
+                table[name] = rows[name]
+            tables.append(table)
+        return np.concatenate(tables) if tables else np.empty(0, dtype=[('worker', np.int32)] + EPISODE_DTYPE.descr)
+
+    def episode(self, worker, start, length):
+        """All fields of one episode (copied, since it may span two chunks)"""
+        directory, manifest = self.workers[worker]
+        end = start + length
+        parts = {}
+        for chunk_start, arrays in self._chunks(directory, manifest):
+            chunk_end = chunk_start + len(arrays['reward'])
+            if chunk_end <= start or chunk_start >= end:
+                continue
+            lo, hi = max(start, chunk_start) - chunk_start, min(end, chunk_end) - chunk_start
+            for name, array in arrays.items():
+                parts.setdefault(name, []).append(array[lo:hi])
+        return {name: np.concatenate(chunks) for name, chunks in parts.items()}
+
+    def iter_batches(self, batch_size=65536):
+        """Stream every transition in fixed-size batches of memory-mapped views"""
+        for directory, manifest in self.workers:
+            for _, arrays in self._chunks(directory, manifest):
+                for lo in range(0, len(arrays['reward']), batch_size):
+                    yield {name: array[lo:lo + batch_size] for name, array in arrays.items()}
@@ -1,7 +1,7 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                            QSlider, QSpinBox, QDoubleSpinBox, QComboBox, 
                            QGroupBox, QPushButton, QRadioButton, QButtonGroup,
-                           QFrame, QLCDNumber, QGridLayout)
+                           QFrame, QLCDNumber, QGridLayout, QCheckBox)
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 
@@ -14,6 +14,7 @@ class ControlPanel(QWidget):
     traffic_mode_changed = pyqtSignal(str)
     simulation_mode_changed = pyqtSignal(str)  # New signal for simulation mode
     speed_changed = pyqtSignal(int)  # New signal for simulation speed
+    turbo_changed = pyqtSignal(bool)  # Run ticks back to back, drawing only occasionally
     training_steps_changed = pyqtSignal(int)  # New signal for training steps
     
     def __init__(self, parent=None):
@@ -69,7 +70,7 @@ class ControlPanel(QWidget):
         
         # Speed Slider
         speed_slider_layout = QHBoxLayout()
-        speed_slider_label = QLabel("Speed (FPS):")
+        speed_slider_label = QLabel("Speed (ticks/s):")
         self.speed_slider = QSlider(Qt.Horizontal)
         self.speed_slider.setRange(1, 60)
         self.speed_slider.setValue(30)
@@ -82,10 +83,17 @@ class ControlPanel(QWidget):
         speed_slider_layout.addWidget(self.speed_value_label)
         speed_layout.addLayout(speed_slider_layout)
         
-        speed_desc = QLabel("Adjust how fast the simulation runs (1-60 frames per second)")
+        speed_desc = QLabel("Adjust how fast the simulation runs (1-60 ticks per second, "
+                            "keys 1-4 multiply it). Drawing runs at its own frame rate.")
+        speed_desc.setWordWrap(True)
         speed_desc.setStyleSheet("color: #666; font-size: 10pt;")
         speed_layout.addWidget(speed_desc)
         
+        # Turbo mode
+        self.turbo_checkbox = QCheckBox("Turbo (simulate at full speed, skip most frames)")
+        self.turbo_checkbox.toggled.connect(self.turbo_changed.emit)
+        speed_layout.addWidget(self.turbo_checkbox)
+        
         speed_group.setLayout(speed_layout)
         layout.addWidget(speed_group)
         
@@ -4,12 +4,20 @@ from .control_panel import ControlPanel
 from .visualization_panel import VisualizationPanel
 from .metrics_panel import MetricsPanel
 from src.rl_agent import TrafficRLAgent
+from src.telemetry import TelemetrySampler
+from src.results_store import ResultsStore
+from src.config import TELEMETRY_UI_HZ
 
 class MainWindow(QMainWindow):
     def __init__(self, simulation_interface):
         super().__init__()
         self.simulation_interface = simulation_interface
-        self.rl_agent = TrafficRLAgent(simulation_interface)
+        self.simulation_worker = None  # Set when the simulation runs on its own thread
+        # Train the agent whose policy drives the lights in RL mode (and
+        # whose training stops the SimulationWorker from ticking)
+        if getattr(simulation_interface, 'rl_agent', None) is None:
+            simulation_interface.rl_agent = TrafficRLAgent(simulation_interface)
+        self.rl_agent = simulation_interface.rl_agent
         self.init_ui()
         
     def init_ui(self):
@@ -55,6 +63,7 @@ class MainWindow(QMainWindow):
         self.control_panel.traffic_mode_changed.connect(self.update_traffic_mode)
         self.control_panel.simulation_mode_changed.connect(self.update_simulation_mode)
         self.control_panel.speed_changed.connect(self.update_simulation_speed)
+        self.control_panel.turbo_changed.connect(self.update_turbo_mode)
         self.control_panel.training_steps_changed.connect(self.update_training_steps)
         
         self.control_panel.start_button.clicked.connect(self.start_training)
@@ -70,6 +79,10 @@ class MainWindow(QMainWindow):
                 self.visualization_panel.update_reward_plot
             )
         
+        # Sample training telemetry at a fixed rate instead of on every step
+        self.telemetry_sampler = TelemetrySampler(self.rl_agent.telemetry, hz=TELEMETRY_UI_HZ, parent=self)
+        self.telemetry_sampler.batch_ready.connect(self.visualization_panel.update_from_telemetry)
+        
         # Set initial button states
         self.update_button_states()
         
@@ -78,46 +91,88 @@ class MainWindow(QMainWindow):
         self.update_timer.timeout.connect(self.update_simulation_display)
         self.update_timer.start(100)  # Update every 100ms
         
+        # Recorded results come from the results database; a query every
+        # few seconds is enough since episodes arrive in batches
+        self.results_store = None
+        self.results_timer = QTimer(self)
+        self.results_timer.timeout.connect(self.update_results_display)
+        self.results_timer.start(5000)
+        
         # Note: We don't call show() or raise_() here because it's handled in main.py
         # This allows the window to be shown at the appropriate time
         
+    def set_simulation_worker(self, worker):
+        """Run simulation changes on the worker's thread and read its snapshots
+        (see src.render_pipeline)"""
+        self.simulation_worker = worker
+    
+    def call_simulation(self, function, *args, wait=False):
+        """Run function(*args) on the thread that owns the simulation
+        (with wait=True, return only once it has run)"""
+        if self.simulation_worker is None:
+            function(*args)
+        elif wait:
+            self.simulation_worker.call_sync(function, *args)
+        else:
+            self.simulation_worker.call(function, *args)
+    
+    def get_simulation_status(self):
+        """(tick, ns_light, ew_light, episode_ended, status) of the current state"""
+        if self.simulation_worker is not None:
+            snapshot = self.simulation_worker.buffer.latest()
+            if snapshot is None:
+                return None
+            return snapshot.tick, snapshot.ns_light, snapshot.ew_light, snapshot.episode_ended, snapshot.status
+        simulation = self.simulation_interface
+        return (simulation.current_tick, simulation.ns_light, simulation.ew_light, simulation.episode_ended,
+                simulation.get_dashboard_status())
+        
     def update_simulation_display(self):
         """Update UI elements with current simulation state"""
         if self.simulation_interface:
-            # Update statistics
-            waiting_count = sum(1 for v in self.simulation_interface.active_vehicles if v.state == "waiting")
-            moving_count = sum(1 for v in self.simulation_interface.active_vehicles if v.state == "moving")
-            arrived_count = len(self.simulation_interface.removed_vehicles)
-            avg_satisfaction = self.simulation_interface.get_avg_satisfaction()
-            episode = getattr(self.simulation_interface.data_recorder, 'current_episode', 0) if hasattr(self.simulation_interface, 'data_recorder') else 0
-            tick = self.simulation_interface.current_tick
+            current = self.get_simulation_status()
+            if current is None:
+                return
+            tick, ns_light, ew_light, episode_ended, status = current
             
             # Update control panel stats
-            self.control_panel.update_stats(waiting_count, moving_count, arrived_count, avg_satisfaction, episode, tick)
+            self.control_panel.update_stats(status['waiting_count'], status['moving_count'], status['arrived_count'],
+                                            status['avg_satisfaction'], status['episode'], tick)
             
             # Update light states
-            self.control_panel.update_light_states(self.simulation_interface.ns_light, self.simulation_interface.ew_light)
+            self.control_panel.update_light_states(ns_light, ew_light)
             
-            # Update metrics using simulation interface methods
-            metrics_data = self.simulation_interface.get_metrics()
-            self.metrics_panel.update_metrics(metrics_data)
+            # Update metrics
+            self.metrics_panel.update_metrics(status['metrics'])
             
             # Update tutorial message if in tutorial mode
-            if self.simulation_interface.tutorial_mode and self.simulation_interface.tutorial_step < len(self.simulation_interface.tutorial_messages):
-                message = self.simulation_interface.tutorial_messages[self.simulation_interface.tutorial_step]
-                self.control_panel.set_status_message(message)
+            if status['tutorial_message'] is not None:
+                self.control_panel.set_status_message(status['tutorial_message'])
             # Update episode state message if needed
-            elif self.simulation_interface.episode_ended:
+            elif episode_ended:
                 self.control_panel.set_status_message("Episode Ended - Press N to start new episode")
             # Update training progress message if needed
-            elif self.simulation_interface.training_in_progress:
-                self.control_panel.set_status_message(f"Training in progress: {self.simulation_interface.current_training_steps} steps")
+            elif status['training_in_progress']:
+                self.control_panel.set_status_message(f"Training in progress: {status['current_training_steps']} steps")
             else:
                 self.control_panel.set_status_message("")
         
+    def update_results_display(self):
+        """Refresh the recorded runs and top episodes from the results database"""
+        recorder = getattr(self.simulation_interface, 'data_recorder', None)
+        db_path = getattr(recorder, 'results_db', None)
+        if not db_path:
+            return
+        try:
+            if self.results_store is None:
+                self.results_store = ResultsStore(db_path)
+            self.metrics_panel.update_results(self.results_store.runs(), self.results_store.top_episodes(5))
+        except Exception as e:
+            print(f"Error reading results database: {e}")
+        
     def update_button_states(self):
         """Update button states based on training status and simulation mode"""
-        is_training = self.simulation_interface.training_in_progress
+        is_training = self.rl_agent.is_training
         current_mode = self.control_panel.get_simulation_mode()
         
         # Only enable RL controls in RL mode
@@ -154,23 +209,23 @@ class MainWindow(QMainWindow):
         
     def update_traffic_mode(self, mode):
         """Update the traffic generation mode"""
-        self.simulation_interface.set_traffic_mode(mode)
+        self.call_simulation(self.simulation_interface.set_traffic_mode, mode)
         
     def update_simulation_mode(self, mode):
         """Update the simulation mode"""
         try:
             # Stop any ongoing training
-            if self.simulation_interface.training_in_progress:
-                self.simulation_interface.rl_agent.stop_training()
+            if self.rl_agent.is_training:
+                self.rl_agent.stop_training()
             
             # Reset the simulation
-            self.simulation_interface.reset()
+            self.call_simulation(self.simulation_interface.reset)
             
             # Clear visualizations
             self.visualization_panel.clear_plots()
             
             # Set the new mode
-            self.simulation_interface.set_mode(mode)
+            self.call_simulation(self.simulation_interface.set_mode, mode)
             
             # Update button states
             self.update_button_states()
@@ -198,9 +253,14 @@ class MainWindow(QMainWindow):
             traceback.print_exc()
         
     def update_simulation_speed(self, value):
-        """Update the simulation speed (FPS)"""
+        """Update the simulation speed (ticks per second)"""
         if self.simulation_interface:
-            self.simulation_interface.current_fps = value
+            self.call_simulation(setattr, self.simulation_interface, 'current_fps', value)
+    
+    def update_turbo_mode(self, enabled):
+        """Switch turbo mode (full-speed simulation, occasional frames) on or off"""
+        if self.simulation_interface and hasattr(self.simulation_interface, 'set_turbo'):
+            self.call_simulation(self.simulation_interface.set_turbo, enabled)
     
     def update_training_steps(self, value):
         """Update the number of training steps"""
@@ -211,11 +271,13 @@ class MainWindow(QMainWindow):
     def start_training(self):
         """Start the RL agent training"""
         try:
-            # Reset the environment
-            self.simulation_interface.reset()
+            # Reset the environment before the training thread starts
+            # stepping it, so the reset can't land inside the first rollout
+            self.call_simulation(self.simulation_interface.reset, wait=True)
             
             # Clear previous visualizations
             self.visualization_panel.clear_plots()
+            self.rl_agent.telemetry.clear()
             
             # Start training
             self.rl_agent.train()
@@ -235,7 +297,7 @@ class MainWindow(QMainWindow):
     def reset_simulation(self):
         """Reset the simulation and visualization"""
         try:
-            self.simulation_interface.reset()
+            self.call_simulation(self.simulation_interface.reset)
             self.visualization_panel.clear_plots()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to reset simulation: {str(e)}")
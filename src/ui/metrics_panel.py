@@ -61,6 +61,27 @@ class MetricsPanel(QWidget):
         metrics_group.setLayout(metrics_layout)
         container_layout.addWidget(metrics_group)
         
+        # Results Section (filled from the results database)
+        results_group = QGroupBox("Recorded Results")
+        results_layout = QVBoxLayout()
+        
+        self.results_summary_label = QLabel("No episodes recorded yet")
+        self.results_summary_label.setFont(QFont("Arial", 10))
+        self.results_summary_label.setWordWrap(True)
+        results_layout.addWidget(self.results_summary_label)
+        
+        top_title = QLabel("Top Episodes")
+        top_title.setFont(QFont("Arial", 10, QFont.Bold))
+        results_layout.addWidget(top_title)
+        
+        self.top_episodes_label = QLabel("-")
+        self.top_episodes_label.setFont(QFont("Arial", 10))
+        self.top_episodes_label.setWordWrap(True)
+        results_layout.addWidget(self.top_episodes_label)
+        
+        results_group.setLayout(results_layout)
+        container_layout.addWidget(results_group)
+        
         # Educational Information Section
         edu_group = QGroupBox("Traffic Management Guide")
         edu_layout = QVBoxLayout()
@@ -196,4 +217,19 @@ class MetricsPanel(QWidget):
                 else:
                     formatted_value = str(value)
                 
-                self.metric_labels[metric_id].setText(formatted_value) 
\ No newline at end of file
+                self.metric_labels[metric_id].setText(formatted_value) 
+    
+    def update_results(self, runs, top_episodes):
+        """Show the recorded runs and best episodes (DataFrames from ResultsStore)"""
+        if runs.empty:
+            self.results_summary_label.setText("No episodes recorded yet")
+        else:
+            total = int(runs['episodes'].sum())
+            self.results_summary_label.setText(f"{len(runs)} runs, {total} episodes recorded")
+        
+        if top_episodes.empty:
+            self.top_episodes_label.setText("-")
+        else:
+            lines = [f"{row.name} #{row.run_id} ep {row.episode}: {row.score:.1f}"
+                     for row in top_episodes.itertuples()]
+            self.top_episodes_label.setText("\n".join(lines))
\ No newline at end of file
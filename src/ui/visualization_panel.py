@@ -1,112 +1,224 @@
+from collections import deque
 from PyQt5.QtWidgets import QWidget, QVBoxLayout
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import numpy as np
 
+from src.config import PLOT_MAX_FPS
+
+DIRECTIONS = ('north', 'south', 'east', 'west')
+
 class VisualizationPanel(QWidget):
-    def __init__(self, parent=None):
+    """Traffic and reward plots.
+
+    Axes, titles, labels, legends and grids are set up once; updates only
+    change the data of persistent Line2D objects. Updates are coalesced and
+    the canvas is redrawn at most max_fps times per second: the lines are
+    blitted onto a saved copy of the axes background, and a full redraw
+    only happens when the axis limits have to grow or the window changes.
+    """
+
+    def __init__(self, parent=None, max_fps=PLOT_MAX_FPS):
         super().__init__(parent)
+        self.max_fps = max_fps
         self.init_ui()
-        
+
     def init_ui(self):
         layout = QVBoxLayout()
-        
-        # Create figure with subplots
-        plt.style.use('seaborn')  # Use a better style
+
+        # Create figure with subplots ('seaborn' was renamed in matplotlib 3.6)
+        plt.style.use('seaborn' if 'seaborn' in plt.style.available else 'seaborn-v0_8')
         self.figure, (self.ax1, self.ax2) = plt.subplots(2, 1, figsize=(8, 10))
         self.canvas = FigureCanvas(self.figure)
         layout.addWidget(self.canvas)
-        
-        # Initialize data storage
-        self.traffic_data = {
-            'north': [],
-            'south': [],
-            'east': [],
-            'west': []
-        }
-        self.reward_history = []
-        self.steps = []
-        
+
+        # Initialize data storage (fixed-size: old points fall off the front)
+        self.max_points = 100
+        self.traffic_data = {direction: deque(maxlen=self.max_points) for direction in DIRECTIONS}
+        self.reward_history = deque(maxlen=self.max_points)
+        self.steps = deque(maxlen=self.max_points)
+
+        # Persistent artists; animated lines are left out of full redraws
+        # and drawn on top of the saved backgrounds instead
+        self.traffic_lines = {}
+        for direction in DIRECTIONS:
+            self.traffic_lines[direction], = self.ax1.plot([], [], label=direction.capitalize(), animated=True)
+        self.ax1.set_title('Traffic Flow by Direction')
+        self.ax1.set_xlabel('Time Steps')
+        self.ax1.set_ylabel('Number of Vehicles')
+        # The legend is drawn after the lines so they never cover it
+        self.legend = self.ax1.legend(loc='upper left', frameon=True)
+        self.legend.set_animated(True)
+        self.ax1.grid(True)
+
+        self.reward_line, = self.ax2.plot([], [], animated=True)
+        self.ax2.set_title('Agent Performance')
+        self.ax2.set_xlabel('Time Steps')
+        self.ax2.set_ylabel('Reward')
+        self.ax2.grid(True)
+
+        self.episode_text = self.ax1.text(0.5, 0.5, 'Episode Ended',
+                                          horizontalalignment='center',
+                                          verticalalignment='center',
+                                          transform=self.ax1.transAxes,
+                                          visible=False)
+        self._reset_limits()
+
+        # Axes backgrounds, saved after every full redraw (also on resize)
+        self._backgrounds = None
+        self._needs_full_redraw = True
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+        # Updates only mark the plots dirty; this timer redraws them
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.setInterval(int(1000 / max(self.max_fps, 1)))
+        self.redraw_timer.timeout.connect(self._redraw)
+
         self.setLayout(layout)
-        
+
+    def _reset_limits(self):
+        self.ax1.set_xlim(0, self.max_points - 1)
+        self.ax1.set_ylim(0, 5)
+        self.ax2.set_xlim(0, 10)
+        self.ax2.set_ylim(-1, 1)
+        self._reward_limits_set = False
+
+    def _update_limits(self):
+        """Grow the axis limits to fit the data.
+
+        Limits change in steps with some headroom, so most redraws can
+        blit the lines instead of redrawing the axes.
+
+        Returns:
+            Whether any limit changed
+        """
+        changed = False
+
+        # Traffic: x is the sample index (fixed), y only grows
+        top = max((max(counts) for counts in self.traffic_data.values() if counts), default=0)
+        if top > self.ax1.get_ylim()[1]:
+            self.ax1.set_ylim(0, max(5, int(np.ceil(top * 1.25))))
+            changed = True
+
+        # Reward: the step window scrolls, the reward range grows
+        if self.steps:
+            first, last = self.steps[0], self.steps[-1]
+            left, right = self.ax2.get_xlim()
+            if not self._reward_limits_set or last > right or first - left > (right - left) / 2:
+                self.ax2.set_xlim(first, last + max((last - first) * 0.5, 10))
+                changed = True
+            low, high = min(self.reward_history), max(self.reward_history)
+            bottom, top = self.ax2.get_ylim()
+            if not self._reward_limits_set or low < bottom or high > top:
+                margin = max((high - low) * 0.25, 1.0)
+                self.ax2.set_ylim(low - margin, high + margin)
+                changed = True
+            self._reward_limits_set = True
+        return changed
+
+    def _schedule_redraw(self):
+        """Redraw once the rate limit allows; later updates join this redraw"""
+        if self.episode_text.get_visible():
+            self.episode_text.set_visible(False)
+            self._needs_full_redraw = True
+        if not self.redraw_timer.isActive():
+            self.redraw_timer.start()
+
+    def _on_draw(self, event):
+        """Save the freshly drawn backgrounds and put the lines on top"""
+        self._backgrounds = [self.canvas.copy_from_bbox(ax.bbox) for ax in (self.ax1, self.ax2)]
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for line in self.traffic_lines.values():
+            self.ax1.draw_artist(line)
+        self.ax1.draw_artist(self.legend)
+        self.ax2.draw_artist(self.reward_line)
+
+    def _redraw(self):
+        try:
+            for direction, line in self.traffic_lines.items():
+                counts = self.traffic_data[direction]
+                line.set_data(np.arange(len(counts)), counts)
+            self.reward_line.set_data(self.steps, self.reward_history)
+
+            if self._update_limits() or self._needs_full_redraw or self._backgrounds is None:
+                # Axes changed: redraw everything (_on_draw saves the new backgrounds)
+                self._needs_full_redraw = False
+                self.canvas.draw()
+            else:
+                for background in self._backgrounds:
+                    self.canvas.restore_region(background)
+                self._draw_lines()
+                self.canvas.blit(self.ax1.bbox)
+                self.canvas.blit(self.ax2.bbox)
+        except Exception as e:
+            print(f"Error redrawing plots: {e}")
+            import traceback
+            traceback.print_exc()
+
     def update_traffic_plot(self, traffic_counts):
         """Update the traffic pattern visualization"""
         try:
             # Update data storage
             for direction, count in traffic_counts.items():
                 self.traffic_data[direction].append(count)
-            
-            # Keep only last 100 points for better visualization
-            max_points = 100
-            for direction in self.traffic_data:
-                self.traffic_data[direction] = self.traffic_data[direction][-max_points:]
-            
-            # Clear and redraw plot
-            self.ax1.clear()
-            
-            # Plot traffic counts for each direction
-            for direction, counts in self.traffic_data.items():
-                if counts:  # Only plot if we have data
-                    self.ax1.plot(counts, label=direction.capitalize())
-            
-            self.ax1.set_title('Traffic Flow by Direction')
-            self.ax1.set_xlabel('Time Steps')
-            self.ax1.set_ylabel('Number of Vehicles')
-            self.ax1.legend()
-            self.ax1.grid(True)
-            
-            # Force redraw
-            self.canvas.draw_idle()
+            self._schedule_redraw()
         except Exception as e:
             print(f"Error updating traffic plot: {e}")
             import traceback
             traceback.print_exc()
-        
+
     def update_reward_plot(self, step, reward):
         """Update the reward history visualization"""
         try:
             # Update data storage
             self.steps.append(step)
             self.reward_history.append(reward)
-            
-            # Keep only last 100 points for better visualization
-            max_points = 100
-            self.steps = self.steps[-max_points:]
-            self.reward_history = self.reward_history[-max_points:]
-            
-            # Clear and redraw plot
-            self.ax2.clear()
-            self.ax2.plot(self.steps, self.reward_history)
-            self.ax2.set_title('Agent Performance')
-            self.ax2.set_xlabel('Time Steps')
-            self.ax2.set_ylabel('Reward')
-            self.ax2.grid(True)
-            
-            # Force redraw
-            self.canvas.draw_idle()
+            self._schedule_redraw()
         except Exception as e:
             print(f"Error updating reward plot: {e}")
             import traceback
             traceback.print_exc()
-        
+
+    def update_from_telemetry(self, rows):
+        """Add a batch of training telemetry rows and redraw once.
+
+        Args:
+            rows: Array with columns (step, reward, north, south, east, west),
+                as emitted by TelemetrySampler.batch_ready
+        """
+        try:
+            rows = rows[-self.max_points:]
+
+            # Update data storage
+            for column, direction in enumerate(DIRECTIONS, start=2):
+                self.traffic_data[direction].extend(rows[:, column].tolist())
+            self.steps.extend(rows[:, 0].astype(int).tolist())
+            self.reward_history.extend(rows[:, 1].tolist())
+            self._schedule_redraw()
+        except Exception as e:
+            print(f"Error updating plots from telemetry: {e}")
+            import traceback
+            traceback.print_exc()
+
     def clear_plots(self):
         """Clear all visualization data"""
         try:
-            self.traffic_data = {direction: [] for direction in self.traffic_data}
-            self.reward_history = []
-            self.steps = []
-            self.ax1.clear()
-            self.ax2.clear()
-            self.canvas.draw_idle()
-            
+            for counts in self.traffic_data.values():
+                counts.clear()
+            self.reward_history.clear()
+            self.steps.clear()
+            self._reset_limits()
+
             # Add a message indicating episode end
-            self.ax1.text(0.5, 0.5, 'Episode Ended', 
-                         horizontalalignment='center',
-                         verticalalignment='center',
-                         transform=self.ax1.transAxes)
-            self.canvas.draw_idle()
+            self.episode_text.set_visible(True)
+            self._needs_full_redraw = True
+            if not self.redraw_timer.isActive():
+                self.redraw_timer.start()
         except Exception as e:
             print(f"Error clearing plots: {e}")
             import traceback
-            traceback.print_exc() 
\ No newline at end of file
+            traceback.print_exc()
@@ -0,0 +1,201 @@
+"""
+Vehicle Lifecycle Event Log
+
+Records what every vehicle does during an episode as a compact stream of
+events in a preallocated NumPy structured array:
+
+    tick | vehicle_id | event | lane
+
+Events:
+- spawn: Vehicle appeared on its start lane
+- stop: Vehicle started waiting (red light or queue)
+- start: Vehicle moved again after waiting
+- enter: Vehicle entered the intersection
+- exit: Vehicle left the intersection
+- arrive: Vehicle reached its destination and was removed
+
+The simulation calls observe() once per tick after moving the vehicles.
+It compares each vehicle with the state it had on the previous tick, so
+the tick loop only pays for a dict lookup per vehicle. The same
+comparison keeps a running count of vehicles per lane (lane_counts), so
+reading it never scans the vehicles. Per-vehicle delay,
+stop counts and travel times are computed afterwards with vectorized
+group-bys (see vehicle_summary).
+"""
+import numpy as np
+import pandas as pd
+
+SPAWN, STOP, START, ENTER, EXIT, ARRIVE = range(6)
+EVENT_NAMES = ('spawn', 'stop', 'start', 'enter', 'exit', 'arrive')
+
+# Lane codes: the four approach lanes, the intersection, and the
+# intermediate waypoints between them
+LANE_NAMES = ('north', 'south', 'east', 'west', 'intersection', 'intermediate')
+_LANE_CODES = {name: code for code, name in enumerate(LANE_NAMES)}
+INTERMEDIATE_LANE = _LANE_CODES['intermediate']
+
+EVENT_DTYPE = np.dtype([
+    ('tick', np.int32),
+    ('vehicle_id', np.int32),
+    ('event', np.int8),
+    ('lane', np.int8),
+])
+
+
+def lane_code(position):
+    """Lane code of a vehicle position (named position or waypoint tuple)"""
+    return _LANE_CODES.get(position, INTERMEDIATE_LANE) if isinstance(position, str) else INTERMEDIATE_LANE
+
+
+class VehicleEventLog:
+    """Growable, preallocated structured array of vehicle events"""
+
+    def __init__(self, capacity=4096):
+        self.data = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.size = 0
+        self._last_seen = {}  # vehicle_id -> (state, position) on the previous tick
+        self._lane_counts = [0] * len(LANE_NAMES)  # Active vehicles per lane code
+
+    def __len__(self):
+        return self.size
+
+    def record(self, tick, vehicle_id, event, lane):
+        if self.size == len(self.data):
+            grown = np.zeros(len(self.data) * 2, dtype=EVENT_DTYPE)
+            grown[:self.size] = self.data
+            self.data = grown
+        self.data[self.size] = (tick, vehicle_id, event, lane)
+        self.size += 1
+
+    def observe(self, tick, active_vehicles, removed_vehicles=()):
+        """Emit events for everything that changed since the previous tick.
+
+        Args:
+            tick: Current simulation tick
+            active_vehicles: Vehicles still in the simulation
+            removed_vehicles: Vehicles removed during this tick
+        """
+        last_seen = self._last_seen
+        for vehicle in active_vehicles:
+            vehicle_id = vehicle.vehicle_id
+            state, position = vehicle.state, vehicle.position
+            previous = last_seen.get(vehicle_id)
+            if previous is None:
+                self.record(tick, vehicle_id, SPAWN, lane_code(position))
+                self._lane_counts[lane_code(position)] += 1
+                if state == "waiting":
+                    self.record(tick, vehicle_id, STOP, lane_code(position))
+            elif previous != (state, position):
+                self._record_changes(tick, vehicle_id, previous, state, position)
+                if previous[1] != position:
+                    self._lane_counts[lane_code(previous[1])] -= 1
+                    self._lane_counts[lane_code(position)] += 1
+            last_seen[vehicle_id] = (state, position)
+
+        for vehicle in removed_vehicles:
+            previous = last_seen.pop(vehicle.vehicle_id, None)
+            if previous is not None:
+                self._lane_counts[lane_code(previous[1])] -= 1
+                self._record_changes(tick, vehicle.vehicle_id, previous, "moving", vehicle.position)
+            if vehicle.state == "arrived":
+                self.record(tick, vehicle.vehicle_id, ARRIVE, lane_code(vehicle.position))
+
+    def _record_changes(self, tick, vehicle_id, previous, state, position):
+        previous_state, previous_position = previous
+        lane = lane_code(position)
+        if previous_position != position:
+            if position == 'intersection':
+                self.record(tick, vehicle_id, ENTER, lane)
+            elif previous_position == 'intersection':
+                self.record(tick, vehicle_id, EXIT, lane)
+        if previous_state != "waiting" and state == "waiting":
+            self.record(tick, vehicle_id, STOP, lane)
+        elif previous_state == "waiting" and state != "waiting":
+            self.record(tick, vehicle_id, START, lane)
+
+    @property
+    def lane_counts(self):
+        """Vehicles on each approach lane as of the last observe()"""
+        return {name: self._lane_counts[_LANE_CODES[name]] for name in ('north', 'south', 'east', 'west')}
+
+    def events(self):
+        """View (not a copy) of the recorded events"""
+        return self.data[:self.size]
+
+    def snapshot(self):
+        """Copy of the events as a dict of columns (for archiving)"""
+        events = self.events()
+        return {name: events[name].copy() for name in EVENT_DTYPE.names}
+
+    def clear(self):
+        """Start a new episode, keeping the allocated memory"""
+        self.size = 0
+        self._last_seen.clear()
+        self._lane_counts = [0] * len(LANE_NAMES)
+
+
+def vehicle_summary(events, end_tick=None):
+    """Per-vehicle journey statistics from an event array.
+
+    Args:
+        events: Structured array with EVENT_DTYPE fields (or dict of columns)
+        end_tick: Tick used to close journeys still running (defaults to the last event)
+
+    Returns:
+        DataFrame indexed by vehicle_id with spawn_lane, spawn_tick,
+        arrive_tick (-1 if not arrived), travel_time, stops and delay
+        (ticks spent waiting)
+    """
+    ticks = np.asarray(events['tick'], dtype=np.int64)
+    kinds = np.asarray(events['event'])
+    lanes = np.asarray(events['lane'])
+    ids, group = np.unique(np.asarray(events['vehicle_id']), return_inverse=True)
+    n = len(ids)
+    if end_tick is None:
+        end_tick = int(ticks.max()) if len(ticks) else 0
+
+    def first_tick(kind):
+        """Tick of the first `kind` event per vehicle (-1 if none)"""
+        result = np.full(n, np.iinfo(np.int64).max)
+        mask = kinds == kind
+        np.minimum.at(result, group[mask], ticks[mask])
+        result[result == np.iinfo(np.int64).max] = -1
+        return result
+
+    def count(kind):
+        return np.bincount(group[kinds == kind], minlength=n)
+
+    def tick_sum(kind):
+        mask = kinds == kind
+        return np.bincount(group[mask], weights=ticks[mask], minlength=n)
+
+    spawn_tick = first_tick(SPAWN)
+    arrive_tick = first_tick(ARRIVE)
+    spawn_lane = np.full(n, -1, dtype=np.int64)
+    spawn_mask = kinds == SPAWN
+    spawn_lane[group[spawn_mask]] = lanes[spawn_mask]
+
+    # Every stop is closed by a start, or by the end of the journey
+    stops = count(STOP)
+    still_waiting = stops - count(START)
+    journey_end = np.where(arrive_tick >= 0, arrive_tick, end_tick)
+    delay = tick_sum(START) - tick_sum(STOP) + still_waiting * journey_end
+
+    travel_time = np.where((arrive_tick >= 0) & (spawn_tick >= 0), arrive_tick - spawn_tick, -1)
+
+    return pd.DataFrame({
+        'spawn_lane': spawn_lane,
+        'spawn_tick': spawn_tick,
+        'arrive_tick': arrive_tick,
+        'travel_time': travel_time,
+        'stops': stops,
+        'delay': delay.astype(np.int64),
+    }, index=pd.Index(ids, name='vehicle_id'))
+
+
+def event_counts(events):
+    """Number of events of every kind per lane (DataFrame lanes x events)"""
+    lanes = np.asarray(events['lane'], dtype=np.int64)
+    kinds = np.asarray(events['event'], dtype=np.int64)
+    counts = np.bincount(lanes * len(EVENT_NAMES) + kinds, minlength=len(LANE_NAMES) * len(EVENT_NAMES))
+    return pd.DataFrame(counts.reshape(len(LANE_NAMES), len(EVENT_NAMES)), index=LANE_NAMES, columns=EVENT_NAMES)
@@ -1,16 +1,23 @@
+import math
 import pygame
 import random
+from collections import OrderedDict
 from src.config import *
 from src.collision import get_vehicle_position, get_vehicle_direction
 from src.shared import get_screen
 
-def draw_buildings(buildings):
-    """Draw buildings in the city"""
-    screen = get_screen()
+def draw_buildings(buildings, surface=None):
+    """Draw buildings in the city (onto the screen unless a surface is given)"""
+    screen = surface if surface is not None else get_screen()
     for x, y, width, height, color in buildings:
         # Ensure color values are valid integers
         building_color = tuple(max(0, min(255, int(c))) for c in color)
         
+        # Windows and roof come from a generator seeded by the building itself,
+        # so a building always looks the same (and the simulation's random
+        # stream is left alone)
+        rng = random.Random(hash((x, y, width, height)))
+        
         # Building body
         pygame.draw.rect(screen, building_color, (x, y, width, height))
         
@@ -20,24 +27,28 @@ def draw_buildings(buildings):
         for wx in range(x + 10, x + width - 10, window_gap):
             for wy in range(y + 10, y + height - 10, window_gap):
                 # Only draw some windows (random pattern)
-                if random.random() > 0.3:  # 70% chance to draw a window
+                if rng.random() > 0.3:  # 70% chance to draw a window
                     pygame.draw.rect(screen, (200, 230, 255), (wx, wy, window_size, window_size))
         
         # Roof
-        roof_height = random.randint(5, 15)
+        roof_height = rng.randint(5, 15)
         # Calculate roof color by darkening the building color
         roof_color = tuple(max(0, min(255, int(c - 30))) for c in building_color)
         
-        if random.random() > 0.5:  # 50% chance for a different roof style
+        if rng.random() > 0.5:  # 50% chance for a different roof style
             # Flat roof with edge
             pygame.draw.rect(screen, roof_color, (x, y - roof_height, width, roof_height))
         else:
             # Pitched roof
             pygame.draw.polygon(screen, roof_color, [(x, y), (x + width, y), (x + width//2, y - roof_height)])
 
-def draw_road():
-    """Draw the road with lanes and markings"""
-    screen = get_screen()
+def draw_road(surface=None):
+    """Draw the road with lanes and markings (onto the screen unless a surface is given)"""
+    screen = surface if surface is not None else get_screen()
+    
+    # Textures come from their own generator, so they look the same every
+    # run and drawing never changes the simulation's random sequence
+    rng = random.Random(0)
     
     # Create static grass texture if it doesn't exist
     if not hasattr(draw_road, 'grass_surface'):
@@ -46,7 +57,7 @@ def draw_road():
         # Add subtle texture variations
         for y in range(0, HEIGHT, 20):
             for x in range(0, WIDTH, 20):
-                variation = random.randint(-10, 10)
+                variation = rng.randint(-10, 10)
                 grass_color = (34 + variation, 139 + variation, 34 + variation)
                 pygame.draw.rect(draw_road.grass_surface, grass_color, (x, y, 20, 20))
     
@@ -62,15 +73,15 @@ def draw_road():
         # Add static asphalt texture
         for i in range(2000):
             # Horizontal road texture
-            x = random.randint(0, WIDTH-1)
-            y = random.randint(0, ROAD_WIDTH-1)
-            color_var = random.randint(-10, 10)
+            x = rng.randint(0, WIDTH-1)
+            y = rng.randint(0, ROAD_WIDTH-1)
+            color_var = rng.randint(-10, 10)
             pygame.draw.circle(draw_road.road_h, (128 + color_var, 128 + color_var, 128 + color_var), (x, y), 1)
             
             # Vertical road texture
-            x = random.randint(0, ROAD_WIDTH-1)
-            y = random.randint(0, HEIGHT-1)
-            color_var = random.randint(-10, 10)
+            x = rng.randint(0, ROAD_WIDTH-1)
+            y = rng.randint(0, HEIGHT-1)
+            color_var = rng.randint(-10, 10)
             pygame.draw.circle(draw_road.road_v, (128 + color_var, 128 + color_var, 128 + color_var), (x, y), 1)
     
     # Draw the static textures
@@ -142,9 +153,56 @@ def draw_road():
                                            crosswalk_length, crosswalk_width))
         pygame.draw.rect(screen, WHITE, (WIDTH//2 - ROAD_WIDTH//2 - crosswalk_length, y, crosswalk_length, crosswalk_width))
 
-def draw_traffic_lights(ns_light, ew_light):
+class BackgroundLayer:
+    """The static scene (buildings, grass, road, markings, crosswalks) drawn once.
+
+    Everything in it is the same on every frame, so it is composed into
+    one surface and blitted instead of being redrawn with hundreds of
+    draw calls. The surface is rebuilt when the screen size or the
+    buildings change.
+    """
+    
+    def __init__(self):
+        self.surface = None
+        self.key = None
+    
+    def invalidate(self):
+        """Force a rebuild on the next draw (e.g. after a map change)"""
+        self.key = None
+    
+    def get(self, buildings, size):
+        """Cached background for these buildings and screen size"""
+        key = (size, tuple(buildings))
+        if key != self.key:
+            self.surface = self._build(buildings, size)
+            self.key = key
+        return self.surface
+    
+    @staticmethod
+    def _build(buildings, size):
+        surface = pygame.Surface(size)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()  # Match the display format for fast blits
+        surface.fill(WHITE)
+        draw_buildings(buildings, surface)
+        draw_road(surface)
+        return surface
+    
+    def draw(self, buildings, surface=None):
+        """Blit the background over the whole screen"""
+        screen = surface if surface is not None else get_screen()
+        screen.blit(self.get(buildings, screen.get_size()), (0, 0))
+
+
+background_layer = BackgroundLayer()
+
+def draw_background(buildings):
+    """Draw the cached static scene (replaces fill + draw_buildings + draw_road)"""
+    background_layer.draw(buildings)
+
+def draw_traffic_lights(ns_light, ew_light, surface=None):
     """Draw traffic lights on all four sides of the intersection"""
-    screen = get_screen()
+    screen = surface if surface is not None else get_screen()
     
     def draw_light_housing(x, y, width, height, vertical=True):
         """Helper function to draw a traffic light housing with 3D effect"""
@@ -221,76 +279,460 @@ def draw_traffic_lights(ns_light, ew_light):
     draw_light(pole_x + 32, center_y, YELLOW, ew_light == "yellow")
     draw_light(pole_x + 49, center_y, GREEN, ew_light == "green")
 
-def draw_vehicle(vehicle, debug_mode=False):
-    """Draw a vehicle on the screen"""
-    screen = get_screen()
-    
-    # Get vehicle position
+def get_vehicle_draw_position(vehicle):
+    """Screen position of a vehicle, or None if it cannot be determined"""
     if hasattr(vehicle, 'interpolated_position') and vehicle.interpolated_position is not None:
-        x, y = vehicle.interpolated_position
-    else:
-        # Fall back to edge positions if no interpolation
-        if vehicle.position == 'north':
-            x, y = WIDTH//2, 0
-        elif vehicle.position == 'south':
-            x, y = WIDTH//2, HEIGHT
-        elif vehicle.position == 'east':
-            x, y = WIDTH, HEIGHT//2
-        elif vehicle.position == 'west':
-            x, y = 0, HEIGHT//2
-        elif vehicle.position == 'intersection':
-            # Use the previous position if at intersection
-            current_idx = vehicle.route.index(vehicle.position)
-            if current_idx > 0 and isinstance(vehicle.route[current_idx - 1], tuple):
-                x, y = vehicle.route[current_idx - 1]
-            else:
-                return  # Skip drawing if position cannot be determined
-        elif isinstance(vehicle.position, tuple):
-            x, y = vehicle.position
-        else:
-            return  # Skip drawing if position cannot be determined
-    
-    # Get vehicle direction
-    direction = get_vehicle_direction(vehicle)
-    
-    # Determine vehicle color based on type
+        return vehicle.interpolated_position
+    
+    # Fall back to edge positions if no interpolation
+    if vehicle.position == 'north':
+        return WIDTH//2, 0
+    elif vehicle.position == 'south':
+        return WIDTH//2, HEIGHT
+    elif vehicle.position == 'east':
+        return WIDTH, HEIGHT//2
+    elif vehicle.position == 'west':
+        return 0, HEIGHT//2
+    elif vehicle.position == 'intersection':
+        # Use the previous position if at intersection
+        current_idx = vehicle.route.index(vehicle.position)
+        if current_idx > 0 and isinstance(vehicle.route[current_idx - 1], tuple):
+            return vehicle.route[current_idx - 1]
+        return None
+    elif isinstance(vehicle.position, tuple):
+        return vehicle.position
+    return None
+
+def ensure_vehicle_color(vehicle):
+    """Determine vehicle color based on type"""
     if not hasattr(vehicle, 'color') or vehicle.color is None:
+        # Seeded by the vehicle, not the simulation's random sequence
+        rng = random.Random(vehicle.vehicle_id)
         if vehicle.vehicle_type == "car":
-            vehicle.color = random.choice([(255, 0, 0), (0, 0, 255), (0, 255, 0), (255, 165, 0), (128, 0, 128)])
+            vehicle.color = rng.choice([(255, 0, 0), (0, 0, 255), (0, 255, 0), (255, 165, 0), (128, 0, 128)])
         elif vehicle.vehicle_type == "truck":
-            vehicle.color = random.choice([(192, 192, 192), (139, 69, 19), (47, 79, 79)])
+            vehicle.color = rng.choice([(192, 192, 192), (139, 69, 19), (47, 79, 79)])
         else:  # van
-            vehicle.color = random.choice([(255, 255, 255), (255, 215, 0), (70, 130, 180)])
+            vehicle.color = rng.choice([(255, 255, 255), (255, 215, 0), (70, 130, 180)])
+
+class _SpriteSpec:
+    """Stands in for a vehicle when draw_car renders a sprite"""
+    __slots__ = ('vehicle_type', 'size_multiplier')
     
-    # Draw the vehicle
-    draw_car((x, y), vehicle.color, direction, vehicle)
+    def __init__(self, vehicle_type, size_multiplier):
+        self.vehicle_type = vehicle_type
+        self.size_multiplier = size_multiplier
+
+class VehicleSpriteCache:
+    """Pre-rendered vehicle sprites, one per (type, size, color, direction).
+    
+    draw_car needs 25-40 draw calls per vehicle; a sprite is rendered with
+    it once and then every frame costs a single blit. Vehicle colors are
+    random, so sprites are created on first use and the least recently
+    used ones are dropped once max_sprites is reached.
+    """
+    # Transparent color of the sprites. Colorkey (rather than per-pixel
+    # alpha) sprites look exactly like draw_car's output on the screen,
+    # which ignores the alpha values some of its colors carry.
+    COLORKEY = (255, 0, 255)
+    MARGIN = 8  # Room around the body for wheels, shadow and headlight glow
+    
+    def __init__(self, max_sprites=1024):
+        self.max_sprites = max_sprites
+        self.sprites = OrderedDict()
+    
+    def get(self, vehicle_type, size_multiplier, color, direction, scale=1.0):
+        """Returns (sprite, offset, bounds): offset is the vehicle center in the
+        sprite, bounds the rectangle of the sprite that is actually drawn.
+        scale enlarges or shrinks the vehicle (camera zoom)."""
+        key = (vehicle_type, size_multiplier, tuple(color), direction, scale)
+        entry = self.sprites.get(key)
+        if entry is None:
+            if scale == 1.0:
+                entry = self._render(vehicle_type, size_multiplier, color, direction)
+            else:
+                entry = self._scale(self.get(vehicle_type, size_multiplier, color, direction), scale)
+            self.sprites[key] = entry
+            if len(self.sprites) > self.max_sprites:
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(key)
+        return entry
+    
+    def _render(self, vehicle_type, size_multiplier, color, direction):
+        # Square sprite: draw_car places the wheels of horizontal vehicles
+        # along the long side, outside the body rectangle
+        side = math.ceil(24 * size_multiplier) + 2 * self.MARGIN
+        center = (side // 2, side // 2)
+        sprite = pygame.Surface((side, side))
+        sprite.fill(self.COLORKEY)
+        draw_car(center, color, direction, _SpriteSpec(vehicle_type, size_multiplier), surface=sprite)
+        sprite.set_colorkey(self.COLORKEY, pygame.RLEACCEL)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert()  # Match the display format for fast blits
+        return sprite, center, sprite.get_bounding_rect()
+    
+    @staticmethod
+    def _scale(entry, scale):
+        """A full-size sprite resized for a camera zoom"""
+        sprite, (center_x, center_y), bounds = entry
+        side = max(1, round(sprite.get_width() * scale))
+        resized = pygame.transform.scale(sprite, (side, side))
+        resized.set_colorkey(VehicleSpriteCache.COLORKEY, pygame.RLEACCEL)
+        return resized, (round(center_x * scale), round(center_y * scale)), resized.get_bounding_rect()
+    
+    def clear(self):
+        self.sprites.clear()
+
+
+vehicle_sprites = VehicleSpriteCache()
+
+class TextCache:
+    """Fonts and rendered text surfaces, reused across frames.
+    
+    Creating a pygame Font loads and parses the font file, and rendering
+    rasterizes every glyph, so doing either per vehicle per frame is what
+    made debug mode slow. Fonts are kept per size; rendered strings (and
+    the translucent label backgrounds) are kept in an LRU cache.
+    """
+    
+    def __init__(self, max_surfaces=1024):
+        self.max_surfaces = max_surfaces
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+    
+    def font(self, size):
+        """The default font at a given size"""
+        font = self.fonts.get(size)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+    
+    def _cached(self, key, create):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = create()
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_surfaces:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+    
+    def render(self, text, size, color, background=None):
+        """Antialiased text surface (like Font.render), rendered once per string"""
+        color = tuple(color)
+        background = tuple(background) if background is not None else None
+        return self._cached(('text', text, size, color, background),
+                            lambda: self.font(size).render(text, True, color, background))
+    
+    def backdrop(self, size, color=BLACK, alpha=160):
+        """Translucent rectangle to put behind text"""
+        def create():
+            surface = pygame.Surface(size)
+            surface.fill(color)
+            surface.set_alpha(alpha)
+            return surface
+        return self._cached(('backdrop', tuple(size), tuple(color), alpha), create)
+    
+    def clear(self):
+        self.surfaces.clear()
+
+
+text_cache = TextCache()
+
+def _vehicle_blit(vehicle, direction, position=None, scale=1.0):
+    """(sprite, destination, (x, y), screen rect) for one vehicle, or None if it has no position"""
+    if position is None:
+        position = get_vehicle_draw_position(vehicle)
+    if position is None:
+        return None
+    x, y = position
+    if direction is None:
+        direction = get_vehicle_direction(vehicle)
+    ensure_vehicle_color(vehicle)
+    sprite, (offset_x, offset_y), bounds = vehicle_sprites.get(vehicle.vehicle_type, vehicle.size_multiplier,
+                                                               vehicle.color, direction, scale)
+    destination = (int(x - offset_x), int(y - offset_y))
+    return sprite, destination, (x, y), bounds.move(destination)
+
+def draw_vehicles(vehicles, debug_mode=False, directions=None, positions=None, camera=None):
+    """Draw many vehicles with a single Surface.blits call.
+    
+    Only vehicles that overlap the screen are drawn. With a zoomed-out
+    camera (below Camera.DETAIL_ZOOM) vehicles are plain rectangles in
+    their color instead of sprites.
+    
+    Args:
+        directions: Optional precomputed direction per vehicle
+        positions: Optional world position per vehicle (e.g. interpolated
+            between ticks) instead of its own
+        camera: Optional Camera (see src.camera); None draws world
+            coordinates unchanged
+    
+    Returns:
+        Screen rectangles covered by the vehicles
+    """
+    screen = get_screen()
+    viewport = screen.get_rect()
+    if directions is None:
+        directions = [None] * len(vehicles)
+    if positions is None:
+        positions = [None] * len(vehicles)
+    if camera is not None and camera.is_default:
+        camera = None
+    if camera is not None and not camera.detailed:
+        return _draw_vehicle_boxes(screen, vehicles, directions, positions, camera)
+    
+    # Sprites are rendered per zoom step, so a smooth zoom doesn't fill the cache
+    scale = round(camera.zoom * 20) / 20 if camera is not None else 1.0
+    if camera is not None:
+        # Visible world area with room for the largest vehicle, so most
+        # off-screen vehicles are skipped before any per-vehicle work
+        reach = 18 + VehicleSpriteCache.MARGIN
+        visible = camera.visible_world_rect().inflate(2 * reach, 2 * reach)
+        left, top, right, bottom = visible.left, visible.top, visible.right, visible.bottom
+    blits = []
+    labels = []
+    rects = []
+    for vehicle, direction, position in zip(vehicles, directions, positions):
+        if camera is not None:
+            if position is None:
+                position = get_vehicle_draw_position(vehicle)
+                if position is None:
+                    continue
+            x, y = position
+            if x < left or y < top or x > right or y > bottom:
+                continue
+            position = camera.world_to_screen(position)
+        blit = _vehicle_blit(vehicle, direction, position, scale)
+        if blit is not None:
+            sprite, destination, center, rect = blit
+            if not rect.colliderect(viewport):
+                continue  # Off screen
+            blits.append((sprite, destination))
+            labels.append((vehicle, center))
+            rects.append(rect)
+    screen.blits(blits, doreturn=False)
     
-    # Draw vehicle ID with better visibility
     if debug_mode:
-        # Create a background for the ID
-        font = pygame.font.Font(None, 24)  # Larger font size
-        id_text = str(id(vehicle) % 1000)  # Keep last 3 digits of ID
-        text_surface = font.render(id_text, True, WHITE)
-        text_rect = text_surface.get_rect()
-        text_rect.center = (x, y)
+        for vehicle, (x, y) in labels:
+            rects.append(_draw_vehicle_id(screen, vehicle, x, y))
+    return rects
+
+def _draw_vehicle_boxes(screen, vehicles, directions, positions, camera):
+    """Low level of detail: every visible vehicle as a filled rectangle"""
+    viewport = screen.get_rect()
+    zoom = camera.zoom
+    # world_to_screen as a multiply-add, hoisted out of the loop
+    offset_x, offset_y = camera.world_to_screen((0, 0))
+    fill = screen.fill
+    rects = []
+    for vehicle, direction, position in zip(vehicles, directions, positions):
+        if position is None:
+            position = get_vehicle_draw_position(vehicle)
+            if position is None:
+                continue
+        if direction is None:
+            direction = get_vehicle_direction(vehicle)
+        ensure_vehicle_color(vehicle)
+        # Body size as in draw_car
+        length = max(2, int(24 * vehicle.size_multiplier * zoom))
+        width = max(2, int(14 * vehicle.size_multiplier * zoom))
+        if direction in ('up', 'down'):
+            length, width = width, length
+        rect = pygame.Rect(int(position[0] * zoom + offset_x) - length // 2,
+                           int(position[1] * zoom + offset_y) - width // 2, length, width)
+        if rect.colliderect(viewport):
+            fill(vehicle.color, rect)
+            rects.append(rect)
+    return rects
+
+_traffic_light_bounds = None
+
+def traffic_light_bounds():
+    """Screen rectangle covering both traffic light assemblies in any state"""
+    global _traffic_light_bounds
+    if _traffic_light_bounds is None:
+        # Draw every light lit onto a blank surface and measure what was touched
+        probe = pygame.Surface((WIDTH, HEIGHT))
+        probe.fill(VehicleSpriteCache.COLORKEY)
+        probe.set_colorkey(VehicleSpriteCache.COLORKEY)
+        for light in ("red", "yellow", "green"):
+            draw_traffic_lights(light, light, surface=probe)
+        _traffic_light_bounds = probe.get_bounding_rect()
+    return _traffic_light_bounds
+
+class CameraView:
+    """The background and traffic lights as seen through a camera.
+    
+    The static scene is cropped from the cached background layer and
+    scaled to the screen once per camera position, so at any zoom level
+    buildings and the road cost one blit per frame. Traffic light
+    assemblies are pre-drawn once per light state and scaled the same way.
+    """
+    
+    BORDER_COLOR = (40, 40, 40)  # Outside the world
+    
+    def __init__(self):
+        self.surface = None
+        self.source = None  # Background layer surface the view was built from
+        self.state = None   # Camera state the view was built for
+        self.lights = {}    # (ns_light, ew_light) -> light assemblies at world scale
+    
+    def background(self, background, camera):
+        """Screen-size view of the background layer"""
+        if background is not self.source or camera.state != self.state:
+            self.surface = self._build(background, camera)
+            self.source = background
+            self.state = camera.state
+        return self.surface
+    
+    @staticmethod
+    def _build(background, camera):
+        view = pygame.Surface(camera.viewport_size)
+        if pygame.display.get_surface() is not None:
+            view = view.convert()
+        view.fill(CameraView.BORDER_COLOR)
+        visible = camera.visible_world_rect().clip(background.get_rect())
+        if visible.width and visible.height:
+            target = camera.world_rect_to_screen(visible)
+            crop = background.subsurface(visible)
+            scale = pygame.transform.smoothscale if camera.zoom < 1 else pygame.transform.scale
+            view.blit(scale(crop, target.size), target)
+        return view
+    
+    def draw_traffic_lights(self, ns_light, ew_light, camera, surface=None):
+        """Draw the traffic lights through the camera, returning their screen rectangle"""
+        screen = surface if surface is not None else get_screen()
+        bounds = traffic_light_bounds()
+        sprite = self.lights.get((ns_light, ew_light))
+        if sprite is None:
+            # The assemblies are drawn at their world position on a blank
+            # surface, then the area they cover is cut out
+            canvas = pygame.Surface((WIDTH, HEIGHT))
+            canvas.fill(VehicleSpriteCache.COLORKEY)
+            draw_traffic_lights(ns_light, ew_light, surface=canvas)
+            sprite = canvas.subsurface(bounds).copy()
+            sprite.set_colorkey(VehicleSpriteCache.COLORKEY)
+            self.lights[(ns_light, ew_light)] = sprite
+        target = camera.world_rect_to_screen(bounds)
+        screen.blit(pygame.transform.scale(sprite, target.size), target)
+        return target
+
+
+camera_view = CameraView()
+
+class DirtyRectRenderer:
+    """Draws frames by repairing only the parts of the screen that changed.
+    
+    Apart from the vehicles and the traffic light heads the scene is the
+    cached background layer. Each frame restores the rectangles the
+    vehicles covered on the previous frame from the background, redraws the
+    lights only if they changed (or a vehicle overlapped them), draws the
+    vehicles and pushes just those rectangles with pygame.display.update.
+    
+    In debug mode the static debug geometry is part of the background
+    (see DebugLayer) and only the labels are redrawn with the vehicles.
+    Frames with other overlays are drawn in full, and so is the frame
+    after them, because overlays can cover any part of the screen.
+    """
+    
+    def __init__(self):
+        self.previous_rects = None   # None: the next frame is drawn in full
+        self.previous_lights = None
+        self.background = None
+        self.camera_state = None
+    
+    def invalidate(self):
+        """Draw the next frame in full (e.g. after something else drew on the screen)"""
+        self.previous_rects = None
+    
+    def draw(self, buildings, ns_light, ew_light, vehicles, debug_mode=False, overlay=None, positions=None,
+             directions=None, camera=None, lane_counts=None):
+        """Draw and display one frame.
         
-        # Draw a semi-transparent background for better readability
-        padding = 2
-        background_rect = pygame.Rect(text_rect.x - padding,
-                                    text_rect.y - padding,
-                                    text_rect.width + padding * 2,
-                                    text_rect.height + padding * 2)
-        background_surface = pygame.Surface((background_rect.width, background_rect.height))
-        background_surface.fill(BLACK)
-        background_surface.set_alpha(160)  # Semi-transparent background
-        screen.blit(background_surface, background_rect)
+        Args:
+            overlay: Optional function called after the scene is drawn
+            positions: Optional world position per vehicle (see draw_vehicles)
+            directions: Optional direction per vehicle (see draw_vehicles)
+            camera: Optional Camera; debug overlays are drawn in world
+                coordinates, so they are only shown at the default view
+            lane_counts: Vehicles per approach lane, labelled in debug mode
+        """
+        screen = get_screen()
+        background = background_layer.get(buildings, screen.get_size())
+        if camera is not None and camera.is_default:
+            camera = None
+        camera_state = camera.state if camera is not None else None
+        if camera is not None:
+            background = camera_view.background(background, camera)
+            debug_mode = False
+            overlay = None
+        if debug_mode:
+            background = debug_layer.background(background)
+        has_overlay = overlay is not None
+        full = (self.previous_rects is None or has_overlay or background is not self.background
+                or camera_state != self.camera_state)
+        self.background = background
+        self.camera_state = camera_state
         
-        # Draw the ID text
-        screen.blit(text_surface, text_rect)
+        def draw_lights():
+            if camera is None:
+                draw_traffic_lights(ns_light, ew_light)
+            else:
+                camera_view.draw_traffic_lights(ns_light, ew_light, camera)
+        
+        if full:
+            screen.blit(background, (0, 0))
+            draw_lights()
+            rects = draw_vehicles(vehicles, debug_mode, directions, positions, camera)
+            if debug_mode and lane_counts:
+                rects += draw_lane_counts(lane_counts)
+            if overlay is not None:
+                overlay()
+            pygame.display.flip()
+        else:
+            dirty = self.previous_rects
+            for rect in dirty:
+                screen.blit(background, rect, rect)
+            
+            lights = traffic_light_bounds() if camera is None else camera.world_rect_to_screen(traffic_light_bounds())
+            if (ns_light, ew_light) != self.previous_lights or lights.collidelist(dirty) != -1:
+                screen.blit(background, lights, lights)
+                draw_lights()
+                dirty = dirty + [lights]
+            
+            rects = draw_vehicles(vehicles, debug_mode, directions, positions, camera)
+            if debug_mode and lane_counts:
+                rects += draw_lane_counts(lane_counts)
+            pygame.display.update(dirty + rects)
+        
+        self.previous_rects = None if has_overlay else rects
+        self.previous_lights = (ns_light, ew_light)
 
-def draw_car(pos, color, direction, vehicle):
+def _draw_vehicle_id(screen, vehicle, x, y):
+    """Vehicle ID label on a semi-transparent background, returns the rectangle it covers"""
+    id_text = str(vehicle.vehicle_id % 1000)  # Keep last 3 digits of ID
+    text_surface = text_cache.render(id_text, 24, WHITE)
+    text_rect = text_surface.get_rect()
+    text_rect.center = (x, y)
+    
+    # Draw a semi-transparent background for better readability
+    padding = 2
+    background_rect = text_rect.inflate(padding * 2, padding * 2)
+    screen.blit(text_cache.backdrop(background_rect.size), background_rect)
+    
+    # Draw the ID text
+    screen.blit(text_surface, text_rect)
+    return background_rect
+
+def draw_car(pos, color, direction, vehicle, surface=None):
     """Draw a car-like shape at the given position with the given color and direction"""
-    screen = get_screen()
+    screen = surface if surface is not None else get_screen()
     x, y = pos
     
     # Car dimensions - adjusted by vehicle type
@@ -452,19 +894,64 @@ def draw_car(pos, color, direction, vehicle):
             pygame.draw.rect(screen, (255, 255, 200),
                            (headlight_x, headlight_y, headlight_size, headlight_size))
 
-def draw_debug_info(ns_light, ew_light, active_vehicles, spawn_schedule, current_tick, episode_length, lane_counts):
-    """Draw debug information"""
-    screen = get_screen()
-    
-    # Draw lane entry/exit points
-    for lane, pos_data in LANES.items():
-        # Entry points
-        pygame.draw.circle(screen, DEBUG_COLORS['lane_entry'], pos_data['in'], 5)
-        # Exit points
-        pygame.draw.circle(screen, DEBUG_COLORS['lane_exit'], pos_data['out'], 5)
-        # Queue positions
-        for pos in pos_data['queue']:
-            pygame.draw.circle(screen, DEBUG_COLORS['queue_pos'], pos, 3)
-    
-    # Draw intersection center marker
-    pygame.draw.circle(screen, DEBUG_COLORS['intersection'], (WIDTH//2, HEIGHT//2), 8, width=2) 
\ No newline at end of file
+class DebugLayer:
+    """Static debug geometry drawn once.
+    
+    Lane entry and exit points, queue positions and the intersection
+    marker never move, so they are drawn into their own alpha surface once
+    and composed with the background layer (again once per background).
+    Per frame, debug mode then only adds the vehicle labels and lane counts.
+    """
+    
+    def __init__(self):
+        self.geometry = None  # Transparent surface with the debug markers
+        self.surface = None   # Background with the markers on top
+        self.source = None    # Background layer surface it was composed from
+    
+    def get_geometry(self, size):
+        if self.geometry is None or self.geometry.get_size() != size:
+            self.geometry = self._build(size)
+        return self.geometry
+    
+    @staticmethod
+    def _build(size):
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        # Draw lane entry/exit points
+        for lane, pos_data in LANES.items():
+            # Entry points
+            pygame.draw.circle(surface, DEBUG_COLORS['lane_entry'], pos_data['in'], 5)
+            # Exit points
+            pygame.draw.circle(surface, DEBUG_COLORS['lane_exit'], pos_data['out'], 5)
+            # Queue positions
+            for pos in pos_data['queue']:
+                pygame.draw.circle(surface, DEBUG_COLORS['queue_pos'], pos, 3)
+        
+        # Draw intersection center marker
+        pygame.draw.circle(surface, DEBUG_COLORS['intersection'], (WIDTH//2, HEIGHT//2), 8, width=2)
+        return surface
+    
+    def background(self, background):
+        """The background layer with the debug geometry on top"""
+        if background is not self.source:
+            self.surface = background.copy()
+            self.surface.blit(self.get_geometry(background.get_size()), (0, 0))
+            self.source = background
+        return self.surface
+
+
+debug_layer = DebugLayer()
+
+def draw_lane_counts(lane_counts, surface=None):
+    """Label each approach lane with its vehicle count, returns the rectangles drawn"""
+    screen = surface if surface is not None else get_screen()
+    rects = []
+    for lane, count in lane_counts.items():
+        x, y = LANES[lane]['queue'][0]
+        text_surface = text_cache.render(f"{lane}: {count}", 20, WHITE)
+        text_rect = text_surface.get_rect(midleft=(x + 12, y))
+        text_rect.clamp_ip(screen.get_rect().inflate(-4, -4))  # Lanes start at the screen edge
+        background_rect = text_rect.inflate(4, 4)
+        screen.blit(text_cache.backdrop(background_rect.size), background_rect)
+        screen.blit(text_surface, text_rect)
+        rects.append(background_rect)
+    return rects